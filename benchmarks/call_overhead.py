@@ -0,0 +1,90 @@
+"""Per call overhead of the `call_stack` decorator.
+
+Compares the undecorated method, the previous decorator implementation
+(`decorator` + `inspect.signature(func).bind` on every call), the current
+decorator with recording enabled and with recording disabled.
+
+    python -m benchmarks.call_overhead
+"""
+import argparse
+import inspect
+import timeit
+
+from decorator import decorator
+
+from chepy import Chepy
+
+
+@decorator
+def legacy_call_stack(func, *args, **kwargs):
+    func_sig = dict()
+    func_self = args[0]
+    func_sig["function"] = func.__name__
+
+    bound_args = inspect.signature(func).bind(*args, **kwargs)
+    bound_args.apply_defaults()
+
+    func_arguments = dict(bound_args.arguments)
+    del func_arguments["self"]
+    func_sig["args"] = func_arguments
+    func_self._stack.append(func_sig)
+
+    return func(*args, **kwargs)
+
+
+def measure(label, fn, number, baseline=None):
+    best = min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e9
+    extra = "" if baseline is None else "  overhead {:>7.0f} ns".format(best - baseline)
+    print("{:<28}{:>9.0f} ns/call{}".format(label, best, extra))
+    return best
+
+
+def main():
+    parse = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parse.add_argument("-n", "--number", type=int, default=100000)
+    parse.add_argument("--items", type=int, default=100000)
+    args = parse.parse_args()
+
+    raw = Chepy.to_hex.__wrapped__
+    legacy = legacy_call_stack(raw)
+
+    recorded = Chepy("A")
+    unrecorded = Chepy("A", record=False)
+
+    def call(c, method):
+        # every variant resets the state and the recipe so the cost is identical
+        c.state = "A"
+        c._stack.clear()
+        method(c)
+
+    print("to_hex on a 1 byte state, {} calls".format(args.number))
+    base = measure("undecorated", lambda: call(unrecorded, raw), args.number)
+    measure("legacy decorator", lambda: call(recorded, legacy), args.number, base)
+    measure(
+        "call_stack, record=True",
+        lambda: call(recorded, Chepy.to_hex),
+        args.number,
+        base,
+    )
+    measure(
+        "call_stack, record=False",
+        lambda: call(unrecorded, Chepy.to_hex),
+        args.number,
+        base,
+    )
+
+    items = ["A"] * args.items
+    print("\nloop_list('to_hex') over {} items".format(args.items))
+    for label, record in [("record=True", True), ("record=False", False)]:
+        t = min(
+            timeit.repeat(
+                lambda: Chepy(list(items), record=record).loop_list("to_hex"),
+                number=1,
+                repeat=3,
+            )
+        )
+        print("{:<28}{:>9.3f} s".format(label, t))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Growth exponent of every public Chepy method.
+
+Each method runs on generated inputs of n, 2n, 4n and 8n bytes. The
+exponent k of time ~ size**k is fitted by least squares on the log-log
+points. A method is flagged when k exceeds its expected exponent, 1 for
+everything not listed in `EXPECTED`, by more than the tolerance. The
+command exits with 1 if any method is flagged.
+
+    python -m benchmarks.complexity -o complexity.json
+    python -m benchmarks.complexity --filter "base92|huffman" -n 16384
+"""
+import argparse
+import json
+import logging
+import math
+import platform
+import re
+import sys
+import time
+from typing import Dict, List, Tuple, Union
+
+from chepy.__version__ import __version__
+
+from .inputs import Timeout, methods, plan
+from .run import measure
+
+#: Methods that are superlinear by design, with their expected exponent
+EXPECTED: Dict[str, float] = {
+    # conversions of the whole state to and from one big integer
+    "bytes_to_long": 2.0,
+    "from_base": 2.0,
+    "from_base58": 2.0,
+    "from_base62": 2.0,
+    "to_base58": 2.0,
+    "to_base62": 2.0,
+}
+
+#: Times below this are dominated by the call overhead and are not fitted
+FLOOR = 1e-4
+
+
+def fit(points: List[Tuple[int, float]]) -> Union[float, None]:
+    """Least squares slope of log(seconds) against log(size)
+
+    Args:
+        points (List[Tuple[int, float]]): Size and seconds pairs
+
+    Returns:
+        Union[float, None]: The exponent, or None with fewer than two points
+    """
+    points = [(math.log(s), math.log(t)) for s, t in points if t > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+    return cov / var
+
+
+def profile(name: str, p, sizes: List[int], args) -> dict:
+    result = {"input": p.kind, "producer": p.producer}
+    while True:
+        points = []
+        result.pop("timeout", None)
+        for size in sizes:
+            try:
+                data = p.make_input(size)
+                seconds = measure(p, data, args.min_time, args.timeout)
+            except Timeout:
+                result["timeout"] = size
+                break
+            except Exception as e:  # noqa: B902
+                result["error"] = "{}: {}".format(type(e).__name__, e)[:80]
+                break
+            points.append((size, seconds))
+        # a method too slow for the smallest size is retried on smaller ones
+        if len(points) >= 2 or "timeout" not in result or sizes[0] <= 64:
+            break
+        sizes = [max(8, size // 8) for size in sizes]
+    result["seconds"] = {str(s): t for s, t in points}
+    # the call overhead hides the growth of fast methods, so only fit sizes
+    # whose time is measurably above it
+    fitted = [(s, t) for s, t in points if t >= FLOOR]
+    exponent = fit(fitted)
+    if exponent is None and "timeout" in result and points:
+        # slower than the timeout at the next size: at least the exponent
+        # that takes the last time past it
+        size, seconds = points[-1]
+        exponent = math.log(args.timeout / seconds, 2)
+    expected = EXPECTED.get(name, 1.0)
+    result["exponent"] = exponent
+    result["expected"] = expected
+    result["superlinear"] = (
+        exponent is not None and exponent > expected + args.tolerance
+    )
+    return result
+
+
+def main() -> int:
+    parse = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parse.add_argument("-o", "--output", default="complexity.json")
+    parse.add_argument("-n", type=int, default=32768, help="smallest size in bytes")
+    parse.add_argument("--filter", help="regex of method names")
+    parse.add_argument(
+        "--tolerance", type=float, default=0.3, help="allowed exponent over expected"
+    )
+    parse.add_argument("--timeout", type=float, default=10.0, help="seconds per size")
+    parse.add_argument("--min-time", type=float, default=0.1, help="min seconds")
+    parse.add_argument("-q", "--quiet", action="store_true")
+    args = parse.parse_args()
+    logging.disable(logging.WARNING)
+
+    pattern = re.compile(args.filter) if args.filter else None
+    sizes = [args.n * k for k in (1, 2, 4, 8)]
+    results, skipped = {}, {}
+    for name in methods():
+        if pattern is not None and not pattern.search(name):
+            continue
+        p, reason = plan(name)
+        if p is None:
+            skipped[name] = reason
+            continue
+        results[name] = r = profile(name, p, sizes, args)
+        if not args.quiet:
+            exponent = "-" if r["exponent"] is None else "{:.2f}".format(r["exponent"])
+            flag = "  SUPERLINEAR" if r["superlinear"] else ""
+            print("{:<40}{:>6}{}".format(name, exponent, flag), file=sys.stderr)
+
+    flagged = sorted(name for name, r in results.items() if r["superlinear"])
+    report = {
+        "meta": {
+            "chepy": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "sizes": sizes,
+            "tolerance": args.tolerance,
+        },
+        "results": results,
+        "skipped": skipped,
+        "superlinear": flagged,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+    for name in flagged:
+        print(
+            "{:<40}exponent {:.2f}, expected {:.1f}".format(
+                name, results[name]["exponent"], results[name]["expected"]
+            )
+        )
+    print(
+        "{} methods fitted, {} superlinear, written to {}".format(
+            len(results), len(flagged), args.output
+        )
+    )
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,369 @@
+"""Discovery of benchmarkable Chepy methods and generated inputs for them.
+
+Every public method is probed with a small input of each kind below until
+one runs without an error. Methods that decode or decompress get the output
+of their encoding counterpart, so `from_base64` is fed base64 and
+`gzip_decompress` a gzip archive.
+"""
+import base64
+import inspect
+import json
+import random
+import signal
+import string
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Union
+
+from chepy import Chepy
+
+#: Methods that touch the network, files, the clipboard or the terminal, are
+#: random, or only manage states and buffers
+EXCLUDED = frozenset(
+    {
+        "compile_recipe",
+        "copy",
+        "copy_to_clipboard",
+        "cyberchef",
+        "debug",
+        "generate_uuid",
+        "get_register",
+        "get_ssl_cert",
+        "http_request",
+        "iter_recipe_batch",
+        "lazy",
+        "load_buffer",
+        "load_command",
+        "load_dir",
+        "load_file",
+        "load_from_url",
+        "load_from_urls",
+        "load_recipe",
+        "plugins",
+        "pretty",
+        "print",
+        "profile",
+        "random_case",
+        "read_file",
+        "run_recipe",
+        "run_recipe_batch",
+        "run_script",
+        "save_recipe",
+        "search_dir",
+        "set_plugin_path",
+        "shuffle",
+        "walk_dir",
+        "web",
+        "write",
+        "write_binary",
+        "write_to_file",
+    }
+)
+
+#: Values for required arguments, by argument name
+ARGUMENTS = {
+    "key": "0123456789abcdef",
+    "secret": "secret",
+    "password": "secret",
+    "salt": "salt",
+    "encoding": "utf-8",
+    "tags": ["a"],
+    "str2": "abc",
+    "repl": "b",
+    "width": 8,
+    "rotate_by": 3,
+    "prefix": "flag",
+    "chunk_size": 4,
+    "x": "a",
+    "y": "b",
+    "file_name": "a.txt",
+    "filename": "a.txt",
+    "indices1": [0],
+    "indices2": [1],
+    "n": 3,
+    "amount": 3,
+    "pattern": "a",
+    "regex": "a",
+    "data": "a",
+    "length": 4,
+    "index": 0,
+    "indexes": [0],
+    "callback": "to_hex",
+    "iterations": 2,
+    "start": 0,
+    "end": 4,
+    "by": "a",
+    "chars": "a",
+    "keys": ["a"],
+    "query": "$",
+    "expression": "[0]",
+    "format": "md5_crypt",
+    "methods": [("to_hex",)],
+    "radix": 16,
+    "base": 16,
+    "digest": "md5",
+    "public_key": "tests/files/public.pem",
+    "private_key": "tests/files/private.pem",
+}
+
+#: Arguments that differ from `ARGUMENTS` for one method
+METHOD_ARGUMENTS = {
+    "huffman_decode": {"huffman_codes": {}},
+    "vigenere_decode": {"key": "secret"},
+    "vigenere_encode": {"key": "secret"},
+}
+
+#: Methods whose producer returns both the state and the arguments
+SPLIT_INPUTS: Dict[str, Callable[[Any], Tuple[Any, Dict[str, Any]]]] = {
+    "huffman_decode": lambda out: (out["encoded"], {"huffman_codes": out["codes"]}),
+}
+
+#: Encoding counterpart of decoding methods
+INVERSES = (
+    ("from_", "to_"),
+    ("_decode", "_encode"),
+    ("_decompress", "_compress"),
+    ("decode_", "encode_"),
+    ("_to_str", "_from_str"),
+)
+
+_ALPHABET = (string.ascii_letters + string.digits + " ").encode()
+
+
+class Timeout(Exception):
+    pass
+
+
+@contextmanager
+def time_limit(seconds: float) -> Iterator[None]:
+    """Abort the block with `Timeout` after `seconds` of wall time. Only works
+    in the main thread of a Unix process."""
+
+    def alarm(*_):
+        raise Timeout()
+
+    previous = signal.signal(signal.SIGALRM, alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _text(size: int, rng: random.Random) -> bytes:
+    return bytes(rng.choice(_ALPHABET) for _ in range(min(size, 4096))) * (
+        size // 4096 + 1
+    )
+
+
+def _raw(size: int, rng: random.Random) -> bytes:
+    block = bytes(rng.getrandbits(8) for _ in range(min(size, 4096)))
+    return (block * (size // len(block) + 1))[:size] if block else b""
+
+
+#: Input generators by kind. Each takes the size in bytes and a seeded
+#: random generator.
+KINDS: Dict[str, Callable[[int, random.Random], Any]] = {
+    "text": lambda n, rng: _text(n, rng)[:n],
+    "bytes": _raw,
+    "hex": lambda n, rng: _raw(n // 2, rng).hex().encode(),
+    "base64": lambda n, rng: base64.b64encode(_raw(n * 3 // 4, rng)),
+    "numbers": lambda n, rng: " ".join(
+        str(rng.randint(0, 255)) for _ in range(max(1, n // 4))
+    ).encode(),
+    "number": lambda n, rng: str(rng.getrandbits(max(8, min(n, 4096)))).encode()[
+        :n
+    ],
+    "integers": lambda n, rng: [
+        rng.randint(0, 255) for _ in range(max(1, n // 4))
+    ],
+    "dict": lambda n, rng: {
+        "k{}".format(i): _text(8, rng)[:8].decode() for i in range(max(1, n // 16))
+    },
+    "list": lambda n, rng: [
+        _text(8, rng)[:8].decode() for _ in range(max(1, n // 8))
+    ],
+    "json": lambda n, rng: json.dumps(
+        [{"a": i, "b": "text"} for i in range(max(1, n // 20))]
+    ).encode(),
+}
+
+
+def methods() -> List[str]:
+    """Names of all public Chepy methods that can be benchmarked
+
+    Returns:
+        List[str]: Sorted method names
+    """
+    names = []
+    for name in dir(Chepy):
+        attr = inspect.getattr_static(Chepy, name)
+        if name.startswith(("_", "cli_")) or name in EXCLUDED:
+            continue
+        if isinstance(attr, (property, classmethod, staticmethod)):
+            continue
+        if callable(attr):
+            names.append(name)
+    return sorted(names)
+
+
+def arguments(name: str) -> Union[Dict[str, Any], None]:
+    """Arguments for a method, using `ARGUMENTS` for the required ones
+
+    Args:
+        name (str): Method name
+
+    Returns:
+        Union[Dict[str, Any], None]: The arguments, or None if a required
+            argument has no known value
+    """
+    args = {}
+    overrides = METHOD_ARGUMENTS.get(name, {})
+    first, *params = inspect.signature(getattr(Chepy, name)).parameters.values()
+    for p in params:
+        if p.kind is p.VAR_KEYWORD or p.default is not p.empty:
+            continue
+        if p.name in overrides:
+            args[p.name] = overrides[p.name]
+            continue
+        if p.name not in ARGUMENTS:
+            if p.kind is p.VAR_POSITIONAL:
+                continue
+            return None
+        args[p.name] = ARGUMENTS[p.name]
+    return args
+
+
+def call(name: str, data: Any, args: Dict[str, Any]) -> Any:
+    """Run a method on a new Chepy object
+
+    Args:
+        name (str): Method name
+        data (Any): The state
+        args (Dict[str, Any]): Arguments
+
+    Returns:
+        Any: The output state
+    """
+    first, *params = inspect.signature(getattr(Chepy, name)).parameters.values()
+    positional = []
+    kwargs = dict(args)
+    for p in params:
+        if p.kind is p.VAR_POSITIONAL:
+            values = kwargs.pop(p.name, ())
+            if not isinstance(values, (list, tuple)):
+                values = [values]
+            positional = list(values)
+    c = Chepy(data, record=False)
+    if positional:
+        getattr(c, name)(*positional)
+    else:
+        getattr(c, name)(**kwargs)
+    return c.state
+
+
+def inverse(name: str) -> Union[str, None]:
+    """The encoding counterpart of a decoding method
+
+    Args:
+        name (str): Method name
+
+    Returns:
+        Union[str, None]: The counterpart, if Chepy has one
+    """
+    for decode, encode in INVERSES:
+        if decode in name:
+            candidate = name.replace(decode, encode)
+            if hasattr(Chepy, candidate) and candidate not in EXCLUDED:
+                return candidate
+    return None
+
+
+class Plan(object):
+    """How to benchmark one method
+
+    Args:
+        name (str): Method name
+        kind (str): Input kind, a key of `KINDS`
+        args (Dict[str, Any]): Arguments
+        producer (Union[str, None]): Method that turns the input into the real input
+    """
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        args: Dict[str, Any],
+        producer: Union[str, None] = None,
+    ):
+        self.name = name
+        self.kind = kind
+        self.args = args
+        self.producer = producer
+
+    def __repr__(self) -> str:
+        via = " via " + self.producer if self.producer else ""
+        return "<Plan {} on {}{}>".format(self.name, self.kind, via)
+
+    def make_input(self, size: int, seed: int = 0) -> Any:
+        """Generate the input for a size
+
+        Args:
+            size (int): Input size in bytes
+            seed (int, optional): Random seed. Defaults to 0.
+
+        Returns:
+            Any: The input
+        """
+        data = KINDS[self.kind](size, random.Random(seed))
+        if self.producer is not None:
+            data = call(self.producer, data, arguments(self.producer) or {})
+        return data
+
+    def run(self, data: Any) -> Any:
+        """Run the method on an input
+
+        Args:
+            data (Any): The input
+
+        Returns:
+            Any: The output state
+        """
+        if self.name in SPLIT_INPUTS:
+            data, args = SPLIT_INPUTS[self.name](data)
+            return call(self.name, data, dict(self.args, **args))
+        return call(self.name, data, self.args)
+
+
+def plan(
+    name: str, probe: int = 64, timeout: float = 2.0
+) -> Tuple[Union[Plan, None], str]:
+    """Find an input kind the method accepts by probing it with small inputs
+
+    Args:
+        name (str): Method name
+        probe (int, optional): Probe size in bytes. Defaults to 64.
+        timeout (float, optional): Time limit of a probe. Defaults to 2.0.
+
+    Returns:
+        Tuple[Union[Plan, None], str]: The plan, or None and the reason it was skipped
+    """
+    args = arguments(name)
+    if args is None:
+        return None, "required arguments"
+    candidates = []
+    producer = inverse(name)
+    if producer is not None:
+        candidates += [Plan(name, kind, args, producer) for kind in ("text", "bytes")]
+    candidates += [Plan(name, kind, args) for kind in KINDS]
+    reason = "no input accepted"
+    for candidate in candidates:
+        try:
+            with time_limit(timeout):
+                candidate.run(candidate.make_input(probe))
+            return candidate, ""
+        except Timeout:
+            reason = "probe timed out"
+        except Exception as e:  # noqa: B902
+            reason = "{}: {}".format(type(e).__name__, e)[:80]
+    return None, reason
@@ -0,0 +1,54 @@
+"""Peak memory and wall time of eager chains against lazy fused plans.
+
+Runs `from_hex().xor(...).rotate_left(...).to_hex()` and a hashing chain on a
+random hex state, once eagerly and once with `Chepy.lazy`.
+
+    python -m benchmarks.lazy_fusion --size 64
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+from chepy import Chepy
+
+
+def encode(c):
+    return c.from_hex().xor("41424344").rotate_left(3).to_hex()
+
+
+def digest(c):
+    return c.from_hex().xor("41").zlib_compress(1).sha2_256()
+
+
+def run(chain, make, data):
+    c = chain(make(data))
+    return c.o
+
+
+def measure(label, chain, make, data):
+    start = time.perf_counter()
+    run(chain, make, data)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    run(chain, make, data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("{:<24}{:>9.2f} s{:>12.1f} MB peak".format(label, elapsed, peak / 2 ** 20))
+
+
+def main():
+    parse = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parse.add_argument("--size", type=int, default=64, help="decoded size in MB")
+    args = parse.parse_args()
+
+    data = os.urandom(args.size * 2 ** 20).hex()
+    print("{} MB hex input ({} MB decoded)".format(len(data) // 2 ** 20, args.size))
+    for name, chain in [("encode", encode), ("digest", digest)]:
+        measure(name + " eager", chain, lambda d: Chepy(d, record=False), data)
+        measure(name + " lazy", chain, lambda d: Chepy.lazy(d), data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Throughput benchmark of every public Chepy method.
+
+Each method runs on generated inputs of 1 KB, 1 MB and 64 MB. A larger
+size is skipped when the time of the previous size, scaled linearly,
+would exceed the time budget. Results are ops/sec and MB/s per size.
+
+    python -m benchmarks.run run -o baseline.json
+    python -m benchmarks.run run -o current.json --filter "hex|base64"
+    python -m benchmarks.run compare baseline.json current.json --threshold 0.25
+"""
+import argparse
+import json
+import platform
+import re
+import sys
+import time
+
+from chepy.__version__ import __version__
+
+from .inputs import Timeout, methods, plan, time_limit
+
+SIZES = {"1K": 1024, "1M": 1024 ** 2, "64M": 64 * 1024 ** 2}
+
+
+def measure(p, data, min_time: float, timeout: float) -> float:
+    """Best time of a method on an input, repeating it for at least `min_time`
+
+    Returns:
+        float: Seconds per call
+    """
+    best = float("inf")
+    total = 0.0
+    runs = 0
+    with time_limit(timeout):
+        while runs < 3 or (total < min_time and runs < 1000):
+            start = time.perf_counter()
+            p.run(data)
+            elapsed = time.perf_counter() - start
+            best = min(best, elapsed)
+            total += elapsed
+            runs += 1
+    return best
+
+
+def run(args) -> int:
+    pattern = re.compile(args.filter) if args.filter else None
+    sizes = [s for s in args.sizes.split(",") if s]
+    results, skipped = {}, {}
+    for name in methods():
+        if pattern is not None and not pattern.search(name):
+            continue
+        p, reason = plan(name)
+        if p is None:
+            skipped[name] = reason
+            continue
+        results[name] = {"input": p.kind, "producer": p.producer}
+        previous = None
+        for label in sizes:
+            size = SIZES[label]
+            if previous is not None and previous[1] * size / previous[0] > args.budget:
+                results[name][label] = {"skipped": "over budget"}
+                continue
+            try:
+                data = p.make_input(size)
+                seconds = measure(p, data, args.min_time, args.budget * 2)
+            except Timeout:
+                results[name][label] = {"skipped": "timeout"}
+                break
+            except Exception as e:  # noqa: B902
+                error = "{}: {}".format(type(e).__name__, e)
+                results[name][label] = {"skipped": error[:80]}
+                break
+            previous = (size, seconds)
+            results[name][label] = {
+                "ops": 1 / seconds if seconds else float("inf"),
+                "mbps": size / 1024 ** 2 / seconds if seconds else float("inf"),
+            }
+        if not args.quiet:
+            row = "  ".join(
+                "{}={:.1f} MB/s".format(label, r["mbps"])
+                for label, r in results[name].items()
+                if isinstance(r, dict) and "mbps" in r
+            )
+            print("{:<40}{}".format(name, row), file=sys.stderr)
+
+    report = {
+        "meta": {
+            "chepy": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "sizes": sizes,
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+    print(
+        "{} methods benchmarked, {} skipped, written to {}".format(
+            len(results), len(skipped), args.output
+        )
+    )
+    return 0
+
+
+def compare(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    with open(args.current) as f:
+        current = json.load(f)["results"]
+    regressions = []
+    for name, sizes in sorted(baseline.items()):
+        for label, before in sizes.items():
+            after = current.get(name, {}).get(label)
+            if not isinstance(before, dict) or "ops" not in before:
+                continue
+            if not isinstance(after, dict) or "ops" not in after:
+                continue
+            ratio = after["ops"] / before["ops"]
+            if ratio < 1 - args.threshold:
+                regressions.append((name, label, before["ops"], after["ops"], ratio))
+    for name, label, before, after, ratio in regressions:
+        print(
+            "{:<40}{:>4}  {:>12.1f} -> {:>12.1f} ops/s  ({:+.0%})".format(
+                name, label, before, after, ratio - 1
+            )
+        )
+    print("{} regressions over {:.0%}".format(len(regressions), args.threshold))
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parse = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parse.add_subparsers(dest="command", required=True)
+
+    r = commands.add_parser("run", help="benchmark methods into a JSON file")
+    r.add_argument("-o", "--output", default="benchmark.json")
+    r.add_argument("--sizes", default="1K,1M,64M", help="comma separated: 1K,1M,64M")
+    r.add_argument("--filter", help="regex of method names")
+    r.add_argument("--budget", type=float, default=5.0, help="max seconds per call")
+    r.add_argument("--min-time", type=float, default=0.2, help="min seconds per size")
+    r.add_argument("-q", "--quiet", action="store_true")
+    r.set_defaults(func=run)
+
+    c = commands.add_parser("compare", help="fail if a method got slower")
+    c.add_argument("baseline")
+    c.add_argument("current")
+    c.add_argument(
+        "--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%"
+    )
+    c.set_defaults(func=compare)
+
+    args = parse.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Startup time of `import chepy` and of a one-shot `chepy -r recipe data`.
+
+Every scenario runs in a new interpreter, after one warm-up run that writes
+the bytecode cache to a temporary directory. The median of the runs, minus
+the median startup of a bare interpreter, is compared with the scenario's
+budget and the command exits with 1 if any scenario is over it.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 20 --importtime
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RECIPE = [{"function": "to_hex", "args": {"delimiter": ""}}]
+
+#: Code run by each scenario, and its budget in seconds on top of the
+#: interpreter startup
+SCENARIOS = {
+    "import": ("import chepy; chepy.Chepy", 0.15),
+    "recipe": (
+        "import sys; sys.argv = ['chepy', '-r', {recipe!r}, 'abc']; "
+        "from chepy.__main__ import main; main()",
+        0.2,
+    ),
+}
+
+
+def run(code: str, env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", code], env=env, check=True, stdout=subprocess.DEVNULL
+    )
+    return time.perf_counter() - start
+
+
+def importtime(code: str, env: dict, top: int = 15) -> str:
+    """The modules with the largest cumulative import time"""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    ).stderr
+    rows = []
+    for line in out.splitlines()[1:]:
+        _, own, total, name = (p.strip() for p in line.replace(":", "|", 1).split("|"))
+        rows.append((int(total), int(own), name))
+    rows.sort(reverse=True)
+    return "\n".join(
+        "{:>10} us {:>10} us  {}".format(total, own, name)
+        for total, own, name in rows[:top]
+    )
+
+
+def main() -> int:
+    parse = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parse.add_argument("--runs", type=int, default=10)
+    parse.add_argument("--importtime", action="store_true", help="show slow imports")
+    parse.add_argument("-o", "--output", help="write the results as JSON")
+    args = parse.parse_args()
+
+    over = []
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        recipe = str(Path(tmp) / "recipe.json")
+        Path(recipe).write_text(json.dumps(RECIPE))
+        env = dict(os.environ, PYTHONPYCACHEPREFIX=str(Path(tmp) / "pycache"))
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        env["PYTHONPATH"] = os.pathsep.join(
+            filter(None, [str(Path(__file__).parent.parent), env.get("PYTHONPATH")])
+        )
+        run("pass", env)
+        python = statistics.median(run("pass", env) for _ in range(args.runs))
+        print("{:<8}{:>8.1f} ms median".format("python", python * 1000))
+        for name, (code, budget) in SCENARIOS.items():
+            code = code.format(recipe=recipe)
+            run(code, env)
+            times = [run(code, env) for _ in range(args.runs)]
+            net = statistics.median(times) - python
+            fastest = min(times) - python
+            results[name] = {"net": net, "min": fastest, "budget": budget}
+            status = "ok" if net <= budget else "OVER BUDGET"
+            print(
+                "{:<8}{:>8.1f} ms median{:>8.1f} ms min  budget {:.0f} ms  {}".format(
+                    name, net * 1000, fastest * 1000, budget * 1000, status
+                )
+            )
+            if net > budget:
+                over.append(name)
+            if args.importtime:
+                print(importtime(code, env))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
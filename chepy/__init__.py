@@ -1,71 +1,31 @@
-import pretty_errors
-from docstring_parser import parse as _doc_parse
-from types import FunctionType
+import importlib
+from typing import Any, List
 
-from .modules.aritmeticlogic import AritmeticLogic
-from .modules.codetidy import CodeTidy
-from .modules.compression import Compression
-from .modules.dataformat import DataFormat
-from .modules.datetimemodule import DateTime
-from .modules.encryptionencoding import EncryptionEncoding
-from .modules.extractors import Extractors
-from .modules.hashing import Hashing
-from .modules.language import Language
-from .modules.links import Links
-from .modules.networking import Networking
-from .modules.other import Other
-from .modules.publickey import Publickey
-from .modules.search import Search
-from .modules.utils import Utils
-from .modules.internal.colors import cyan
+# Chepy is assembled from every module and plugin, and the config and plugins
+# are loaded, the first time an attribute of the package is used. Importing a
+# submodule, like the `chepy --remote` client, does not pay for it.
+_chepy = None
 
-from .config import ChepyConfig
 
-_plugins = ChepyConfig().load_plugins()
+def _load():
+    global _chepy
+    if _chepy is None:
+        _chepy = importlib.import_module("._chepy", __name__)
+    return _chepy
 
 
-class Chepy(
-    AritmeticLogic,
-    CodeTidy,
-    Compression,
-    DataFormat,
-    DateTime,
-    EncryptionEncoding,
-    Extractors,
-    Hashing,
-    Language,
-    Links,
-    Networking,
-    Other,
-    Publickey,
-    Search,
-    Utils,
-    *_plugins
-):
-    """Chepy class that exposes all functionality of Chepy and its plugins."""
+def __getattr__(name: str) -> Any:
+    if name.startswith("__"):
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    try:
+        value = getattr(_load(), name)
+    except AttributeError:
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name)
+        ) from None
+    globals()[name] = value
+    return value
 
-    pass
 
-
-def show_plugins():  # pragma: no cover
-    hold = {}
-    for p in _plugins:
-        hold[p.__name__] = [
-            name
-            for name, attr in vars(p).items()
-            if isinstance(attr, FunctionType) and not name.startswith("_")
-        ]
-    return hold
-
-
-def search_chepy_methods(search: str) -> None:  # pragma: no cover
-    """Search for Chepy methods
-
-    Args:
-        search (str): String to search for
-    """
-    methods = dir(Chepy)
-    for method in methods:
-        if search in method and not method.startswith("_"):
-            docs = _doc_parse(getattr(Chepy, method).__doc__).short_description
-            print(cyan(method), docs)
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(dir(_load())))
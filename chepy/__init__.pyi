@@ -1,4 +1,6 @@
-from typing import Dict, List
+from typing import Any, Dict, List, Union
+
+from .modules.internal.cache import ResultCache
 
 from .modules.aritmeticlogic import AritmeticLogic
 from .modules.codetidy import CodeTidy
@@ -34,7 +36,8 @@ class Chepy(
     Publickey,
     Search,
     Utils,
-): ...
+):
+    def __init__(self, *data: Any, record: bool = ..., cache: Union[bool, ResultCache, None] = ..., profile: bool = ..., memory_budget: Union[int, None] = ...) -> None: ...
 
 def search_chepy_methods(search: str) -> None: ...
 def show_plugins() -> Dict[str, List[str]]: ...
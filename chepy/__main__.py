@@ -1,40 +1,61 @@
+import os
 import sys
-import inspect
-import fire
+import json
 import regex as re
 import argparse
 import subprocess
 from pathlib import Path
-from docstring_parser import parse as _parse_doc
-from prompt_toolkit.completion import (
-    Completer,
-    Completion,
-    FuzzyCompleter,
-    merge_completers,
-)
-from prompt_toolkit.validation import ValidationError, Validator
-from prompt_toolkit.history import FileHistory
-from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
-from prompt_toolkit.styles import Style
-from prompt_toolkit import PromptSession
 
-from chepy import Chepy
+import lazy_import
+
+import chepy as chepy_package
 from chepy.__version__ import __version__
-import chepy.modules.internal.cli as chepy_cli
+from chepy.modules.internal.batch import (
+    DELIMITERS,
+    read_records,
+    run_dir_batch,
+    run_stream_batch,
+    write_results,
+    write_summary,
+)
 from chepy.modules.internal.colors import red, yellow, cyan, magenta, green
-from chepy.config import ChepyConfig
 
-config = ChepyConfig()
-options = []
-chepy = dir(Chepy)
+# the interactive prompt is only loaded when no recipe is given, so that
+# `chepy -r recipe.json data` starts quickly
+fire = lazy_import.lazy_module("fire")
+chepy_cli = lazy_import.lazy_module("chepy.modules.internal.cli")
+chepy_server = lazy_import.lazy_module("chepy.modules.internal.server")
+styles = lazy_import.lazy_module("prompt_toolkit.styles")
+PromptSession = lazy_import.lazy_callable("prompt_toolkit.PromptSession")
+FileHistory = lazy_import.lazy_callable("prompt_toolkit.history.FileHistory")
+AutoSuggestFromHistory = lazy_import.lazy_callable(
+    "prompt_toolkit.auto_suggest.AutoSuggestFromHistory"
+)
+FuzzyCompleter = lazy_import.lazy_callable("prompt_toolkit.completion.FuzzyCompleter")
+merge_completers = lazy_import.lazy_callable(
+    "prompt_toolkit.completion.merge_completers"
+)
+
+# the Chepy class and the config are loaded by main, so that `chepy --remote`
+# does not assemble Chepy
+Chepy = None
+config = None
+chepy = []
 fire_obj = None
-errors = []
 
-prompt_colors = config.prompt_colors.split()
+prompt_colors = []
+
+
+def load_chepy():
+    global Chepy, config, chepy, prompt_colors
+    Chepy = chepy_package.Chepy
+    config = chepy_package._config
+    chepy = dir(Chepy)
+    prompt_colors = config.prompt_colors.split()
 
 
 def get_style():
-    return Style.from_dict(
+    return styles.Style.from_dict(
         {
             "completion-menu.completion.current": "bg:{}".format(config.prompt_search_background),
             # "completion-menu.completion": "bg:#008888 #ffffff",
@@ -55,44 +76,6 @@ def get_style():
     )
 
 
-def get_options():
-    global errors
-    options = dict()
-    for method in chepy:
-        try:
-            attributes = getattr(Chepy, method)
-            if not method.startswith("_") and not isinstance(attributes, property):
-                args = inspect.getfullargspec(attributes).args
-                parsed_doc = _parse_doc(attributes.__doc__)
-                if len(args) == 1:
-                    options[method] = {
-                        "options": list(
-                            map(lambda d: {"flag": d, "meta": ""}, args[1:])
-                        ),
-                        "meta": parsed_doc.short_description,
-                        "returns": parsed_doc.returns.type_name,
-                    }
-                else:
-                    options[method] = {
-                        "options": list(
-                            map(
-                                lambda d: {
-                                    "flag": d[1],
-                                    "meta": parsed_doc.params[d[0]].description,
-                                },
-                                enumerate(args[1:]),
-                            )
-                        ),
-                        "meta": parsed_doc.short_description,
-                        "returns": parsed_doc.returns.type_name,
-                    }
-        except:
-            e_type, e_msg, e_traceback = sys.exc_info()
-            errors.append((e_type.__name__, "Error parsing options in:", method))
-            continue
-    return options
-
-
 def prompt_message(fire_obj):
     elements = [
         ("class:prompt1", config.prompt_char),
@@ -116,7 +99,6 @@ def prompt_message(fire_obj):
 
 
 def bottom_toolbar(fire_obj):
-    global errors
     if isinstance(fire_obj, Chepy):
         states = len(fire_obj.states) - 1 if fire_obj is not None else 0
         current_state = fire_obj._current_index if fire_obj is not None else 0
@@ -141,77 +123,13 @@ def bottom_toolbar(fire_obj):
                 "class:prompt_toolbar_plugins",
                 " Plugins: {} ".format(config.enable_plugins),
             ),
-            ("class:prompt_toolbar_errors", " Errors: {} ".format(len(errors))),
+            (
+                "class:prompt_toolbar_errors",
+                " Errors: {} ".format(len(chepy_cli.errors)),
+            ),
         ]
 
 
-class CustomValidator(Validator):
-    def validate(self, document):
-        text = document.text.split()
-        if re.search(r"^(!|#|\?)", document.text):
-            pass
-        elif len(text) > 1:
-            if not text[-2].startswith("--"):
-                if (
-                    not re.search(r"\"|'", text[-1])
-                    and not text[-1].startswith("--")
-                    and text[-1] not in list(get_options().keys())
-                ):
-                    raise ValidationError(
-                        cursor_position=1,
-                        message="{text} is not a valid Chepy method".format(
-                            text=text[-1]
-                        ),
-                    )
-
-
-class CustomCompleter(Completer):
-    def get_completions(self, document, complete_event):
-        global options
-        method_dict = get_options()
-        word = document.get_word_before_cursor()
-
-        methods = list(method_dict.items())
-
-        selected = document.text.split()
-        if len(selected) > 0:
-            selected = selected[-1]
-            if selected.startswith("cli_"):
-                methods = options
-            elif not selected.startswith("--"):
-                current = method_dict.get(selected)
-                if current is not None:
-                    has_options = method_dict.get(selected)["options"]
-                    if has_options is not None:
-                        options = [
-                            ("--{}".format(o["flag"]), {"meta": o["meta"]})
-                            for o in has_options
-                        ]
-                        methods = options + methods
-            else:
-                methods = options
-
-        for method_name, method_docs in methods:
-            if method_name.startswith(word):
-                meta = (
-                    method_docs["meta"]
-                    if isinstance(method_docs, dict) and method_docs.get("meta")
-                    else ""
-                )
-                not_chepy_obj = ""
-                if method_docs.get("returns"):
-                    if method_docs["returns"] is None:
-                        not_chepy_obj = "bg:{}".format(config.prompt_cli_method)
-                    elif method_docs["returns"] == "ChepyPlugin":
-                        not_chepy_obj = "bg:{}".format(config.prompt_plugin_method)
-                yield Completion(
-                    method_name,
-                    start_position=-len(word),
-                    display_meta=meta,
-                    style=not_chepy_obj,
-                )
-
-
 def get_current_type(obj):
     if config.show_rprompt:
         if obj:
@@ -230,21 +148,255 @@ def parse_args(args):
     parse.add_argument(
         "-r", "--recipe", dest="recipe", help="Run a Chepy recipe and exit"
     )
-    parse.add_argument("data", nargs="+")
+    parse.add_argument(
+        "--stdin",
+        action="store_true",
+        help="Run the recipe on every record of stdin and write the outputs as they go",
+    )
+    parse.add_argument(
+        "--records",
+        choices=sorted(DELIMITERS),
+        default="line",
+        help="Record format of --stdin. Defaults to line",
+    )
+    parse.add_argument(
+        "--field", help="Key path of the ndjson value to run the recipe on, like a.b"
+    )
+    parse.add_argument(
+        "--in-dir",
+        dest="in_dir",
+        help="Run the recipe on every file of this directory tree",
+    )
+    parse.add_argument(
+        "--out-dir",
+        dest="out_dir",
+        help="Write the outputs of --in-dir to the same paths under this directory",
+    )
+    parse.add_argument(
+        "--glob",
+        action="append",
+        help="Glob pattern of the --in-dir files to run on. Can be repeated",
+    )
+    parse.add_argument(
+        "--force",
+        action="store_true",
+        help="Run --in-dir on every file, even the unchanged ones",
+    )
+    parse.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes of --stdin and --in-dir. Defaults to 1",
+    )
+    order = parse.add_mutually_exclusive_group()
+    order.add_argument(
+        "--ordered",
+        dest="ordered",
+        action="store_true",
+        default=True,
+        help="Write --stdin outputs in input order. The default",
+    )
+    order.add_argument(
+        "--unordered",
+        dest="ordered",
+        action="store_false",
+        help="Write --stdin outputs as soon as they are ready",
+    )
+    parse.add_argument(
+        "--remote",
+        metavar="ADDRESS",
+        help="Run the recipe on a chepy serve process. Every data argument is a record",
+    )
+    parse.add_argument("data", nargs="*")
+    parsed = parse.parse_args(args)
+    if parsed.remote:
+        if not parsed.recipe:
+            parse.error("--remote requires -r/--recipe")
+        if parsed.in_dir:
+            parse.error("--remote and --in-dir cannot be used together")
+    if parsed.stdin and parsed.in_dir:
+        parse.error("--stdin and --in-dir cannot be used together")
+    if parsed.stdin or parsed.in_dir:
+        mode = "--stdin" if parsed.stdin else "--in-dir"
+        if not parsed.recipe:
+            parse.error("{} requires -r/--recipe".format(mode))
+        if parsed.data:
+            parse.error("{} does not take data arguments".format(mode))
+    elif not parsed.data:
+        parse.error("the following arguments are required: data")
+    if parsed.field and parsed.records != "ndjson":
+        parse.error("--field requires --records ndjson")
+    if parsed.in_dir:
+        if not parsed.out_dir:
+            parse.error("--in-dir requires --out-dir")
+        if Path(parsed.in_dir).resolve() == Path(parsed.out_dir).resolve():
+            parse.error("--in-dir and --out-dir must be different directories")
+    elif parsed.out_dir or parsed.glob or parsed.force:
+        parse.error("--out-dir, --glob and --force require --in-dir")
+    return parsed
+
+
+def parse_serve_args(args):
+    parse = argparse.ArgumentParser(prog="chepy serve")
+    parse.add_argument(
+        "--listen",
+        metavar="ADDRESS",
+        help="unix:PATH, a socket path, or HOST:PORT on a loopback address. "
+        "Defaults to ~/.chepy/serve.sock",
+    )
+    parse.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker processes. Defaults to the number of CPUs",
+    )
+    parse.add_argument(
+        "--allow-unsafe",
+        action="store_true",
+        help="Allow recipes that read or write files, run commands or scripts, "
+        "or make network requests",
+    )
     return parse.parse_args(args)
 
 
+def serve(args):
+    """Run recipes for `chepy --remote` clients until interrupted."""
+    try:
+        server = chepy_server.make_server(
+            Chepy,
+            args.listen,
+            args.workers,
+            token=os.environ.get(chepy_server.TOKEN_ENV),
+            allow_unsafe=args.allow_unsafe,
+        )
+    except (OSError, ValueError) as e:
+        print(red(type(e).__name__), yellow(str(e)))
+        sys.exit(1)
+    print(
+        green(
+            "chepy serve: {} workers on {}".format(
+                server.recipes.workers,
+                args.listen or chepy_server.DEFAULT_ADDRESS,
+            )
+        ),
+        flush=True,
+    )
+    if server.token and not os.environ.get(chepy_server.TOKEN_ENV):
+        print(
+            yellow(
+                "Clients must set {}={}".format(chepy_server.TOKEN_ENV, server.token)
+            ),
+            flush=True,
+        )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(green("\nOKBye"))
+    finally:
+        server.server_close()
+        server.recipes.close()
+
+
+def remote_results(args):
+    """Results of the records of stdin, or of the data arguments, from a chepy
+    serve process"""
+    recipe = json.loads(Path(args.recipe).expanduser().read_text())
+    if args.stdin:
+        data = read_records(sys.stdin.buffer, args.records)
+    else:
+        data = [os.fsencode(d) for d in args.data]
+    client = chepy_server.RemoteClient(args.remote)
+    return client.run(recipe, data, args.records, args.field, args.ordered)
+
+
+def stdin_batch(args):
+    """Stream the records of stdin through the recipe, on this machine or on a
+    chepy serve process. Exits with 1 if any record failed."""
+    try:
+        if args.remote:
+            failed = write_results(
+                remote_results(args),
+                sys.stdout.buffer,
+                sys.stderr.buffer,
+                args.records,
+                encoded=True,
+            )
+        else:
+            failed = run_stream_batch(
+                Chepy,
+                str(Path(args.recipe).expanduser().absolute()),
+                sys.stdin.buffer,
+                sys.stdout.buffer,
+                sys.stderr.buffer,
+                records=args.records,
+                field=args.field,
+                workers=args.workers,
+                ordered=args.ordered,
+            )
+        sys.stdout.buffer.flush()
+    except BrokenPipeError:
+        # the reader went away, like `| head`. Silence the flush at exit
+        sys.stdout = open(os.devnull, "w")
+        sys.exit(1)
+    except (ConnectionError, FileNotFoundError, ValueError) as e:
+        sys.stdout.buffer.flush()
+        print(red(type(e).__name__), yellow(str(e)), file=sys.stderr)
+        sys.exit(1)
+    sys.exit(1 if failed else 0)
+
+
+def dir_batch(args):
+    """Run the recipe on every file of a directory tree and write a summary.
+    Exits with 1 if any file failed."""
+    results = run_dir_batch(
+        Chepy,
+        str(Path(args.recipe).expanduser().absolute()),
+        args.in_dir,
+        args.out_dir,
+        include=args.glob or "*",
+        workers=args.workers,
+        force=args.force,
+    )
+    failed = write_summary(results, sys.stdout, sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+def disable_positional_args():
+    """Make fire pass method arguments as flags only. Done once per session."""
+    for method in chepy:
+        if not method.startswith("_") and not isinstance(
+            getattr(Chepy, method), property
+        ):
+            fire.decorators._SetMetadata(
+                getattr(Chepy, method),
+                fire.decorators.ACCEPTS_POSITIONAL_ARGS,
+                False,
+            )
+
+
 def main():
     global fire_obj
-    last_command = []
+
+    if sys.argv[1:2] == ["serve"]:
+        load_chepy()
+        serve(parse_serve_args(sys.argv[2:]))
+        return
 
     args = parse_args(sys.argv[1:])
     args_data = args.data
+    if not args.remote:
+        load_chepy()
 
-    if args.recipe:
+    if args.stdin or args.remote:
+        stdin_batch(args)
+    elif args.in_dir:
+        dir_batch(args)
+    elif args.recipe:
         print(Chepy(*args_data).load_recipe(args.recipe).o)
     else:
-        args_data.append("-")
+        # commands are applied to the live object instead of replaying the
+        # whole history
+        repl = chepy_cli.ReplSession(args_data)
+        disable_positional_args()
 
         history_file = config.history_path
         session = PromptSession(
@@ -259,9 +411,11 @@ def main():
                     prompt_message(fire_obj=fire_obj),
                     bottom_toolbar=bottom_toolbar(fire_obj),
                     completer=FuzzyCompleter(
-                        merge_completers([CustomCompleter(), chepy_cli.CliCompleter()])
+                        merge_completers(
+                            [chepy_cli.CustomCompleter(), chepy_cli.CliCompleter()]
+                        )
                     ),
-                    validator=CustomValidator(),
+                    validator=chepy_cli.CustomValidator(),
                     rprompt=get_current_type(fire_obj),
                 )
 
@@ -281,22 +435,23 @@ def main():
                     cli_args = re.search(r"--(\w+)\s([\w\W]+)", prompt)
                     # Show errors encountered
                     if cli_method == "cli_show_errors":
-                        getattr(chepy_cli, "cli_show_errors")(errors)
+                        getattr(chepy_cli, "cli_show_errors")(chepy_cli.errors)
                     # show the current plugin path
                     elif cli_method == "cli_plugin_path":
                         getattr(chepy_cli, "cli_plugin_path")(config)
                     # Edit the current state
                     elif cli_method == "cli_edit_state":
                         try:
-                            getattr(chepy_cli, "cli_edit_state")(fire_obj, args_data)
-                            args_data = args_data[0 : args_data.index("-")] + ["-"]
+                            getattr(chepy_cli, "cli_edit_state")(fire_obj)
                         except:
                             e_type, e_msg, e_traceback = sys.exc_info()
                             print(red(e_type.__name__), yellow("Could not edit state"))
                     # Go back one step
                     elif cli_method == "cli_go_back":
-                        args_data = args_data[: -len(last_command + ["-"])]
-                        print(cyan("Go back: {}".format(last_command)))
+                        if repl.go_back():
+                            print(cyan("Go back: {}".format(fire_obj.recipe)))
+                        else:
+                            print(yellow("Nothing to go back to"))
                     # Delete the cli history file
                     elif cli_method == "cli_delete_history":
                         Path(config.history_path).unlink()
@@ -308,34 +463,19 @@ def main():
                         getattr(chepy_cli, cli_method)(fire_obj)
 
                 else:
-                    for method in chepy:
-                        if not method.startswith("_") and not isinstance(
-                            getattr(Chepy, method), property
-                        ):
-                            fire.decorators._SetMetadata(
-                                getattr(Chepy, method),
-                                fire.decorators.ACCEPTS_POSITIONAL_ARGS,
-                                False,
-                            )
-                    args_data += prompt.split()
-                    if args_data[-1] != "-":
-                        args_data.append("-")
                     try:
-                        last_command = prompt.split() + ["-"]
-                        fire_obj = fire.Fire(Chepy, command=args_data)
+                        repl.run(prompt.split())
                     # handle required args for methods
                     except fire.core.FireExit:
-                        args_data = args_data[: -len(last_command)]
+                        pass
                     except TypeError as e:
-                        print(red(e.message))
+                        print(red(str(e)))
                     except SystemExit:
                         sys.exit()
                     except:
-                        # go back to last working arg
                         e_type, e_msg, e_traceback = sys.exc_info()
                         print(red(e_type.__name__), yellow(e_msg.__str__()))
-                        args_data = args_data[: -len(last_command)]
-                        continue
+                    fire_obj = repl.chepy
         except KeyboardInterrupt:
             print(green("\nOKBye"))
             sys.exit()
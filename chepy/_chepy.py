@@ -0,0 +1,129 @@
+from types import FunctionType
+from typing import Union
+
+from .modules.aritmeticlogic import AritmeticLogic
+from .modules.codetidy import CodeTidy
+from .modules.compression import Compression
+from .modules.dataformat import DataFormat
+from .modules.datetimemodule import DateTime
+from .modules.encryptionencoding import EncryptionEncoding
+from .modules.extractors import Extractors
+from .modules.hashing import Hashing
+from .modules.language import Language
+from .modules.links import Links
+from .modules.networking import Networking
+from .modules.other import Other
+from .modules.publickey import Publickey
+from .modules.search import Search
+from .modules.utils import Utils
+from .modules.internal.cache import ResultCache, shared_cache
+from .modules.internal import http_session
+from .modules.internal.colors import cyan
+
+from .config import ChepyConfig, PluginAttribute
+
+_config = ChepyConfig()
+_plugins = _config.load_plugins()
+http_session.configure(
+    connections=_config.http_pool_connections,
+    maxsize=_config.http_pool_maxsize,
+    retries=_config.http_retries,
+    timeout=_config.http_timeout,
+)
+
+
+class Chepy(
+    AritmeticLogic,
+    CodeTidy,
+    Compression,
+    DataFormat,
+    DateTime,
+    EncryptionEncoding,
+    Extractors,
+    Hashing,
+    Language,
+    Links,
+    Networking,
+    Other,
+    Publickey,
+    Search,
+    Utils,
+    *_plugins
+):
+    """Chepy class that exposes all functionality of Chepy and its plugins.
+
+    Args:
+        *data (tuple): Each arg is a state.
+        record (bool, optional): Record called methods in the recipe. Disable this
+            when applying cheap methods to a large number of items. Defaults to True.
+        cache (Union[bool, ResultCache, None], optional): Cache method results. True
+            uses the cache shared by all Chepy objects, a ResultCache uses that cache.
+            Defaults to the Cache section of the config.
+        profile (bool, optional): Profile every method call. See `profile`. Defaults to False.
+        memory_budget (Union[int, None], optional): Bytes of states and buffers to keep
+            in memory. Cold ones over the budget are spilled to temporary files and
+            loaded back as their original type when read, see `StatePool`. 0
+            disables the budget. Defaults to the Memory section of the config.
+    """
+
+    def __init__(
+        self,
+        *data,
+        record: bool = True,
+        cache: Union[bool, ResultCache, None] = None,
+        profile: bool = False,
+        memory_budget: Union[int, None] = None,
+    ):
+        super().__init__(*data)
+        self._record = record
+        if memory_budget is None:
+            memory_budget = _config.memory_budget
+        if memory_budget:
+            self._limit_memory(memory_budget, _config.spill_path)
+        if profile:
+            self.profile()
+        if cache is None:
+            cache = _config.cache_enabled
+        if cache is True:
+            cache = shared_cache(
+                _config.cache_max_bytes,
+                _config.cache_path if _config.cache_disk else None,
+                _config.cache_disk_max_bytes,
+            )
+        self._cache = cache if isinstance(cache, ResultCache) else None
+
+
+def show_plugins():  # pragma: no cover
+    hold = {}
+    for p in _plugins:
+        hold[p.__name__] = [
+            name
+            for name, attr in vars(p).items()
+            if not name.startswith("_")
+            and (
+                isinstance(attr, FunctionType)
+                or (isinstance(attr, PluginAttribute) and attr.function)
+            )
+        ]
+    return hold
+
+
+def search_chepy_methods(search: str) -> None:  # pragma: no cover
+    """Search for Chepy methods
+
+    Args:
+        search (str): String to search for
+    """
+    from docstring_parser import parse as _doc_parse
+
+    methods = dir(Chepy)
+    for method in methods:
+        if search in method and not method.startswith("_"):
+            docs = _doc_parse(getattr(Chepy, method).__doc__).short_description
+            print(cyan(method), docs)
+
+
+# the package exposes these lazily, and they keep it as their public home for
+# pickling, reprs and the docs
+for _public in (Chepy, show_plugins, search_chepy_methods):
+    _public.__module__ = __package__
@@ -0,0 +1,217 @@
+import asyncio
+import atexit
+import functools
+import itertools
+import ssl
+import threading
+from concurrent import futures
+from typing import Any, Dict, List, Tuple, Union
+
+import regex as re
+
+from . import Chepy
+from .core import ChepyDecorators
+from .modules.internal.workers import EXECUTORS
+from .modules.networking import format_cert
+
+#: Methods that read or write files, sockets, processes or urls. They run on
+#: the default executor of the event loop, its I/O threads.
+IO_METHODS = frozenset(
+    {
+        "http_request",
+        "load_command",
+        "load_dir",
+        "load_file",
+        "load_from_url",
+        "load_from_urls",
+        "read_file",
+        "run_script",
+        "search_dir",
+        "walk_dir",
+        "write",
+        "write_binary",
+        "write_to_file",
+    }
+)
+
+#: Methods that only manage states and buffers. They are cheap and run on the
+#: event loop itself.
+LOCAL_METHODS = frozenset(
+    {
+        "change_state",
+        "copy_state",
+        "create_state",
+        "delete_buffer",
+        "delete_state",
+        "load_buffer",
+        "reset",
+        "save_buffer",
+        "set_state",
+        "switch_state",
+    }
+)
+
+_executors: Dict[str, futures.Executor] = {}
+_lock = threading.Lock()
+
+
+def shared_executor(kind: str) -> futures.Executor:
+    """The thread or process pool shared by all `AsyncChepy` objects that ask
+    for that kind of executor. It is created by the first call.
+
+    Args:
+        kind (str): thread or process
+
+    Raises:
+        ValueError: If the kind is not valid
+
+    Returns:
+        futures.Executor: The pool
+    """
+    if kind not in EXECUTORS:
+        raise ValueError("executor must be one of {}".format(", ".join(EXECUTORS)))
+    with _lock:
+        if kind not in _executors:
+            _executors[kind] = getattr(futures, EXECUTORS[kind])()
+        return _executors[kind]
+
+
+@atexit.register
+def _shutdown() -> None:
+    for executor in _executors.values():
+        executor.shutdown()
+
+
+def _run_steps(
+    cls: type, state: Any, record: bool, steps: List[tuple]
+) -> Tuple[Any, list]:
+    chepy = cls(state, record=record)
+    for name, args, kwargs in steps:
+        getattr(chepy, name)(*args, **kwargs)
+    return chepy.state, chepy.recipe
+
+
+def _kind(step: tuple) -> str:
+    name = step[0]
+    if name == "get_ssl_cert":
+        return "ssl"
+    if name in IO_METHODS:
+        return "io"
+    if name in LOCAL_METHODS:
+        return "local"
+    return "cpu"
+
+
+class AsyncChepy(object):
+    """Asyncio front end of Chepy. Methods are chained like on Chepy and run
+    when the object is awaited, without blocking the event loop:
+
+    - `get_ssl_cert` uses a non blocking socket.
+    - File, url and process methods, like `load_file`, `http_request` or
+      `write_binary`, run on the I/O threads of the loop.
+    - State and buffer methods run on the loop itself.
+    - Everything else runs on `executor`. With a process pool, consecutive
+      steps are sent to a worker together with the current state, so they
+      only see that state.
+
+    Attributes and properties, like `o`, `state` or `recipe`, are read from
+    the wrapped Chepy object. An object should not be awaited by two tasks
+    at once.
+
+    Args:
+        *data (tuple): The states
+        executor (Union[futures.Executor, str, None], optional): Executor of the
+            CPU bound steps. thread or process use a pool shared by all objects.
+            Defaults to the default executor of the loop.
+        **kwargs (Any): Arguments of `Chepy`
+
+    Examples:
+        >>> c = await AsyncChepy("https://example.com").load_from_url().sha2_256()
+        >>> c.o
+        >>> chains = [AsyncChepy(b, executor="process").from_base64() for b in blobs]
+        >>> results = await asyncio.gather(*chains)
+    """
+
+    def __init__(
+        self,
+        *data: Any,
+        executor: Union[futures.Executor, str, None] = None,
+        **kwargs: Any
+    ):
+        self.chepy = Chepy(*data, **kwargs)
+        if isinstance(executor, str):
+            executor = shared_executor(executor)
+        self.executor = executor
+        self._pending: List[tuple] = []
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "chepy":
+            raise AttributeError(name)
+        attr = getattr(self.chepy, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def step(*args, **kwargs):
+            self._pending.append((name, args, kwargs))
+            return self
+
+        return step
+
+    def __repr__(self) -> str:
+        return "<AsyncChepy {} pending steps>".format(len(self._pending))
+
+    def __await__(self):
+        return self.run().__await__()
+
+    async def run(self) -> "AsyncChepy":
+        """Run the pending steps
+
+        Returns:
+            AsyncChepy: The object
+        """
+        loop = asyncio.get_running_loop()
+        steps, self._pending = self._pending, []
+        process = isinstance(self.executor, futures.ProcessPoolExecutor)
+        for kind, group in itertools.groupby(steps, _kind):
+            group = list(group)
+            if kind == "cpu" and process:
+                state, recipe = await loop.run_in_executor(
+                    self.executor,
+                    _run_steps,
+                    type(self.chepy),
+                    self.chepy.state,
+                    self.chepy._record,
+                    group,
+                )
+                self.chepy.state = state
+                self.chepy._stack.extend(recipe)
+                continue
+            for name, args, kwargs in group:
+                if kind == "ssl":
+                    await self._get_ssl_cert(*args, **kwargs)
+                    continue
+                method = functools.partial(getattr(self.chepy, name), *args, **kwargs)
+                if kind == "local":
+                    method()
+                else:
+                    executor = None if kind == "io" else self.executor
+                    await loop.run_in_executor(executor, method)
+        return self
+
+    async def _get_ssl_cert(self, port: int = 443) -> None:
+        domain = re.sub(r"^\w+://", "", self.chepy._convert_to_str())
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        _, writer = await asyncio.open_connection(
+            domain, port, ssl=context, server_hostname=domain
+        )
+        try:
+            cert = writer.get_extra_info("peercert")
+        finally:
+            writer.close()
+        self.chepy.state = format_cert(cert)
+        if self.chepy._record and ChepyDecorators.record:
+            self.chepy._stack.append(
+                {"function": "get_ssl_cert", "args": {"port": port}}
+            )
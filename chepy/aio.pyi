@@ -0,0 +1,16 @@
+from concurrent import futures
+from typing import Any, Dict, FrozenSet, Generator, List, Union
+from . import Chepy
+
+IO_METHODS: FrozenSet[str]
+LOCAL_METHODS: FrozenSet[str]
+
+def shared_executor(kind: str) -> futures.Executor: ...
+
+class AsyncChepy:
+    chepy: Chepy = ...
+    executor: Union[futures.Executor, None] = ...
+    def __init__(self, *data: Any, executor: Union[futures.Executor, str, None] = ..., **kwargs: Any) -> None: ...
+    def __getattr__(self, name: str) -> Any: ...
+    def __await__(self) -> Generator[Any, None, AsyncChepy]: ...
+    async def run(self) -> AsyncChepy: ...
@@ -8,8 +8,141 @@ import json
 from pathlib import Path
 from configparser import ConfigParser
 
+from .core import ChepyCore
+
 LOGGER = logging.getLogger("chepy")
 
+#: Version of the plugin index format. Indexes of other versions are rebuilt
+PLUGIN_INDEX_VERSION = 3
+
+
+class PluginAttribute(object):
+    """Stands in for an attribute of a plugin class until it is first accessed.
+    The plugin module is then imported, the stand-ins are removed, and the
+    real plugin class becomes the base of the proxy class, so `super()` and
+    `isinstance` work in plugin methods.
+
+    Args:
+        module (str): Plugin module name
+        klass (str): Plugin class name
+        function (bool): The attribute is a function
+    """
+
+    def __init__(self, module: str, klass: str, function: bool):
+        self.module = module
+        self.klass = klass
+        self.function = function
+
+    def __set_name__(self, owner, name):
+        self.owner = owner
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        plugin = getattr(importlib.import_module(self.module), self.klass)
+        names = [
+            name
+            for name, attr in list(vars(self.owner).items())
+            if isinstance(attr, PluginAttribute)
+        ]
+        for name in names:
+            delattr(self.owner, name)
+        try:
+            self.owner.__bases__ = (plugin,)
+        except TypeError:  # pragma: no cover
+            # the layout of the plugin class differs, copy its attributes
+            for name in names:
+                setattr(self.owner, name, inspect.getattr_static(plugin, name))
+        return getattr(owner if obj is None else obj, self.name)
+
+
+def parse_size(size: str) -> int:
+    """Parse a size in bytes with an optional K, M or G suffix
+
+    Args:
+        size (str): The size, like 512M
+
+    Returns:
+        int: Bytes
+    """
+    size = size.strip().upper().rstrip("B")
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    if size and size[-1] in units:
+        return int(float(size[:-1]) * units[size[-1]])
+    return int(size)
+
+
+def _plugin_attributes(klass: type) -> dict:
+    """Every attribute a plugin class adds to ChepyCore or overrides, including
+    inherited ones and `__init__`, and whether it is a function
+
+    Args:
+        klass (type): The plugin class
+
+    Returns:
+        dict: Attribute names and whether they are functions
+    """
+    attributes = {}
+    for name in dir(klass):
+        if name.startswith("__") and name.endswith("__") and name != "__init__":
+            continue
+        attr = inspect.getattr_static(klass, name)
+        if attr is not inspect.getattr_static(ChepyCore, name, None):
+            attributes[name] = inspect.isfunction(attr)
+    return attributes
+
+
+def _plugin_proxy(entry: dict) -> type:
+    """A ChepyCore subclass with a stand-in for every attribute of a plugin class
+
+    Args:
+        entry (dict): Plugin entry of the index
+
+    Returns:
+        type: The proxy class
+    """
+    namespace = {
+        name: PluginAttribute(entry["module"], entry["class"], function)
+        for name, function in entry["attributes"].items()
+    }
+    namespace["__module__"] = entry["module"]
+    return type(entry["class"], (ChepyCore,), namespace)
+
+
+def _plugin_files(name: str, finder) -> list:
+    """Path and modification time of every file of a plugin module"""
+    spec = finder.find_spec(name)
+    if spec is None or spec.origin is None:  # pragma: no cover
+        return []
+    paths = [Path(spec.origin)]
+    for location in spec.submodule_search_locations or []:
+        paths += sorted(Path(location).rglob("*.py"))
+    return [[str(p), p.stat().st_mtime_ns] for p in paths if p.exists()]
+
+
+def _path_stamps() -> list:
+    """Modification time of every sys.path entry. Adding or removing a plugin
+    module changes the time of the directory it is in.
+    """
+    stamps = []
+    for entry in sys.path:
+        try:
+            stamps.append([entry, os.stat(entry or ".").st_mtime_ns])
+        except OSError:
+            stamps.append([entry, None])
+    return stamps
+
+
+def _files_current(files: dict) -> bool:
+    """If the plugin files recorded in the index are unchanged"""
+    for entries in files.values():
+        for path, mtime in entries:
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+    return True
+
 
 class ChepyConfig(object):
     def __init__(self):
@@ -29,6 +162,19 @@ class ChepyConfig(object):
                 "EnablePlugins": "false",
                 "PluginPath": str(Path(__file__).parent / "chepy_plugins"),
             }
+            c["Cache"] = {
+                "Enabled": "false",
+                "MaxBytes": "67108864",
+                "Disk": "false",
+                "DiskMaxBytes": "1073741824",
+            }
+            c["Memory"] = {"Budget": "0", "SpillPath": ""}
+            c["Http"] = {
+                "PoolConnections": "10",
+                "PoolMaxsize": "10",
+                "Retries": "2",
+                "Timeout": "30",
+            }
             c["Cli"] = {}
             cli_options = c["Cli"]
             cli_options["history_path"] = str(self.chepy_dir / "chepy_history")
@@ -76,6 +222,33 @@ class ChepyConfig(object):
         else:
             self.plugin_path = Path("None")
 
+        self.cache_enabled = json.loads(
+            self.__get_conf_value("false", "Enabled", "Cache")
+        )
+        self.cache_max_bytes = int(
+            self.__get_conf_value("67108864", "MaxBytes", "Cache")
+        )
+        self.cache_disk = json.loads(self.__get_conf_value("false", "Disk", "Cache"))
+        self.cache_disk_max_bytes = int(
+            self.__get_conf_value("1073741824", "DiskMaxBytes", "Cache")
+        )
+        self.cache_path = self.chepy_dir / "cache"
+        self.plugin_index = self.chepy_dir / "plugins.json"
+        self.completion_index = self.chepy_dir / "methods.json"
+
+        self.memory_budget = parse_size(
+            os.environ.get("CHEPY_MEMORY_BUDGET")
+            or self.__get_conf_value("0", "Budget", "Memory")
+        )
+        self.spill_path = self.__get_conf_value("", "SpillPath", "Memory") or None
+
+        self.http_pool_connections = int(
+            self.__get_conf_value("10", "PoolConnections", "Http")
+        )
+        self.http_pool_maxsize = int(self.__get_conf_value("10", "PoolMaxsize", "Http"))
+        self.http_retries = int(self.__get_conf_value("2", "Retries", "Http"))
+        self.http_timeout = float(self.__get_conf_value("30", "Timeout", "Http"))
+
         self.history_path = self.__get_conf_value(
             str(self.chepy_dir / "chepy_history"), "history_path"
         )
@@ -127,22 +300,93 @@ class ChepyConfig(object):
         else:
             return default
 
-    def load_plugins(self):  # pragma: no cover
+    def _discover_plugins(self) -> dict:
+        """Plugin modules on sys.path and the modification times of their files"""
+        found = {}
+        for finder, name, ispkg in pkgutil.iter_modules():
+            if name.startswith("chepy_") and name != "chepy_plugins":
+                if name not in found:
+                    found[name] = _plugin_files(name, finder)
+        return found
+
+    def _read_plugin_index(self) -> dict:
+        try:
+            with open(str(self.plugin_index)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_plugin_index(self, index: dict) -> None:
+        tmp = self.plugin_index.with_suffix(".tmp")
+        try:
+            with open(str(tmp), "w") as f:
+                json.dump(index, f, indent=1)
+            os.replace(str(tmp), str(self.plugin_index))
+        except OSError:  # pragma: no cover
+            LOGGER.debug("Could not write the plugin index {}".format(tmp))
+
+    def load_plugins(self) -> list:
+        """Plugin classes for Chepy to inherit from.
+
+        The plugin modules and classes found are recorded in an index under the
+        .chepy directory, keyed by the plugin path and the modification times of
+        the plugin files and of the sys.path directories. While those times are
+        unchanged, sys.path is not scanned and plugins are not imported: proxy
+        classes stand in for them, and a plugin is imported the first time one
+        of its attributes is accessed.
+
+        Returns:
+            list: Plugin classes, or their proxies
+        """
         plugins = []
-        if self.plugin_path.stem != "None":
+        if self.plugin_path.stem == "None":
+            return plugins
+        if str(self.plugin_path) not in sys.path:
             sys.path.append(str(self.plugin_path))
 
-            my_plugins = [
-                importlib.import_module(name)
-                for finder, name, ispkg in pkgutil.iter_modules()
-                if (name.startswith("chepy_") and name != "chepy_plugins")
-            ]
-
-            for plugin in my_plugins:
-                try:
-                    klass, mod = inspect.getmembers(plugin, inspect.isclass)[0]
-                    loaded = getattr(plugin, klass)
-                    plugins.append(loaded)
-                except:
-                    LOGGER.warning(f"Error loading {plugin.__name__}")
+        key = str(self.plugin_path)
+        stamps = _path_stamps()
+        index = self._read_plugin_index()
+        cached = index.get(key)
+        files = None
+        if cached is not None and cached.get("version") == PLUGIN_INDEX_VERSION:
+            fresh = cached["paths"] == stamps and _files_current(cached["files"])
+            if not fresh:
+                files = self._discover_plugins()
+                if cached["files"] == files:
+                    # a directory changed, but not the plugins in it
+                    cached["paths"] = stamps
+                    self._write_plugin_index(index)
+                    fresh = True
+            if fresh:
+                for name in cached["failed"]:
+                    LOGGER.warning(f"Error loading {name}")
+                return [_plugin_proxy(entry) for entry in cached["plugins"]]
+
+        if files is None:
+            files = self._discover_plugins()
+        entries, failed = [], []
+        for plugin in [importlib.import_module(name) for name in files]:
+            try:
+                klass, mod = inspect.getmembers(plugin, inspect.isclass)[0]
+                loaded = getattr(plugin, klass)
+                plugins.append(loaded)
+                entries.append(
+                    {
+                        "module": plugin.__name__,
+                        "class": klass,
+                        "attributes": _plugin_attributes(loaded),
+                    }
+                )
+            except:
+                LOGGER.warning(f"Error loading {plugin.__name__}")
+                failed.append(plugin.__name__)
+        index[key] = {
+            "version": PLUGIN_INDEX_VERSION,
+            "paths": stamps,
+            "files": files,
+            "plugins": entries,
+            "failed": failed,
+        }
+        self._write_plugin_index(index)
         return plugins
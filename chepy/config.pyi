@@ -1,4 +1,13 @@
-from typing import Any
+from typing import Any, List, Union
+
+def parse_size(size: str) -> int: ...
+
+class PluginAttribute:
+    module: str = ...
+    klass: str = ...
+    function: bool = ...
+    def __init__(self, module: str, klass: str, function: bool) -> None: ...
+    def __get__(self, obj: Any, owner: Any=...) -> Any: ...
 
 class ChepyConfig:
     chepy_dir: Any = ...
@@ -6,6 +15,18 @@ class ChepyConfig:
     config: Any = ...
     enable_plugins: Any = ...
     plugin_path: Any = ...
+    cache_enabled: bool = ...
+    cache_max_bytes: int = ...
+    cache_disk: bool = ...
+    cache_path: Any = ...
+    plugin_index: Any = ...
+    completion_index: Any = ...
+    memory_budget: int = ...
+    spill_path: Union[str, None] = ...
+    http_pool_connections: int = ...
+    http_pool_maxsize: int = ...
+    http_retries: int = ...
+    http_timeout: float = ...
     history_path: Any = ...
     prompt_char: Any = ...
     prompt_colors: Any = ...
@@ -22,4 +43,4 @@ class ChepyConfig:
     prompt_plugin_method: Any = ...
     cli_info_color: Any = ...
     def __init__(self) -> None: ...
-    def load_plugins(self): ...
+    def load_plugins(self) -> List[type]: ...
@@ -1,30 +1,58 @@
 import base64
 import binascii
+import functools
 import inspect
 import io
-import itertools
 import logging
 from pathlib import Path
 import subprocess
 import sys
 import struct
-import webbrowser
 from configparser import ConfigParser
+from contextlib import closing, contextmanager
 from importlib.machinery import SourceFileLoader
 from pprint import pformat
-from typing import Any, Dict, List, Mapping, Tuple, Union, Callable
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Tuple, Union, Callable
 from urllib.parse import urljoin
 
 import lazy_import
-import pyperclip
 import json
-import jmespath
 
 jsonpickle = lazy_import.lazy_module("jsonpickle")
+pyperclip = lazy_import.lazy_module("pyperclip")
+webbrowser = lazy_import.lazy_module("webbrowser")
 import regex as re
 from decorator import decorator
 
+from .modules.exceptions import RecipeError
 from .modules.internal.colors import blue, cyan, green, magenta, red, yellow
+from .modules.internal.cache import CACHEABLE, ResultCache
+from .modules.internal.paths import compile_path, compile_paths, compile_query
+from .modules.internal.patterns import (
+    PatternCache,
+    compile_pattern,
+    fixed_pattern,
+    shared_patterns,
+)
+from .modules.internal.profiler import Profiler
+from .modules.internal.storage import (
+    DEFAULT_CHUNK_SIZE,
+    STREAMING_METHODS,
+    DeferredStream,
+    FileStream,
+    MappedFile,
+    StatePool,
+    StateStore,
+)
+from .modules.internal import http_session
+from .modules.internal.files import read_state, search_file, walk_files
+from .modules.internal.workers import (
+    BatchResult,
+    imap_threads,
+    map_methods,
+    method_chain,
+    run_recipe_batch,
+)
 
 LOGGER = logging.getLogger("chepy")
 
@@ -32,26 +60,81 @@ LOGGER = logging.getLogger("chepy")
 class ChepyDecorators(object):
     """A class to house all the decorators for Chepy"""
 
+    #: Global recipe recording switch. Use `recording` to change it temporarily.
+    record = True
+
     @staticmethod
-    @decorator
-    def call_stack(func, *args, **kwargs):
+    def call_stack(func: Callable) -> Callable:
         """This decorator is used to get the method name and
         arguments and save it to self.stack. The data from
         self.stack is predominantly used to save recepies.
-        """
-        func_sig = dict()
-        func_self = args[0]
-        func_sig["function"] = func.__name__
-
-        bound_args = inspect.signature(func).bind(*args, **kwargs)
-        bound_args.apply_defaults()
-
-        func_arguments = dict(bound_args.arguments)
-        del func_arguments["self"]
-        func_sig["args"] = func_arguments
-        func_self._stack.append(func_sig)
 
-        return func(*args, **kwargs)  # lgtm [py/call-to-non-callable]
+        The signature of the method is resolved once, the first time its
+        arguments are bound, so that importing the hundreds of decorated
+        methods does not pay for it. Nothing is recorded if recording is
+        disabled for the instance or globally.
+        """
+        name = func.__name__
+        resolved = []
+
+        def resolve():
+            sig = inspect.signature(func)
+            first, *params = sig.parameters.values()
+            # methods without *args, **kwargs or keyword only args can be bound
+            # without going through inspect
+            simple = all(p.kind is p.POSITIONAL_OR_KEYWORD for p in params)
+            names = tuple(p.name for p in params)
+            defaults = tuple(p.default for p in params)
+            resolved[:] = [sig, first, simple, names, defaults]
+            return resolved
+
+        def bind(args, kwargs):
+            sig, first, simple, names, defaults = resolved or resolve()
+            given = len(args)
+            if simple and given <= len(names) and kwargs.keys() <= set(names[given:]):
+                bound = dict(zip(names, args))
+                for arg_name, default in zip(names[given:], defaults[given:]):
+                    value = kwargs.get(arg_name, default)
+                    if value is inspect.Parameter.empty:
+                        break
+                    bound[arg_name] = value
+                else:
+                    return bound
+            # raises the same TypeError as calling the method would
+            bound_args = sig.bind(None, *args, **kwargs)
+            bound_args.apply_defaults()
+            func_arguments = dict(bound_args.arguments)
+            del func_arguments[first.name]
+            return func_arguments
+
+        cacheable = name in CACHEABLE
+
+        @functools.wraps(func)
+        def call_stack(self, *args, **kwargs):
+            record = self._record and ChepyDecorators.record
+            cached = cacheable and self._cache is not None
+            if record or cached:
+                bound = bind(args, kwargs)
+                if record:
+                    self._stack.append({"function": name, "args": bound})
+            profiler = self._profiler
+            if profiler is not None:
+                span = profiler.start(self, name)
+                error = None
+                try:
+                    if cached:
+                        return self._cache.call(self, func, name, bound, args, kwargs)
+                    return func(self, *args, **kwargs)
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    profiler.stop(span, self, error)
+            if cached:
+                return self._cache.call(self, func, name, bound, args, kwargs)
+            return func(self, *args, **kwargs)  # lgtm [py/call-to-non-callable]
+
+        return call_stack
 
     @staticmethod
     @decorator
@@ -62,6 +145,291 @@ class ChepyDecorators(object):
         return func(*args, **kwargs)
 
 
+# every call_stack wrapper runs this code object. Unlike an attribute, it is
+# not copied to the wrappers of other decorators by functools.wraps
+_CALL_STACK_CODE = ChepyDecorators.call_stack(lambda self: self).__code__
+
+
+def _is_call_stack(func: Callable) -> bool:
+    return getattr(func, "__code__", None) is _CALL_STACK_CODE
+
+
+def _unrecorded(method: Callable) -> Callable:
+    # runs a method whose call_stack layer is wrapped by other decorators,
+    # without it recording or profiling the call a second time
+    @functools.wraps(method)
+    def run(chepy, *args, **kwargs):
+        record, profiler = chepy._record, chepy._profiler
+        chepy._record, chepy._profiler = False, None
+        try:
+            return method(chepy, *args, **kwargs)
+        finally:
+            chepy._record, chepy._profiler = record, profiler
+
+    return run
+
+
+@contextmanager
+def recording(enabled: bool = True):
+    """Context manager that turns recipe recording on or off for every Chepy
+    instance. Disabling recording removes the per call overhead of the
+    `call_stack` decorator, which matters when cheap methods are applied
+    to a large number of items.
+
+    Args:
+        enabled (bool, optional): Record recipes. Defaults to True.
+
+    Examples:
+        >>> from chepy.core import recording
+        >>> with recording(False):
+        >>>     c = Chepy(items).loop_list("to_hex")
+        >>> c.recipe
+        []
+    """
+    previous = ChepyDecorators.record
+    ChepyDecorators.record = enabled
+    try:
+        yield
+    finally:
+        ChepyDecorators.record = previous
+
+
+class CompiledRecipe(object):
+    """A recipe that has been validated and bound once so it can be applied
+    to any number of inputs. Method names and argument names are checked
+    when the recipe is compiled, defaults are bound once and every step
+    calls the undecorated method directly.
+
+    Args:
+        cls (type): The Chepy class the recipe runs on
+        recipe (Union[str, Path, List[Mapping[str, Any]]]): A recipe, or the path to a
+            recipe file. Recipes are in the format
+            [{'function': 'function_name', 'args': {'arg_name': 'arg_val'}}]
+
+    Raises:
+        RecipeError: If a method does not exist or an argument is invalid or missing.
+            It is a ValueError, an AttributeError and a TypeError.
+
+    Examples:
+        >>> pipeline = Chepy.compile_recipe([{"function": "from_base64", "args": {}}])
+        >>> pipeline("bG9s").o
+        b"lol"
+    """
+
+    def __init__(
+        self,
+        cls: type,
+        recipe: Union[str, Path, List[Mapping[str, Union[str, Mapping[str, Any]]]]],
+    ):
+        if isinstance(recipe, (str, Path)):
+            recipe = json.loads(Path(recipe).expanduser().read_text())
+        self.cls = cls
+        self.recipe = [
+            {"function": step.get("function"), "args": dict(step.get("args") or {})}
+            for step in recipe
+        ]
+        self._steps = [
+            self._compile_step(index, step) for index, step in enumerate(self.recipe)
+        ]
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    def __repr__(self) -> str:
+        return "<CompiledRecipe {}>".format(
+            " -> ".join(step["function"] for step in self.recipe)
+        )
+
+    def _compile_step(self, index: int, step: Dict[str, Any]) -> tuple:
+        function = step["function"]
+        method = None
+        if isinstance(function, str):
+            method = getattr(self.cls, function, None)
+        if not callable(method) or function.startswith("_"):
+            raise RecipeError(
+                "Step {}: {} is not a Chepy method".format(index, function)
+            )
+
+        args = step["args"]
+        sig = inspect.signature(method)
+        first, *params = sig.parameters.values()
+        known = {p.name for p in params}
+        varkw = any(p.kind is p.VAR_KEYWORD for p in params)
+        unknown = [a for a in args if a not in known]
+        if unknown and not varkw:
+            raise RecipeError(
+                "Step {}: {} got unexpected arguments {}".format(
+                    index, function, unknown
+                )
+            )
+
+        positional, keywords = [], {}
+        for p in params:
+            if p.kind is p.VAR_POSITIONAL:
+                positional.extend(args.get(p.name, ()))
+            elif p.kind is p.VAR_KEYWORD:
+                keywords.update(args.get(p.name, {}))
+                keywords.update({a: args[a] for a in unknown})
+            elif p.name in args or p.default is not p.empty:
+                value = args.get(p.name, p.default)
+                if p.kind is p.KEYWORD_ONLY:
+                    keywords[p.name] = value
+                else:
+                    positional.append(value)
+            else:
+                raise RecipeError(
+                    "Step {}: {} is missing the argument {}".format(
+                        index, function, p.name
+                    )
+                )
+        bound = sig.bind(None, *positional, **keywords)
+        bound.apply_defaults()
+        bound = dict(bound.arguments)
+        del bound[first.name]
+        # skip the recording decorator, the recipe is recorded once per run.
+        # Decorators below it still run, and methods without it run as they
+        # are
+        layer = inspect.unwrap(method, stop=_is_call_stack)
+        cacheable = False
+        if not _is_call_stack(layer):
+            func = method
+        elif layer is method:
+            func = method.__wrapped__
+            cacheable = function in CACHEABLE
+        else:
+            func = _unrecorded(method)
+        return function, func, tuple(positional), keywords, bound, cacheable
+
+    def apply(self, chepy: "ChepyCore") -> "ChepyCore":
+        """Run the recipe on an existing Chepy object
+
+        Args:
+            chepy (ChepyCore): The Chepy object
+
+        Returns:
+            Chepy: The Chepy object.
+        """
+        cache = chepy._cache
+        profiler = chepy._profiler
+        for name, func, args, kwargs, bound, cacheable in self._steps:
+            span = profiler.start(chepy, name) if profiler is not None else None
+            try:
+                if cacheable and cache is not None:
+                    cache.call(chepy, func, name, bound, args, kwargs)
+                else:
+                    func(chepy, *args, **kwargs)
+            finally:
+                if span is not None:
+                    profiler.stop(span, chepy)
+        if chepy._record and ChepyDecorators.record:
+            # bound arguments with defaults, like the recording decorator
+            chepy._stack.extend(
+                {"function": step[0], "args": dict(step[4])} for step in self._steps
+            )
+        return chepy
+
+    def __call__(self, *data: Any) -> "ChepyCore":
+        """Run the recipe on new data. Nothing is recorded on the new object.
+
+        Returns:
+            Chepy: The Chepy object.
+        """
+        chepy = self.cls(*data)
+        chepy._record = False
+        return self.apply(chepy)
+
+
+class LazyChepy(object):
+    """Records chained methods as a plan and runs it only when the output is
+    requested with `o`, `out` or any other property. Consecutive methods that
+    can stream, like hex and base64 codecs, `xor`, `add`, `sub`, rotations,
+    compression and hashing, are fused into a single chunked pass over the
+    data instead of each one creating a full size copy.
+
+    Args:
+        cls (type): The Chepy class
+        data (tuple): The states
+        chunk_size (int, optional): Size of the chunks of a fused pass. Defaults to 1MB.
+
+    Examples:
+        >>> Chepy.lazy("4142").from_hex().xor("01").to_base64().o
+        b"QEM="
+    """
+
+    def __init__(self, cls: type, data: tuple, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.cls = cls
+        self.data = data
+        self.chunk_size = chunk_size
+        self.plan = []
+        self._result = None
+
+    def __repr__(self) -> str:
+        return "<LazyChepy {}>".format(
+            " -> ".join(step["function"] for step in self.plan) or "empty"
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.cls, name, None) if not name.startswith("_") else None
+        if isinstance(attribute, property):
+            return getattr(self.run(), name)
+        if not callable(attribute):
+            raise AttributeError(name)
+
+        sig = inspect.signature(attribute)
+        first = next(iter(sig.parameters))
+
+        def step(*args, **kwargs):
+            bound = sig.bind(None, *args, **kwargs)
+            bound.apply_defaults()
+            args = dict(bound.arguments)
+            del args[first]
+            self.plan.append({"function": name, "args": args})
+            self._result = None
+            return self
+
+        return step
+
+    def run(self) -> "ChepyCore":
+        """Run the plan. The result is kept until another method is chained.
+
+        Returns:
+            Chepy: The Chepy object with the output.
+        """
+        if self._result is not None:
+            return self._result
+        chepy = self.cls(*self.data)
+        steps = CompiledRecipe(self.cls, self.plan)._steps
+        for name, func, args, kwargs, _, _ in steps:
+            state = chepy.state
+            if name in STREAMING_METHODS:
+                if isinstance(state, str):
+                    state = state.encode()
+                if isinstance(state, (bytes, bytearray, FileStream)) and not isinstance(
+                    state, DeferredStream
+                ):
+                    chepy.state = DeferredStream(state, chunk_size=self.chunk_size)
+            elif isinstance(state, DeferredStream):
+                chepy.state = state.read()
+            func(chepy, *args, **kwargs)
+        state = chepy.state
+        if isinstance(state, DeferredStream):
+            if state.path is not None:
+                # file backed data stays on disk
+                chepy.state = FileStream.from_chunks(state.chunks(), self.chunk_size)
+            else:
+                chepy.state = state.read()
+        if chepy._record and ChepyDecorators.record:
+            chepy._stack.extend(self.plan)
+        self._result = chepy
+        return chepy
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_recipe_file(cls: type, path: str, mtime: int, size: int):
+    # the file stat is part of the cache key so edited recipes are recompiled
+    return CompiledRecipe(cls, path)
+
+
 class ChepyCore(object):
     """The ChepyCore class for Chepy is primarily used as an interface
     for all the current modules/classes in Chepy, or for plugin development.
@@ -83,9 +451,11 @@ class ChepyCore(object):
     """
 
     def __init__(self, *data):
-        self.states = dict(list(enumerate(data)))
-        #: Holder for the initial state
-        self._initial_states = dict(list(enumerate(data)))
+        #: Memory budget of the states and buffers, None when there is no budget
+        self._pool = None
+        self.states = dict(enumerate(data))
+        #: Holder for the initial state. Payloads are shared with the states.
+        self._initial_states = dict(enumerate(data))
         #: Value of the initial state
         self._current_index = 0
         self.buffers = dict()
@@ -99,6 +469,12 @@ class ChepyCore(object):
         self.read_file = self.load_file
         #: Holds all the methods that are called/chained and their args
         self._stack = list()
+        #: Record called methods in the recipe
+        self._record = True
+        #: Result cache, None when caching is off
+        self._cache = None
+        #: Profiler, None when profiling is off
+        self._profiler = None
         #: Holds register values
         self._registers = dict()
         # logger
@@ -114,18 +490,136 @@ class ChepyCore(object):
         """
         return self._stack
 
+    @property
+    def cache(self) -> Union[ResultCache, None]:
+        """The result cache of this object, or None if caching is off. The
+        cache exposes `hits`, `misses` and `stats()`.
+
+        Returns:
+            Union[ResultCache, None]: The cache
+        """
+        return self._cache
+
+    @property
+    def patterns(self) -> PatternCache:
+        """The cache of compiled regex patterns shared by all objects. The
+        cache exposes `hits`, `misses` and `stats()`.
+
+        Returns:
+            PatternCache: The cache
+        """
+        return shared_patterns()
+
+    @property
+    def profiler(self) -> Union[Profiler, None]:
+        """The profiler of this object, or None if profiling is off. Use
+        `table()`, `to_json()` or `save_chrome_trace(path)` to get the report.
+
+        Returns:
+            Union[Profiler, None]: The profiler
+        """
+        return self._profiler
+
+    def profile(self, memory: bool = False):
+        """Profile every following method call. Wall time, CPU time, input and
+        output size, and optionally the peak memory of each call are recorded.
+        Calls made by a method, like the callback of `loop_list`, are recorded
+        as child spans. The report is available from the `profiler` property.
+
+        Args:
+            memory (bool, optional): Track peak memory with tracemalloc. This slows
+                down every call. Defaults to False.
+
+        Returns:
+            Chepy: The Chepy object.
+
+        Examples:
+            >>> c = Chepy(data).profile().from_base64().gzip_decompress().extract_urls()
+            >>> print(c.profiler.table())
+            >>> c.profiler.save_chrome_trace("/tmp/trace.json")
+        """
+        self._profiler = Profiler(memory=memory)
+        return self
+
+    def _store(self, old: Union[dict, None], data: dict) -> dict:
+        """A new states or buffers dict that shares the payloads of `data`.
+        It is counted by the memory budget if one is set.
+
+        Args:
+            old (Union[dict, None]): The dict being replaced
+            data (dict): Items
+
+        Returns:
+            dict: A dict, or a `StateStore` if there is a memory budget
+        """
+        if isinstance(old, StateStore):
+            old.detach()
+        if self._pool is None:
+            return dict(data)
+        return StateStore(self._pool, data)
+
+    @property
+    def states(self) -> Dict[int, Any]:
+        return self._states
+
+    @states.setter
+    def states(self, val):
+        self._states = self._store(getattr(self, "_states", None), val)
+
+    @property
+    def buffers(self) -> Dict[int, Any]:
+        return self._buffers
+
+    @buffers.setter
+    def buffers(self, val):
+        self._buffers = self._store(getattr(self, "_buffers", None), val)
+
+    @property
+    def memory(self) -> Union[StatePool, None]:
+        """The memory budget of the states and buffers, or None if there is no
+        budget. The pool exposes `resident` bytes and the number of `spilled`
+        payloads.
+
+        Returns:
+            Union[StatePool, None]: The pool
+        """
+        return self._pool
+
+    def _limit_memory(
+        self, max_bytes: Union[int, None], path: Union[str, Path, None] = None
+    ) -> None:
+        """Keep the states, initial states and buffers under a memory budget.
+        Cold payloads over the budget are spilled to temporary files and loaded
+        back as their original type when read. See `StatePool`.
+
+        Args:
+            max_bytes (Union[int, None]): Budget in bytes. None removes the budget.
+            path (Union[str, Path, None], optional): Directory of the spill files.
+                Defaults to the system temporary directory.
+        """
+        self._pool = StatePool(max_bytes, path) if max_bytes is not None else None
+        self.states = self.states
+        self._initial_states = self._store(self._initial_states, self._initial_states)
+        self.buffers = self.buffers
+        if self._pool is not None:
+            self._pool.enforce()
+
     @property
     def state(self):
-        return self.states[self._current_index]
+        return self._states[self._current_index]
 
     @state.setter
     def state(self, val):
-        self.states[self._current_index] = val
+        self._states[self._current_index] = val
 
     def __str__(self):
         try:
-            if isinstance(self.state, bytearray):
-                return re.sub(rb"[^\x00-\x7f]", b".", self.state).decode()
+            if isinstance(self.state, (bytearray, MappedFile)):
+                return (
+                    fixed_pattern(rb"[^\x00-\x7f]")
+                    .sub(b".", self._convert_to_buffer())
+                    .decode()
+                )
             else:
                 return self._convert_to_str()
         except UnicodeDecodeError:  # pragma: no cover
@@ -230,12 +724,12 @@ class ChepyCore(object):
             pattern = pattern.encode()
 
         old_state = self._convert_to_bytes()
-        new_state = b""
+        new_state = []
         start = 0
-        for matched in re.compile(pattern).finditer(old_state):
+        for matched in compile_pattern(pattern).finditer(old_state):
             end, newstart = matched.span()
             self.state = matched.group(group)
-            new_state += old_state[start:end]
+            new_state.append(old_state[start:end])
             for method in methods:
                 if type(method[0]).__name__ == "method":
                     method_name = method[0].__name__  # type: ignore
@@ -246,14 +740,19 @@ class ChepyCore(object):
                 else:
                     getattr(self, method_name)().o
             start = newstart
-            new_state += self._convert_to_bytes()
+            new_state.append(self._convert_to_bytes())
 
-        new_state += old_state[start:]
+        new_state.append(old_state[start:])
 
-        self.state = new_state
+        self.state = b"".join(new_state)
         return self
 
-    def fork(self, methods: List[Tuple[Union[str, object], dict]]):
+    def fork(
+        self,
+        methods: List[Tuple[Union[str, object], dict]],
+        workers: Union[int, None] = None,
+        executor: str = "thread",
+    ):
         """Run multiple methods on all available states
 
         Method names in a list of tuples. If using in the cli,
@@ -261,6 +760,10 @@ class ChepyCore(object):
 
         Args:
             methods (List[Tuple[Union[str, object], dict]]): Required. List of tuples
+            workers (Union[int, None], optional): Run the states in parallel on this
+                many workers. Each state runs on its own Chepy object. Defaults to None.
+            executor (str, optional): thread or process. Threads suit methods that
+                release the GIL like hashing and compression. Defaults to "thread".
 
         Returns:
             Chepy: The Chepy object.
@@ -281,6 +784,19 @@ class ChepyCore(object):
             >>> print(c.states)
             {0: 'e46dfcf050c0a0d135b73856ab8e3298f9cc4105', 1: '1863d1542629590e3838543cbe3bf6a4f7c706ff'}
         """
+        if workers:
+            keys = list(self.states)
+            outputs = map_methods(
+                type(self),
+                [self.states[i] for i in keys],
+                method_chain(methods),
+                workers,
+                executor,
+                self._cache,
+                self._profiler,
+            )
+            self.states.update(zip(keys, outputs))
+            return self
         for i in self.states:
             self.change_state(i)
             for method in methods:
@@ -298,6 +814,8 @@ class ChepyCore(object):
         self,
         methods: List[Tuple[Union[str, object], dict]],
         merge: Union[str, bytes, None] = None,
+        workers: Union[int, None] = None,
+        executor: str = "thread",
     ):
         """Run multiple methods on current state if it is a list
 
@@ -308,6 +826,9 @@ class ChepyCore(object):
             methods (List[Tuple[Union[str, object], dict]]): Required.
                 List of tuples
             merge (Union[str, bytes, None]): Merge data with. Defaults to None
+            workers (Union[int, None], optional): Run the items in parallel on this
+                many workers. Each item runs on its own Chepy object. Defaults to None.
+            executor (str, optional): thread or process. Defaults to "thread".
 
         Returns:
             Chepy: The Chepy object.
@@ -330,19 +851,30 @@ class ChepyCore(object):
         """
         assert isinstance(self.state, list), "Current state is not a list"
         hold = self.state
-        for i, val in enumerate(hold):
-            self.state = val
-            for method in methods:
-                if type(method[0]).__name__ == "method":
-                    method_name = method[0].__name__  # pragma: no cover
-                elif isinstance(method[0], str):
-                    method_name = method[0]
-                if len(method) > 1:
-                    hold[i] = getattr(self, method_name)(
-                        **method[1]
-                    ).o  # pragma: no cover
-                else:
-                    hold[i] = getattr(self, method_name)().o
+        if workers:
+            hold[:] = map_methods(
+                type(self),
+                hold,
+                method_chain(methods),
+                workers,
+                executor,
+                self._cache,
+                self._profiler,
+            )
+        else:
+            for i, val in enumerate(hold):
+                self.state = val
+                for method in methods:
+                    if type(method[0]).__name__ == "method":
+                        method_name = method[0].__name__  # pragma: no cover
+                    elif isinstance(method[0], str):
+                        method_name = method[0]
+                    if len(method) > 1:
+                        hold[i] = getattr(self, method_name)(
+                            **method[1]
+                        ).o  # pragma: no cover
+                    else:
+                        hold[i] = getattr(self, method_name)().o
         if merge is not None:
             if len(hold) > 0:
                 merge = self._to_bytes(merge)
@@ -553,9 +1085,66 @@ class ChepyCore(object):
         Returns:
             Chepy: The Chepy object.
         """
-        self.state = re.search(pattern, self._convert_to_str()).group(group)
+        self.state = (
+            compile_pattern(pattern).search(self._convert_to_str()).group(group)
+        )
         return self
 
+    def _is_stream(self) -> bool:
+        """Check if the current state is a lazy file backed stream
+
+        Returns:
+            bool: True if the state is a `FileStream`
+        """
+        return isinstance(self.state, FileStream)
+
+    def _materialize(self, stream: FileStream) -> bytes:
+        """Read a file backed stream into memory. This is used by all methods
+        that cannot operate on a stream chunk by chunk.
+
+        Args:
+            stream (FileStream): The stream
+
+        Returns:
+            bytes: The content of the stream
+        """
+        if not isinstance(stream, DeferredStream):
+            self._warning_logger(
+                "Loading {} bytes from {} into memory. The method does not "
+                "support streaming".format(len(stream), stream.path)
+            )
+        return stream.read()
+
+    def _update_hash(self, h: Any) -> Any:
+        """Feed the state into a hash object that has an `update` method. File
+        backed streams are fed chunk by chunk.
+
+        Args:
+            h (Any): A hashlib/pycryptodome/hmac like hash object
+
+        Returns:
+            Any: The hash object
+        """
+        if self._is_stream():
+            for chunk in self.state.chunks():
+                h.update(chunk)
+        else:
+            h.update(self._convert_to_buffer())
+        return h
+
+    def _convert_to_buffer(self) -> Union[bytes, memoryview]:
+        """Coerce the current state into a bytes like object without copying
+        memory mapped states. Use this instead of `_convert_to_bytes` when the
+        data is only read by something that accepts the buffer protocol, like
+        hashing or regex searches.
+
+        Returns:
+            Union[bytes, memoryview]: A bytes like object
+        """
+        if isinstance(self.state, MappedFile):
+            return memoryview(self.state)
+        return self._convert_to_bytes()
+
     def _convert_to_bytes(self) -> bytes:
         """This method is used to coerce the current object in
         the state variable into a bytes. The method should be
@@ -582,6 +1171,10 @@ class ChepyCore(object):
             return bytes(self.state)
         elif isinstance(self.state, float):
             return bytearray(struct.pack("f", self.state))
+        elif isinstance(self.state, MappedFile):
+            return self.state[:]
+        elif isinstance(self.state, FileStream):
+            return self._materialize(self.state)
         else:  # pragma: no cover
             # todo check more types here
             raise NotImplementedError
@@ -611,6 +1204,10 @@ class ChepyCore(object):
             return bytes(data)
         elif isinstance(data, float):
             return bytearray(struct.pack("f", data))
+        elif isinstance(data, MappedFile):
+            return data[:]
+        elif isinstance(data, FileStream):
+            return self._materialize(data)
         else:  # pragma: no cover
             # todo check more types here
             raise NotImplementedError
@@ -647,6 +1244,10 @@ class ChepyCore(object):
             return bytearray(self.state).decode()
         elif isinstance(self.state, float):  # pragma: no cover
             return format(self.state, "f")
+        elif isinstance(self.state, MappedFile):
+            return self.state[:].decode()
+        elif isinstance(self.state, FileStream):
+            return self._materialize(self.state).decode()
         else:  # pragma: no cover
             # todo check more types here
             raise NotImplementedError
@@ -747,46 +1348,27 @@ class ChepyCore(object):
 
     def _get_nested_value(self, data, key, split_by="."):
         """Get a dict value based on a string key with dot notation. Supports array indexing.
-        If split_by is None or "", returns only the first key
+        If split_by is None or "", returns only the first key. Parsed keys are cached.
         Args:
             data (dict): Data
             key (str): Dict key in a dot notation and array
             split_by (str, optional): Chars to split key by. Defaults to ".".
         """
-        if not split_by:
-            return data[key]
-        try:
-            keys = key.split(split_by)
-            for key in keys:
-                if "[" in key:
-                    # Extract the key and index
-                    key, index_str = key.split("[")
-                    index_str = index_str.rstrip("]").strip()
-                    if index_str == "*":
-                        data = [data[key][i] for i in range(len(data[key]))]
-                    else:
-                        index = int(index_str)
-                        data = data[key][index]
-                else:
-                    if isinstance(data, list):
-                        data = [
-                            data[i][key] for i in range(len(data)) if key in data[i]
-                        ]
-                    else:
-                        data = data[key] if key in data else data
-            return data
-        except Exception as e:  # pragma: no cover
-            self._error_logger(e)
-            return data
+        return compile_path(key, split_by).get(data, self._error_logger)
 
     @ChepyDecorators.call_stack
     def get_by_key(self, *keys: str, py_style: bool = False, split_key: str = "."):
-        """This method support json keys support.
+        """This method support json keys support. Keys are jmespath expressions, or
+        dot notation keys with `py_style`. With several `py_style` keys, the state
+        is the list of their values, which are extracted in one traversal. Only
+        the first jmespath key is used. Parsed keys and expressions are cached,
+        so the method is cheap to call in a loop.
 
         Args:
             keys (Tuple[Union[Hashable, None]]): Keys to extract.
             split_key (str, optional): Split nested keys. Defaults to "."
-            nested (bool, optional): If the specified keys are nested. Supports array indexing. Defaults to True
+            py_style (bool, optional): Use dot notation keys instead of jmespath.
+                Supports array indexing. Defaults to False
 
         Returns:
             Chepy: The Chepy object.
@@ -794,6 +1376,8 @@ class ChepyCore(object):
         Examples:
             >>> Chepy({"a":{"b": "c"}}).get_by_key('a.b')
             >>> 'c'
+            >>> Chepy({"a": {"b": 1, "c": 2}}).get_by_key("a.b", "a.c", py_style=True).o
+            [1, 2]
         """
         assert isinstance(
             self.state,
@@ -809,17 +1393,35 @@ class ChepyCore(object):
                     self.state, keys[0], split_by=split_key
                 )
             else:
-                self.state = [
-                    self._get_nested_value(self.state, key, split_by=split_key)
-                    for key in keys
-                ]
+                self.state = compile_paths(keys, split_key).get(
+                    self.state, self._error_logger
+                )
         else:
-            o = jmespath.search(keys[0], self.state)
+            o = compile_query(keys[0]).search(self.state)
             if o is None:  # pragma: no cover
                 raise ValueError("Query did not match any data")
             self.state = o
         return self
 
+    @ChepyDecorators.call_stack
+    def jmespath_search(self, expression: str):
+        """Search a dict or list with a jmespath expression. Unlike `get_by_key`,
+        an expression that does not match sets the state to None. Compiled
+        expressions are cached.
+
+        Args:
+            expression (str): Required. The jmespath expression
+
+        Returns:
+            Chepy: The Chepy object.
+
+        Examples:
+            >>> Chepy({"items": [{"id": 1}, {"id": 2}]}).jmespath_search("items[].id").o
+            [1, 2]
+        """
+        self.state = compile_query(expression).search(self.state)
+        return self
+
     @ChepyDecorators.call_stack
     def copy_to_clipboard(self) -> None:  # pragma: no cover
         """Copy to clipboard
@@ -887,6 +1489,7 @@ class ChepyCore(object):
         json: dict = None,
         headers: dict = {},
         cookies: dict = {},
+        timeout: Union[float, None] = None,
     ):  # pragma: no cover
         """Make a http/s request
 
@@ -899,6 +1502,8 @@ class ChepyCore(object):
             json (dict, optional): Request payload. Defaults to None.
             headers (dict, optional): Headers for request. Defaults to {}.
             cookies (dict, optional): Cookies for request. Defaults to {}.
+            timeout (Union[float, None], optional): Timeout in seconds. Defaults to
+                the config.
 
         Raises:
             NotImplementedError: If state is not a string or dictionary
@@ -935,23 +1540,22 @@ class ChepyCore(object):
             else:
                 raise NotImplementedError
 
+        params = json2str(params)
+        headers = json2str(headers)
+        cookies = json2str(cookies)
         try:
-            from requests import request
+            res = http_session.request(
+                self.state,
+                method,
+                timeout,
+                params=params,
+                json=json,
+                headers=headers,
+                cookies=cookies,
+            )
         except ImportError:  # pragma: no cover
             self._error_logger("Could not import requests. pip install requests")
             return self
-
-        params = json2str(params)
-        headers = json2str(headers)
-        cookies = json2str(cookies)
-        res = request(
-            method=method,
-            url=self.state,
-            params=params,
-            json=json,
-            headers=headers,
-            cookies=cookies,
-        )
         self.state = {
             "body": res.text,
             "status": res.status_code,
@@ -967,6 +1571,7 @@ class ChepyCore(object):
         json: dict = None,
         headers: dict = {},
         cookies: dict = {},
+        timeout: Union[float, None] = None,
     ):  # pragma: no cover
         """Load binary content from a url
 
@@ -978,6 +1583,8 @@ class ChepyCore(object):
             json (dict, optional): Request payload. Defaults to None.
             headers (dict, optional): Headers for request. Defaults to {}.
             cookies (dict, optional): Cookies for request. Defaults to {}.
+            timeout (Union[float, None], optional): Timeout in seconds. Defaults to
+                the config.
 
         Raises:
             NotImplementedError: If state is not a string or dictionary
@@ -1002,47 +1609,171 @@ class ChepyCore(object):
             else:
                 raise NotImplementedError
 
+        params = json2str(params)
+        headers = json2str(headers)
+        cookies = json2str(cookies)
         try:
-            from requests import request
+            res = http_session.request(
+                self.state,
+                method,
+                timeout,
+                params=params,
+                json=json,
+                headers=headers,
+                cookies=cookies,
+            )
         except ImportError:  # pragma: no cover
             self._error_logger("Could not import requests. pip install requests")
             return self
+        self.state = res.content
+        return self
 
-        params = json2str(params)
-        headers = json2str(headers)
-        cookies = json2str(cookies)
-        res = request(
-            method=method,
-            url=self.state,
+    @ChepyDecorators.call_stack
+    def load_from_urls(
+        self,
+        method: str = "GET",
+        params: dict = {},
+        json: dict = None,
+        headers: dict = {},
+        cookies: dict = {},
+        all_states: bool = False,
+        workers: Union[int, None] = None,
+        timeout: Union[float, None] = None,
+    ):  # pragma: no cover
+        """Load binary content from many urls concurrently
+
+        The urls are either a list in the state, or one url in every state
+        with `all_states`. Requests share pooled keep-alive connections and are
+        retried on connection errors and 429 and 5xx responses, see the Http
+        section of the config. A failed request is logged and its content is
+        None.
+
+        Args:
+            method (str, optional): Request method. Defaults to 'GET'.
+            params (dict, optional): Query Args. Defaults to {}.
+            json (dict, optional): Request payload. Defaults to None.
+            headers (dict, optional): Headers for request. Defaults to {}.
+            cookies (dict, optional): Cookies for request. Defaults to {}.
+            all_states (bool, optional): Load the url in every state into that state.
+                Defaults to False.
+            workers (Union[int, None], optional): Requests in flight. Defaults to
+                the connection pool size.
+            timeout (Union[float, None], optional): Timeout of each request in
+                seconds. Defaults to the config.
+
+        Returns:
+            Chepy: A list of the response contents, or the content in every state.
+                The Chepy object.
+
+        Examples:
+            >>> c = Chepy(["http://example.com/a.png", "http://example.com/b.png"])
+            >>> c.load_from_urls(workers=16).o
+            [b'\\x89PNG...', b'\\x89PNG...']
+        """
+        keys = list(self.states) if all_states else None
+        urls = [self.states[k] for k in keys] if all_states else self.state
+        fetched = http_session.fetch_all(
+            urls,
+            method,
+            workers,
+            timeout,
             params=params,
             json=json,
             headers=headers,
             cookies=cookies,
         )
-        self.state = io.BytesIO(res.content).read()
+        contents = []
+        for url, content in zip(urls, fetched):
+            if isinstance(content, ImportError):
+                self._error_logger("Could not import requests. pip install requests")
+                return self
+            if isinstance(content, Exception):
+                self._warning_logger("{}: {}".format(url, content))
+                content = None
+            contents.append(content)
+        if all_states:
+            self.states.update(zip(keys, contents))
+        else:
+            self.state = contents
         return self
 
     @ChepyDecorators.call_stack
-    def load_dir(self, pattern: str = "*"):
+    def load_dir(
+        self,
+        pattern: str = "*",
+        contents: bool = False,
+        max_size: Union[int, None] = None,
+        workers: Union[int, None] = None,
+    ):
         """Load all file paths in a directory
 
+        With `contents`, the files are read into the states on a pool of
+        threads instead. Text files are loaded as str, binary files as bytes.
+        Files larger than `max_size`, and files that would take the loaded
+        data over the memory budget of this object, are loaded as lazy file
+        backed streams like `load_file(stream=True)`.
+
         Args:
             pattern (str, optional): File pattern to match. Defaults to "*".
+            contents (bool, optional): Load the content of the files instead of
+                their paths. Defaults to False.
+            max_size (Union[int, None], optional): Largest file in bytes read into
+                memory. Defaults to None.
+            workers (Union[int, None], optional): Number of threads reading files.
+                Defaults to the `ThreadPoolExecutor` default.
 
         Returns:
             Chepy: The Chepy object.
+
+        Examples:
+            >>> c = Chepy("/path/to/dir").load_dir("**/*.log", contents=True, max_size=2**20)
         """
         files = [x for x in Path(self.state).glob(pattern) if x.is_file()]
-        self.states = {x[0]: str(x[1]) for x in enumerate(files) if x[1].is_file()}
+        if not contents:
+            self.states = {x[0]: str(x[1]) for x in enumerate(files)}
+            return self
+
+        budget = self._pool.max_bytes if self._pool is not None else None
+
+        def plan():
+            # decide which files fit in memory before any is read
+            loaded = 0
+            for path in files:
+                size = path.stat().st_size
+                stream = (max_size is not None and size > max_size) or (
+                    budget is not None and loaded + size > budget
+                )
+                if not stream:
+                    loaded += size
+                yield path, stream
+
+        def read(item):
+            return read_state(*item)
+
+        self.states = {}
+        loaded = imap_threads(read, plan(), workers, chunksize=64)
+        for index, state in enumerate(loaded):
+            self.states[index] = state
         return self
 
     @ChepyDecorators.call_stack
-    def load_file(self, binary_mode: bool = False, encoding: Union[str, None] = None):
+    def load_file(
+        self,
+        binary_mode: bool = False,
+        encoding: Union[str, None] = None,
+        stream: bool = False,
+        memory_map: bool = False,
+    ):
         """If a path is provided, load the file
 
         Args:
             binary_mode (bool, optional): Force load in binary mode.
             encoding (Union[str, None], optional): Encoding for string.
+            stream (bool, optional): Do not read the file. The state becomes a lazy
+                file backed stream that supported methods process chunk by chunk
+                with constant memory. Defaults to False.
+            memory_map (bool, optional): Used with binary_mode. Map the file read only
+                instead of copying it into a bytearray. Defaults to False.
 
         Returns:
             Chepy: The Chepy object.
@@ -1051,11 +1782,30 @@ class ChepyCore(object):
             >>> c = Chepy("/path/to/file")
             >>> # at the moment, the state only contains the string "/path/to/file"
             >>> c.load_file() # this will load the file content into the state
+
+            Large files can be streamed. Hashing, hex/base64 encoding, xor,
+            (de)compression and `write_binary` then never load the whole file.
+
+            >>> Chepy("/path/to/image.dd").load_file(stream=True).sha2_256().o
+            b"..."
+
+            Binary files can be memory mapped. Hashing, slicing and regex searches
+            then work on the mapping without copying the file.
+
+            >>> Chepy("/path/to/file.bin").load_file(binary_mode=True, memory_map=True).search("flag{.+}").o
+            [b"flag{...}"]
         """
         path = Path(str(self.state)).expanduser().absolute()
-        if binary_mode:
-            with open(path, "rb") as f:
-                self.states[self._current_index] = bytearray(f.read())
+        if stream:
+            if not path.is_file():  # pragma: no cover
+                raise FileNotFoundError(str(path))
+            self.states[self._current_index] = FileStream(path)
+        elif binary_mode:
+            if memory_map and path.stat().st_size > 0:
+                self.states[self._current_index] = MappedFile(path)
+            else:
+                with open(path, "rb") as f:
+                    self.states[self._current_index] = bytearray(f.read())
         else:
             try:
                 with open(path, "r", encoding=encoding) as f:  # type: ignore
@@ -1096,14 +1846,134 @@ class ChepyCore(object):
         Examples:
             >>> c = Chepy("some data").write_binary('/some/path/file')
         """
-        data = self._convert_to_bytes()
         if isinstance(path, bytes):  # pragma: no cover
             path = path.decode()
-        with open(str(self._abs_path(path)), "wb+") as f:
-            f.write(data)
+        if self._is_stream():
+            with open(str(self._abs_path(path)), "wb+") as f:
+                self.state.write_to(f)
+            if isinstance(self.state, DeferredStream):
+                # the pending transforms have run, keep the written file instead
+                self.state = FileStream(self._abs_path(path))
+        else:
+            data = self._convert_to_bytes()
+            with open(str(self._abs_path(path)), "wb+") as f:
+                f.write(data)
         self._info_logger("File written to {}".format(self._abs_path(path)))
         return None
 
+    @classmethod
+    def compile_recipe(
+        cls,
+        recipe: Union[str, List[Mapping[str, Union[str, Mapping[str, Any]]]]],
+    ) -> CompiledRecipe:
+        """Validate and bind a recipe once, and return a reusable pipeline.
+        Use this when the same recipe is applied to a large number of inputs.
+
+        Args:
+            recipe (Union[str, List[Mapping[str, Union[str, Mapping[str, Any]]]]]): A recipe
+                or the path to a recipe file.
+
+        Raises:
+            RecipeError: If a method does not exist or an argument is invalid or missing
+
+        Returns:
+            CompiledRecipe: A callable that takes the same arguments as Chepy and
+                returns the Chepy object.
+
+        Examples:
+            >>> pipeline = Chepy.compile_recipe("/path/to/recipe")
+            >>> [pipeline(data).o for data in inputs]
+        """
+        if isinstance(recipe, (str, Path)):
+            path = Path(recipe).expanduser().absolute()
+            stat = path.stat()
+            return _compile_recipe_file(cls, str(path), stat.st_mtime_ns, stat.st_size)
+        return CompiledRecipe(cls, recipe)
+
+    @classmethod
+    def lazy(cls, *data: Any, chunk_size: int = DEFAULT_CHUNK_SIZE) -> LazyChepy:
+        """Create a lazy Chepy object. Chained methods are recorded as a plan
+        that runs when the output is requested, and consecutive methods that
+        can stream are fused into a single pass over the data. This avoids
+        full size intermediate copies of large states.
+
+        Args:
+            data (Any): The states
+            chunk_size (int, optional): Size of the chunks of a fused pass. Defaults to 1MB.
+
+        Returns:
+            LazyChepy: The lazy object. Chain methods on it as usual.
+
+        Examples:
+            >>> Chepy.lazy(big_hex).from_hex().xor("41").to_base64().o
+        """
+        return LazyChepy(cls, data, chunk_size)
+
+    @classmethod
+    def run_recipe_batch(
+        cls,
+        inputs: Iterable[Any],
+        recipe: Union[str, List[Mapping[str, Union[str, Mapping[str, Any]]]]],
+        workers: Union[int, None] = None,
+        chunksize: int = 64,
+    ) -> List[BatchResult]:
+        """Run a recipe on a large number of independent inputs on a pool of
+        processes. The recipe is compiled once per worker, and a failing input
+        does not stop the batch.
+
+        Args:
+            inputs (Iterable[Any]): The inputs. Each one is loaded into a new Chepy object.
+            recipe (Union[str, List[Mapping[str, Union[str, Mapping[str, Any]]]]]): A recipe
+                or the path to a recipe file.
+            workers (Union[int, None], optional): Number of processes. 1 runs the batch
+                in this process. Defaults to the number of CPUs.
+            chunksize (int, optional): Number of inputs sent to a worker at once. Defaults to 64.
+
+        Raises:
+            ValueError: If the recipe is not valid
+
+        Returns:
+            List[BatchResult]: A result for every input in input order, with the
+                `output` or the `error` of the input.
+
+        Examples:
+            >>> results = Chepy.run_recipe_batch(["NDE=", "NDI="], [{"function": "from_base64"}, {"function": "from_hex"}])
+            >>> [r.output for r in results]
+            [b"A", b"B"]
+        """
+        return list(
+            run_recipe_batch(cls.compile_recipe(recipe), inputs, workers, chunksize)
+        )
+
+    @classmethod
+    def iter_recipe_batch(
+        cls,
+        inputs: Iterable[Any],
+        recipe: Union[str, List[Mapping[str, Union[str, Mapping[str, Any]]]]],
+        workers: Union[int, None] = None,
+        chunksize: int = 64,
+    ) -> Iterator[BatchResult]:
+        """Same as `run_recipe_batch`, but results are yielded as soon as they
+        are ready, in any order. Inputs are consumed lazily.
+
+        Args:
+            inputs (Iterable[Any]): The inputs. Each one is loaded into a new Chepy object.
+            recipe (Union[str, List[Mapping[str, Union[str, Mapping[str, Any]]]]]): A recipe
+                or the path to a recipe file.
+            workers (Union[int, None], optional): Number of processes. 1 runs the batch
+                in this process. Defaults to the number of CPUs.
+            chunksize (int, optional): Number of inputs sent to a worker at once. Defaults to 64.
+
+        Raises:
+            ValueError: If the recipe is not valid
+
+        Returns:
+            Iterator[BatchResult]: Results with the `index` of their input
+        """
+        return run_recipe_batch(
+            cls.compile_recipe(recipe), inputs, workers, chunksize, ordered=False
+        )
+
     def run_recipe(self, recipes: List[Mapping[str, Union[str, Mapping[str, Any]]]]):
         """Run a recipe on the state. All arguments including optional needs to
         be specified for a recipe.
@@ -1112,6 +1982,9 @@ class ChepyCore(object):
             recipes (List[Mapping[str, Union[str, Mapping[str, Any]]]]): An array of recipes.
                 Recipes are in the format {'function': 'function_name', 'args': {'arg_name': 'arg_val'}}
 
+        Raises:
+            RecipeError: If a method does not exist or an argument is invalid or missing
+
         Returns:
             Chepy: The Chepy object.
 
@@ -1120,14 +1993,7 @@ class ChepyCore(object):
             >>> lol
             In this example, we are calling the base64 decode method on the state.
         """
-        for recipe in recipes:
-            function = recipe["function"]
-            args = recipe["args"]
-            if len(args) > 0:
-                getattr(self, function)(**args)
-            else:
-                getattr(self, function)()
-        return self
+        return self.compile_recipe(recipes).apply(self)
 
     def save_recipe(self, path: str):
         """Save the current recipe
@@ -1153,7 +2019,8 @@ class ChepyCore(object):
         return self
 
     def load_recipe(self, path: str):
-        """Load and run a recipe
+        """Load and run a recipe. The compiled recipe is cached until the
+        file changes.
 
         Args:
             path (str): Path to recipe file
@@ -1165,16 +2032,7 @@ class ChepyCore(object):
             >>> c = Chepy("some data").load_recipe("/path/to/recipe").out
             NzM2ZjZkNjUyMDY0NjE3NDYx
         """
-        with self._abs_path(path) as f:
-            recipes = json.loads(f.read_text())
-            for recipe in recipes:
-                function = recipe["function"]
-                args = recipe["args"]
-                if len(args) > 0:
-                    getattr(self, function)(**args)
-                else:
-                    getattr(self, function)()
-        return self
+        return self.compile_recipe(str(self._abs_path(path))).apply(self)
 
     # @ChepyDecorators.call_stack
     def run_script(self, path: str, save_state: bool = False):
@@ -1227,26 +2085,31 @@ class ChepyCore(object):
         assert isinstance(iterations, int), "Iterations must be an integer"
         assert isinstance(args, dict), "Args must be a dick"
 
-        stack_loop_index = next(
-            itertools.dropwhile(
-                lambda x: self._stack[x]["function"] != "loop",
-                reversed(range(len(self._stack))),
-            )
-        )
+        # everything recorded by the callback is dropped after the loop
+        stack_size = len(self._stack)
 
         for _ in range(int(iterations)):
             getattr(self, callback)(**args)
 
-        self._stack = self._stack[: stack_loop_index + 1]
+        self._stack = self._stack[:stack_size]
         return self
 
     @ChepyDecorators.call_stack
-    def loop_list(self, callback: str, args: dict = {}):
+    def loop_list(
+        self,
+        callback: str,
+        args: dict = {},
+        workers: Union[int, None] = None,
+        executor: str = "thread",
+    ):
         """Loop over an array and run a Chepy method on it
 
         Args:
             callback (str): Chepy method as string
             args (dict, optional): Dictionary of args. If in cli, dont use spaces. Defaults to {}.
+            workers (Union[int, None], optional): Run the items in parallel on this
+                many workers. Each item runs on its own Chepy object. Defaults to None.
+            executor (str, optional): thread or process. Defaults to "thread".
 
         Returns:
             Chepy: The Chepy object
@@ -1267,23 +2130,29 @@ class ChepyCore(object):
         assert isinstance(callback, str), "Callback must be a string"
         hold = []
         current_state = self.state
-        # find the last index that this method was run
-        stack_loop_index = next(
-            itertools.dropwhile(
-                lambda x: self._stack[x]["function"] != "loop_list",
-                reversed(range(len(self._stack))),
-            )
-        )
+        # everything recorded by the callback is dropped after the loop
+        stack_size = len(self._stack)
         if isinstance(args, str):  # pragma: no cover
             args = json.loads(args)
         try:
-            for index, data in enumerate(current_state):
-                self.state = current_state[index]
-                if args:
-                    hold.append(getattr(self, callback)(**args).o)
-                else:
-                    hold.append(getattr(self, callback)().o)
-            self._stack = self._stack[: stack_loop_index + 1]
+            if workers:
+                hold = map_methods(
+                    type(self),
+                    current_state,
+                    [(callback, args)],
+                    workers,
+                    executor,
+                    self._cache,
+                    self._profiler,
+                )
+            else:
+                for index, data in enumerate(current_state):
+                    self.state = current_state[index]
+                    if args:
+                        hold.append(getattr(self, callback)(**args).o)
+                    else:
+                        hold.append(getattr(self, callback)().o)
+            self._stack = self._stack[:stack_size]
             self.state = hold
             return self
         except:  # pragma: no cover
@@ -1291,7 +2160,14 @@ class ChepyCore(object):
             raise
 
     @ChepyDecorators.call_stack
-    def loop_dict(self, keys: list, callback: str, args: dict = {}):
+    def loop_dict(
+        self,
+        keys: list,
+        callback: str,
+        args: dict = {},
+        workers: Union[int, None] = None,
+        executor: str = "thread",
+    ):
         """
         Loop over a dictionary and apply the callback to the value
 
@@ -1299,6 +2175,9 @@ class ChepyCore(object):
             keys (list): List of keys to match. If in cli, dont use spaces.
             callback (str): Chepy method as string
             args (dict, optional): Dictionary of args. If in cli, dont use spaces. Defaults to {}.
+            workers (Union[int, None], optional): Run the values in parallel on this
+                many workers. Each value runs on its own Chepy object. Defaults to None.
+            executor (str, optional): thread or process. Defaults to "thread".
 
         Returns:
             Chepy: The Chepy object.
@@ -1327,13 +2206,8 @@ class ChepyCore(object):
 
         hold = {}
         current_state = self.state
-        # find the last index that this method was run
-        stack_loop_index = next(
-            itertools.dropwhile(
-                lambda x: self._stack[x]["function"] != "loop_dict",
-                reversed(range(len(self._stack))),
-            )
-        )
+        # everything recorded by the callback is dropped after the loop
+        stack_size = len(self._stack)
 
         if isinstance(keys, str):  # pragma: no cover
             keys = json.loads(keys)
@@ -1342,16 +2216,29 @@ class ChepyCore(object):
             args = json.loads(args)
         try:
             dict_keys = current_state.keys()
-            for key in keys:
-                if current_state.get(key) is not None:
-                    self.state = current_state.get(key)
-                    if args:
-                        hold[key] = getattr(self, callback)(**args).o
-                    else:
-                        hold[key] = getattr(self, callback)().o
+            if workers:
+                matched = [key for key in keys if current_state.get(key) is not None]
+                outputs = map_methods(
+                    type(self),
+                    [current_state[key] for key in matched],
+                    [(callback, args)],
+                    workers,
+                    executor,
+                    self._cache,
+                    self._profiler,
+                )
+                hold.update(zip(matched, outputs))
+            else:
+                for key in keys:
+                    if current_state.get(key) is not None:
+                        self.state = current_state.get(key)
+                        if args:
+                            hold[key] = getattr(self, callback)(**args).o
+                        else:
+                            hold[key] = getattr(self, callback)().o
             for unmatched_key in list(set(dict_keys) - set(keys)):
                 hold[unmatched_key] = current_state[unmatched_key]
-            self._stack = self._stack[: stack_loop_index + 1]
+            self._stack = self._stack[:stack_size]
             self.state = hold
             return self
         except:  # pragma: no cover
@@ -1563,11 +2450,11 @@ class ChepyCore(object):
         if extended:  # pragma: no cover
             flags += re.X
 
-        r = re.compile(pattern, flags=flags)
+        r = compile_pattern(pattern, flags)
         old_state = self.state
 
         if isinstance(pattern, bytes):
-            matches = r.findall(self._convert_to_bytes())
+            matches = r.findall(self._convert_to_buffer())
         else:
             matches = r.findall(self._convert_to_str())
 
@@ -1673,36 +2560,89 @@ class ChepyCore(object):
         return self
 
     @ChepyDecorators.call_stack
-    def walk_dir(self):
-        """Walk a directory and get all file paths
+    def walk_dir(
+        self,
+        include: Union[str, List[str]] = "*",
+        exclude: Union[str, List[str], None] = None,
+        max_size: Union[int, None] = None,
+        lazy: bool = False,
+        files_only: bool = False,
+    ):
+        """Walk a directory and get all file and directory paths
+
+        Glob patterns are matched against the path relative to the directory
+        and against the file name. Directories that match an exclude pattern
+        are not walked.
+
+        Args:
+            include (Union[str, List[str]], optional): Glob patterns of files to get.
+                Defaults to "*".
+            exclude (Union[str, List[str], None], optional): Glob patterns of files and
+                directories to skip. Defaults to None.
+            max_size (Union[int, None], optional): Skip files larger than this many
+                bytes. Defaults to None.
+            lazy (bool, optional): Set the state to a generator of paths instead of a
+                list. Defaults to False.
+            files_only (bool, optional): Only get the paths of files, not of
+                directories. Defaults to False.
 
         Returns:
             Chepy: The Chepy object.
+
+        Examples:
+            >>> Chepy("/evidence").walk_dir(include="*.log", exclude=".git", lazy=True)
         """
-        p = self._convert_to_str()
-        paths = Path(p).glob("**/*")
-        self.state = [str(p) for p in paths]
+        paths = walk_files(
+            self._convert_to_str(), include, exclude, max_size, dirs=not files_only
+        )
+        self.state = paths if lazy else list(paths)
         return self
 
     @ChepyDecorators.call_stack
-    def search_dir(self, pattern: Union[bytes, str]):
+    def search_dir(
+        self,
+        pattern: Union[bytes, str],
+        include: Union[str, List[str]] = "*",
+        exclude: Union[str, List[str], None] = None,
+        max_size: Union[int, None] = None,
+        skip_binary: bool = False,
+        offsets: bool = False,
+        workers: Union[int, None] = None,
+    ):
         """Search all files in a directory. Pattern is case insensitive
 
+        Files are memory mapped and searched on a pool of threads. The files
+        to search are filtered like `walk_dir`.
+
         Args:
             pattern (Union[bytes, str]): regex to search
+            include (Union[str, List[str]], optional): Glob patterns of files to search.
+                Defaults to "*".
+            exclude (Union[str, List[str], None], optional): Glob patterns of files and
+                directories to skip. Defaults to None.
+            max_size (Union[int, None], optional): Skip files larger than this many
+                bytes. Defaults to None.
+            skip_binary (bool, optional): Skip files with a null byte in their first
+                8KB. Defaults to False.
+            offsets (bool, optional): Set the state to a list of
+                `(path, offset, match)` tuples. Defaults to False.
+            workers (Union[int, None], optional): Number of threads. Defaults to the
+                `ThreadPoolExecutor` default.
 
         Returns:
             Chepy: The Chepy object.
+
+        Examples:
+            >>> Chepy("/evidence").search_dir("flag{.+?}", skip_binary=True).o
+            [b"flag{...}", ...]
         """
-        paths = self._convert_to_str()
-        rgx = re.compile(self._str_to_bytes(pattern), flags=re.I)
-        hold = []
-        for path in Path(paths).glob("**/*"):
-            if path.is_dir():  # pragma: no cover
-                continue
-            data = path.read_bytes()
-            matched = rgx.findall(data)
-            if matched:
-                hold += matched
-        self.state = hold
+        rgx = compile_pattern(self._str_to_bytes(pattern), re.I)
+        paths = walk_files(self._convert_to_str(), include, exclude, max_size)
+        search = functools.partial(
+            search_file, rgx=rgx, skip_binary=skip_binary, offsets=offsets
+        )
+        # closing the generator shuts the thread pool down even if a search
+        # fails
+        with closing(imap_threads(search, paths, workers)) as found:
+            self.state = [match for matches in found for match in matches]
         return self
@@ -1,19 +1,44 @@
 import logging
-from typing import Any, List, Mapping, Tuple, Union, TypeVar, Literal, Callable, Dict
+from typing import Any, List, Mapping, Tuple, Union, TypeVar, Literal, Callable, Dict, ContextManager, Iterable, Iterator
+from .modules.internal.cache import ResultCache
+from .modules.internal.patterns import PatternCache
+from .modules.internal.profiler import Profiler
+from .modules.internal.storage import StatePool
+from .modules.internal.workers import BatchResult
 
 jsonpickle: Any
 
 ChepyCoreT = TypeVar('ChepyCoreT', bound='ChepyCore')
 
 class ChepyDecorators:
+    record: bool = ...
     @staticmethod
-    def call_stack(func: Any, *args: Any, **kwargs: Any): ...
+    def call_stack(func: Callable) -> Callable: ...
     @staticmethod
     def is_stdout(func: Any, *args: Any, **kwargs: Any): ...
 
+def recording(enabled: bool = ...) -> ContextManager[None]: ...
+
+class CompiledRecipe:
+    cls: type = ...
+    recipe: List[Dict[str, Any]] = ...
+    def __init__(self, cls: type, recipe: Union[str, Any, List[Mapping[str, Union[str, Mapping[str, Any]]]]]) -> None: ...
+    def __len__(self) -> int: ...
+    def apply(self, chepy: ChepyCoreT) -> ChepyCoreT: ...
+    def __call__(self, *data: Any) -> Any: ...
+
+class LazyChepy:
+    cls: type = ...
+    data: tuple = ...
+    chunk_size: int = ...
+    plan: List[Dict[str, Any]] = ...
+    def __init__(self, cls: type, data: tuple, chunk_size: int = ...) -> None: ...
+    def __getattr__(self, name: str) -> Any: ...
+    def run(self) -> Any: ...
+
 class ChepyCore:
-    states: Any = ...
-    buffers: Any = ...
+    states: Dict[int, Any] = ...
+    buffers: Dict[int, Any] = ...
     write: Any = ...
     bake: Any = ...
     cyberchef: Any = ...
@@ -22,10 +47,15 @@ class ChepyCore:
     log_format: str = ...
     _registers: Dict[str, Union[str, bytes]] = ...
     _log: logging.Logger = ...
+    _record: bool = ...
+    _cache: Union[ResultCache, None] = ...
+    _profiler: Union[Profiler, None] = ...
+    _pool: Union[StatePool, None] = ...
     def __init__(self, *data: Any) -> None: ...
     def _convert_to_bytes(self) -> bytes: ...
     def _to_bytes(self, data: Any) -> bytes: ...
     def _convert_to_bytearray(self) -> bytearray: ...
+    def _convert_to_buffer(self) -> Union[bytes, memoryview]: ...
     def _convert_to_str(self) -> str: ...
     def _convert_to_int(self) -> int: ...
     def _str_to_bytes(self, s: str) -> bytes: ...
@@ -35,8 +65,8 @@ class ChepyCore:
     def state(self): ...
     @state.setter
     def state(self: ChepyCoreT, val: Any) -> None: ...
-    def fork(self: ChepyCoreT, methods: List[Union[Tuple[Union[str, Callable], dict], Tuple[Union[str, Callable[None, ChepyCoreT]],]]]) -> ChepyCoreT: ...
-    def for_each(self: ChepyCoreT, methods: List[Union[Tuple[Union[str, Callable], Dict[str, Any]], Tuple[Union[str, Callable[None, ChepyCoreT]],]]], merge: Union[str, bytes, None]=None) -> ChepyCoreT: ...
+    def fork(self: ChepyCoreT, methods: List[Union[Tuple[Union[str, Callable], dict], Tuple[Union[str, Callable[None, ChepyCoreT]],]]], workers: Union[int, None]=..., executor: Literal['thread', 'process']=...) -> ChepyCoreT: ...
+    def for_each(self: ChepyCoreT, methods: List[Union[Tuple[Union[str, Callable], Dict[str, Any]], Tuple[Union[str, Callable[None, ChepyCoreT]],]]], merge: Union[str, bytes, None]=None, workers: Union[int, None]=..., executor: Literal['thread', 'process']=...) -> ChepyCoreT: ...
     def set_state(self: ChepyCoreT, data: Any) -> ChepyCoreT: ...
     def create_state(self: ChepyCoreT): ...
     def copy_state(self: ChepyCoreT, index: int=...) -> ChepyCoreT: ...
@@ -55,24 +85,44 @@ class ChepyCore:
     def out_as_any(self: ChepyCoreT) -> str: ...
     def get_by_index(self: ChepyCoreT, *indexes: int) -> ChepyCoreT: ...
     def get_by_key(self: ChepyCoreT, *keys: Union[str, bytes], py_style: bool=False, split_key: Union[str, None] = '.') -> ChepyCoreT: ...
+    def jmespath_search(self: ChepyCoreT, expression: str) -> ChepyCoreT: ...
     def copy_to_clipboard(self: ChepyCoreT) -> None: ...
     def copy(self: ChepyCoreT) -> None: ...
     def web(self: ChepyCoreT, magic: bool=..., cyberchef_url: str=...) -> None: ...
-    def http_request(self: ChepyCoreT, method: str=..., params: dict=..., json: dict=..., headers: dict=..., cookies: dict=...) -> ChepyCoreT: ...
-    def load_from_url(self: ChepyCoreT, method: str=..., params: dict=..., json: dict=..., headers: dict=..., cookies: dict=...) -> ChepyCoreT: ...
-    def load_dir(self: ChepyCoreT, pattern: str=...) -> ChepyCoreT: ...
-    def load_file(self: ChepyCoreT, binary_mode: bool=..., encoding: Union[str, None]=...) -> ChepyCoreT: ...
+    def http_request(self: ChepyCoreT, method: str=..., params: dict=..., json: dict=..., headers: dict=..., cookies: dict=..., timeout: Union[float, None]=...) -> ChepyCoreT: ...
+    def load_from_url(self: ChepyCoreT, method: str=..., params: dict=..., json: dict=..., headers: dict=..., cookies: dict=..., timeout: Union[float, None]=...) -> ChepyCoreT: ...
+    def load_from_urls(self: ChepyCoreT, method: str=..., params: dict=..., json: dict=..., headers: dict=..., cookies: dict=..., all_states: bool=..., workers: Union[int, None]=..., timeout: Union[float, None]=...) -> ChepyCoreT: ...
+    def load_dir(self: ChepyCoreT, pattern: str=..., contents: bool = ..., max_size: Union[int, None] = ..., workers: Union[int, None] = ...) -> ChepyCoreT: ...
+    def load_file(self: ChepyCoreT, binary_mode: bool=..., encoding: Union[str, None]=..., stream: bool=..., memory_map: bool=...) -> ChepyCoreT: ...
     def write_to_file(self: ChepyCoreT, path: str) -> None: ...
     def write_binary(self: ChepyCoreT, path: str) -> None: ...
     @property
+    def cache(self) -> Union[ResultCache, None]: ...
+    @property
+    def patterns(self) -> PatternCache: ...
+    @property
+    def profiler(self) -> Union[Profiler, None]: ...
+    @property
+    def memory(self) -> Union[StatePool, None]: ...
+    def _limit_memory(self, max_bytes: Union[int, None], path: Union[str, Any, None] = ...) -> None: ...
+    def profile(self: ChepyCoreT, memory: bool = ...) -> ChepyCoreT: ...
+    @property
     def recipe(self) -> List[Dict[str, Union[str, Dict[str, Any]]]]: ...
+    @classmethod
+    def compile_recipe(cls, recipe: Union[str, List[Mapping[str, Union[str, Mapping[str, Any]]]]]) -> CompiledRecipe: ...
+    @classmethod
+    def lazy(cls, *data: Any, chunk_size: int = ...) -> LazyChepy: ...
+    @classmethod
+    def run_recipe_batch(cls, inputs: Iterable[Any], recipe: Union[str, List[Mapping[str, Union[str, Mapping[str, Any]]]]], workers: Union[int, None] = ..., chunksize: int = ...) -> List[BatchResult]: ...
+    @classmethod
+    def iter_recipe_batch(cls, inputs: Iterable[Any], recipe: Union[str, List[Mapping[str, Union[str, Mapping[str, Any]]]]], workers: Union[int, None] = ..., chunksize: int = ...) -> Iterator[BatchResult]: ...
     def run_recipe(self: ChepyCoreT, recipes: List[Mapping[str, Union[str, Mapping[str, Any]]]]) -> ChepyCoreT: ...
     def save_recipe(self: ChepyCoreT, path: str) -> ChepyCoreT: ...
     def load_recipe(self: ChepyCoreT, path: str) -> ChepyCoreT: ...
     def run_script(self: ChepyCoreT, path: str, save_state: bool=...) -> ChepyCoreT: ...
-    def loop(self: ChepyCoreT, iterations: int, callback: Union[str, Callable], args: dict=...) -> ChepyCoreT: ...
-    def loop_list(self: ChepyCoreT, callback: Union[str, Callable], args: dict=...) -> ChepyCoreT: ...
-    def loop_dict(self: ChepyCoreT, keys: list, callback: Union[str, Callable], args: dict=...) -> ChepyCoreT: ...
+    def loop(self: ChepyCoreT, iterations: int, callback: Union[str, Callable], args: dict=..., workers: Union[int, None]=..., executor: Literal['thread', 'process']=...) -> ChepyCoreT: ...
+    def loop_list(self: ChepyCoreT, callback: Union[str, Callable], args: dict=..., workers: Union[int, None]=..., executor: Literal['thread', 'process']=...) -> ChepyCoreT: ...
+    def loop_dict(self: ChepyCoreT, keys: list, callback: Union[str, Callable], args: dict=..., workers: Union[int, None]=..., executor: Literal['thread', 'process']=...) -> ChepyCoreT: ...
     def debug(self: ChepyCoreT, verbose: bool=...) -> ChepyCoreT: ...
     def reset(self: ChepyCoreT) -> ChepyCoreT: ...
     def print(self: ChepyCoreT) -> ChepyCoreT: ...
@@ -88,5 +138,5 @@ class ChepyCore:
     def get_register(self: ChepyCoreT, key: str) -> Union[str, bytes]: ...
     def set_register(self: ChepyCoreT, key: str, val: Union[str, bytes]) -> ChepyCoreT: ...
     def dump_json(self: ChepyCoreT) -> ChepyCoreT: ...
-    def walk_dir(self: ChepyCoreT) -> ChepyCoreT: ...
-    def search_dir(self: ChepyCoreT, pattern: Union[str, bytes]) -> ChepyCoreT: ...
+    def walk_dir(self: ChepyCoreT, include: Union[str, List[str]] = ..., exclude: Union[str, List[str], None] = ..., max_size: Union[int, None] = ..., lazy: bool = ..., files_only: bool = ...) -> ChepyCoreT: ...
+    def search_dir(self: ChepyCoreT, pattern: Union[str, bytes], include: Union[str, List[str]] = ..., exclude: Union[str, List[str], None] = ..., max_size: Union[int, None] = ..., skip_binary: bool = ..., offsets: bool = ..., workers: Union[int, None] = ...) -> ChepyCoreT: ...
@@ -1,11 +1,15 @@
 import binascii
-import statistics
 from typing import TypeVar, Union, Literal
 from functools import reduce as functools_reduce
 
+import lazy_import
+
 from ..core import ChepyCore, ChepyDecorators
 from .exceptions import StateNotList
 from .internal.helpers import detect_delimiter
+from .internal.storage import Translate
+
+statistics = lazy_import.lazy_module("statistics")
 
 
 AritmeticLogicT = TypeVar("AritmeticLogicT", bound="AritmeticLogic")
@@ -45,15 +49,13 @@ class AritmeticLogic(ChepyCore):
                 )
                 return self
 
-        hold = b""
-        for char_code in self._convert_to_bytes():
-            # Add the key to the integer and take the result modulo 255
-            result_code = (char_code + key_int) % 256
+        # Add the key to every byte and take the result modulo 256
+        add = Translate.from_function(lambda char_code: (char_code + key_int) % 256)
+        if self._is_stream():
+            self.state = self.state.pipe(add)
+            return self
 
-            # Convert the result back to a byte
-            hold += result_code.to_bytes(1, byteorder="big")
-
-        self.state = hold.decode()
+        self.state = add.update(self._convert_to_bytes()).decode()
         return self
 
     @ChepyDecorators.call_stack
@@ -104,15 +106,13 @@ class AritmeticLogic(ChepyCore):
                 )
                 return self
 
-        hold = b""
-        for char_code in self._convert_to_bytes():
-            # Add the key to the integer and take the result modulo 255
-            result_code = (char_code - key_int) % 256
-
-            # Convert the result back to a byte
-            hold += result_code.to_bytes(1, byteorder="big")
+        # Subtract the key from every byte and take the result modulo 256
+        sub = Translate.from_function(lambda char_code: (char_code - key_int) % 256)
+        if self._is_stream():
+            self.state = self.state.pipe(sub)
+            return self
 
-        self.state = hold
+        self.state = sub.update(self._convert_to_bytes())
         return self
 
     @ChepyDecorators.call_stack
@@ -3,8 +3,11 @@ from typing import TypeVar
 import json
 import random
 
-import pydash
+import lazy_import
 import regex as re
+
+pydash = lazy_import.lazy_module("pydash")
+
 from ..core import ChepyCore, ChepyDecorators
 
 CodeTidyT = TypeVar("CodeTidyT", bound="CodeTidy")
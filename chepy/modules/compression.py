@@ -10,6 +10,7 @@ import stat
 from typing import TypeVar
 import lazy_import
 from .internal.helpers import LZ77Compressor
+from .internal.storage import Transform
 
 LZ4 = lazy_import.lazy_module("lz4.frame")
 
@@ -305,6 +306,24 @@ class Compression(ChepyCore):
         """
         mf = io.BytesIO()
         g = gzip.GzipFile(filename=file_name, mode="w", fileobj=mf)
+        if self._is_stream():
+
+            def drain():
+                out = mf.getvalue()
+                mf.seek(0)
+                mf.truncate()
+                return out
+
+            def update(chunk):
+                g.write(chunk)
+                return drain()
+
+            def flush():
+                g.close()
+                return drain()
+
+            self.state = self.state.pipe(Transform(update, flush))
+            return self
         g.write(self._convert_to_bytes())
         g.close()
         self.state = mf.getvalue()
@@ -317,6 +336,10 @@ class Compression(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
+        if self._is_stream():
+            d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            self.state = self.state.pipe(Transform(d.decompress, d.flush))
+            return self
         self.state = gzip.decompress(self._convert_to_bytes())
         return self
 
@@ -334,6 +357,10 @@ class Compression(ChepyCore):
             We can now write this as a bz2 file with
             >>> c.write("/path/to/file.bz2", as_binary=True)
         """
+        if self._is_stream():
+            b = bz2.BZ2Compressor()
+            self.state = self.state.pipe(Transform(b.compress, b.flush))
+            return self
         mf = io.BytesIO()
         b = bz2.BZ2File(mf, mode="w")
         b.write(self._convert_to_bytes())
@@ -348,6 +375,10 @@ class Compression(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
+        if self._is_stream():
+            b = bz2.BZ2Decompressor()
+            self.state = self.state.pipe(Transform(b.decompress))
+            return self
         self.state = bz2.decompress(self._convert_to_bytes())
         return self
 
@@ -365,6 +396,10 @@ class Compression(ChepyCore):
             >>> Chepy("some text").zlib_compress().to_hex().o
             b"78da2bcecf4d552849ad28010011e8039a"
         """
+        if self._is_stream():
+            z = zlib.compressobj(level)
+            self.state = self.state.pipe(Transform(z.compress, z.flush))
+            return self
         self.state = zlib.compress(self._convert_to_bytes(), level=level)
         return self
 
@@ -382,6 +417,10 @@ class Compression(ChepyCore):
             >>> c.out
             b"some text"
         """
+        if self._is_stream():
+            z = zlib.decompressobj()
+            self.state = self.state.pipe(Transform(z.decompress, z.flush))
+            return self
         self.state = zlib.decompress(self._convert_to_bytes())
         return self
 
@@ -392,6 +431,10 @@ class Compression(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
+        if self._is_stream():
+            x = lzma.LZMACompressor()
+            self.state = self.state.pipe(Transform(x.compress, x.flush))
+            return self
         self.state = lzma.compress(self._convert_to_bytes())
         return self
 
@@ -402,6 +445,10 @@ class Compression(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
+        if self._is_stream():
+            x = lzma.LZMADecompressor()
+            self.state = self.state.pipe(Transform(x.decompress))
+            return self
         self.state = lzma.decompress(self._convert_to_bytes())
         return self
 
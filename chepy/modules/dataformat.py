@@ -3,7 +3,6 @@ import binascii
 import base64
 import codecs
 import html
-import base58
 import json
 import struct
 import pickle
@@ -13,11 +12,9 @@ import quopri
 import io
 import csv
 from six import indexbytes, int2byte, unichr
-import sqlite3
 import collections
 from random import randint
 import regex as re
-from .internal.constants import Encoding, Base65536
 from .internal.helpers import (
     detect_delimiter,
     Rotate,
@@ -28,10 +25,18 @@ from .internal.helpers import (
     _Base64,
     expand_alpha_range,
 )
+from .internal.storage import (
+    HexEncode,
+    HexDecode,
+    Base64Encode,
+    Base64Decode,
+    Translate,
+)
 
 yaml = lazy_import.lazy_module("yaml")
+base58 = lazy_import.lazy_module("base58")
+hexdump = lazy_import.lazy_module("hexdump")
 import regex as re
-import hexdump
 from ast import literal_eval
 from typing import TypeVar, Union, List, Literal
 from urllib.parse import quote_plus as _urllib_quote_plus
@@ -39,10 +44,11 @@ from urllib.parse import unquote_plus as _urllib_unquote_plus
 
 crypto_number = lazy_import.lazy_module("Crypto.Util.number")
 msgpack = lazy_import.lazy_module("msgpack")
+sqlite3 = lazy_import.lazy_module("sqlite3")
+constants = lazy_import.lazy_module("chepy.modules.internal.constants")
+rison = lazy_import.lazy_module("chepy.modules.internal.rison")
 
 from ..core import ChepyCore, ChepyDecorators
-from chepy.modules.internal.constants import Encoding
-import chepy.modules.internal.rison as rison
 
 DataFormatT = TypeVar("DataFormatT", bound="DataFormat")
 
@@ -403,6 +409,7 @@ class DataFormat(ChepyCore):
             Chepy: The Chepy object.
         """
         bindata = self._convert_to_bytes()
+        alphabet = constants.Encoding.BASE91_ALPHABET
         b = 0
         n = 0
         out = ""
@@ -419,13 +426,11 @@ class DataFormat(ChepyCore):
                     v = b & 16383
                     b >>= 14
                     n -= 14
-                out += (
-                    Encoding.BASE91_ALPHABET[v % 91] + Encoding.BASE91_ALPHABET[v // 91]
-                )
+                out += alphabet[v % 91] + alphabet[v // 91]
         if n:
-            out += Encoding.BASE91_ALPHABET[b % 91]
+            out += alphabet[b % 91]
             if n > 7 or b > 90:
-                out += Encoding.BASE91_ALPHABET[b // 91]
+                out += alphabet[b // 91]
         self.state = out
         return self
 
@@ -438,7 +443,8 @@ class DataFormat(ChepyCore):
             Chepy: The Chepy object.
         """
         encoded_str = self._convert_to_str()
-        decode_table = dict((v, k) for k, v in enumerate(Encoding.BASE91_ALPHABET))
+        alphabet = constants.Encoding.BASE91_ALPHABET
+        decode_table = dict((v, k) for k, v in enumerate(alphabet))
         v = -1
         b = 0
         n = 0
@@ -533,7 +539,6 @@ class DataFormat(ChepyCore):
             >>> Chepy("Some data").to_base64(custom=custom).o
             b'IqxhNG/YMLFV'
         """
-        data = self._convert_to_bytes()
         alphabet = alphabet.strip()
 
         char_set = expand_alpha_range(
@@ -544,6 +549,11 @@ class DataFormat(ChepyCore):
                 "Invalid base64 chars. Should be 63-66 chars. " + str(len(char_set))
             )
 
+        if self._is_stream() and len(char_set) in (64, 65):
+            self.state = self.state.pipe(Base64Encode(char_set))
+            return self
+
+        data = self._convert_to_bytes()
         self.state = _Base64.encode_base64(data, alphabet=char_set)
         return self
 
@@ -581,6 +591,10 @@ class DataFormat(ChepyCore):
                 "Invalid base64 chars. Should be 63-65 chars. " + str(len(char_set))
             )
 
+        if self._is_stream() and len(char_set) in (64, 65):
+            self.state = self.state.pipe(Base64Decode(char_set, remove_non_alpha))
+            return self
+
         data = self._convert_to_str()
 
         if remove_non_alpha:
@@ -627,7 +641,9 @@ class DataFormat(ChepyCore):
             >>> Chepy("AAA").to_hex().out.decode()
             "414141"
         """
-        if delimiter == "":
+        if self._is_stream():
+            self.state = self.state.pipe(HexEncode(delimiter))
+        elif delimiter == "":
             self.state = binascii.hexlify(self._convert_to_bytes())
         else:
             self.state = binascii.hexlify(self._convert_to_bytes(), sep=delimiter)
@@ -654,6 +670,12 @@ class DataFormat(ChepyCore):
             >>> Chepy("414141").from_hex().out
             b"AAA"
         """
+        if self._is_stream() and not join_by:
+            self.state = self.state.pipe(
+                HexDecode(self._str_to_bytes(replace) if replace else None)
+            )
+            return self
+
         data = self._convert_to_bytes()
         if replace is not None:
             replace = self._str_to_bytes(replace)
@@ -1180,7 +1202,7 @@ class DataFormat(ChepyCore):
                 hold += d
                 continue
             if format == "named":
-                hold += Encoding.BYTE_TO_ENTITY.get(ord(d), f"&#{ord(d)};")
+                hold += constants.Encoding.BYTE_TO_ENTITY.get(ord(d), f"&#{ord(d)};")
             elif format == "hex":
                 hold += f"&#x{d.encode().hex()};"
             elif format == "numeric":
@@ -1255,10 +1277,10 @@ class DataFormat(ChepyCore):
         """
         data = self._convert_to_str()
         final = dict()
-        for enc in Encoding.py_encodings:
+        for enc in constants.Encoding.py_encodings:
             final[enc] = data.encode(enc, errors="backslashreplace")
 
-        for text_enc in Encoding.py_text_encodings:
+        for text_enc in constants.Encoding.py_text_encodings:
             try:
                 final[text_enc] = codecs.encode(data, text_enc)
             except TypeError:
@@ -1298,10 +1320,10 @@ class DataFormat(ChepyCore):
         """
         data = self._convert_to_bytes()
         final = dict()
-        for enc in Encoding.py_encodings:
+        for enc in constants.Encoding.py_encodings:
             final[enc] = data.decode(enc, errors="backslashreplace")
 
-        for text_enc in Encoding.py_text_encodings:
+        for text_enc in constants.Encoding.py_text_encodings:
             try:
                 final[text_enc] = codecs.decode(
                     data, text_enc, errors="backslashreplace"
@@ -1333,7 +1355,7 @@ class DataFormat(ChepyCore):
             >>> Chepy("secret message").to_braille().o
             "⠎⠑⠉⠗⠑⠞⠀⠍⠑⠎⠎⠁⠛⠑"
         """
-        chars = dict(zip(Encoding.asciichars, Encoding.brailles))
+        chars = dict(zip(constants.Encoding.asciichars, constants.Encoding.brailles))
         self.state = "".join(list(chars.get(c.lower()) for c in self.state))
         return self
 
@@ -1348,7 +1370,7 @@ class DataFormat(ChepyCore):
             >>> Chepy("⠎⠑⠉⠗⠑⠞⠀⠍⠑⠎⠎⠁⠛⠑").from_braille().o
             "secret message"
         """
-        chars = dict(zip(Encoding.brailles, Encoding.asciichars))
+        chars = dict(zip(constants.Encoding.brailles, constants.Encoding.asciichars))
         self.state = "".join(list(chars.get(c.lower()) for c in self.state))
         return self
 
@@ -1374,7 +1396,7 @@ class DataFormat(ChepyCore):
         Returns:
             Chepy: The Chepy object
         """
-        nato_chars = Encoding.NATO_CONSTANTS_DICT
+        nato_chars = constants.Encoding.NATO_CONSTANTS_DICT
         hold = []
         data: str = self._convert_to_str()
         for d in data:
@@ -1402,7 +1424,7 @@ class DataFormat(ChepyCore):
         if delimiter is None:
             delimiter = detect_delimiter(data)
         data = data.split(delimiter)
-        d = {v: k for k, v in Encoding.NATO_CONSTANTS_DICT.items()}
+        d = {v: k for k, v in constants.Encoding.NATO_CONSTANTS_DICT.items()}
         self.state = join_by.join([d.get(p, p) for p in data])
         return self
 
@@ -1550,7 +1572,7 @@ class DataFormat(ChepyCore):
                 return replace_space
             if c.isalpha():
                 c = c.upper()
-                char_set = Encoding.LEETCODE[ord(c) - ord("A")]
+                char_set = constants.Encoding.LEETCODE[ord(c) - ord("A")]
                 new_c = char_set[randint(0, len(char_set) - 1)]
                 return new_c
             else:
@@ -1707,7 +1729,7 @@ class DataFormat(ChepyCore):
         """
         hold = ""
         for c in list(self._convert_to_str()):
-            hold += chr(Encoding.wingdings.get(c, ord(c)))
+            hold += chr(constants.Encoding.wingdings.get(c, ord(c)))
         self.state = hold.encode()
         return self
 
@@ -1718,7 +1740,7 @@ class DataFormat(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        conv = {v: k for k, v in Encoding.wingdings.items()}
+        conv = {v: k for k, v in constants.Encoding.wingdings.items()}
         hold = ""
         for i in list(self._convert_to_str()):
             hold += conv.get(ord(i), i)
@@ -1923,9 +1945,9 @@ class DataFormat(ChepyCore):
         for s in self._convert_to_str():
             if s in string.ascii_letters:
                 if complete:
-                    hold.append(Encoding.BACON_26.get(s.upper()))
+                    hold.append(constants.Encoding.BACON_26.get(s.upper()))
                 else:  # pragma: no cover
-                    hold.append(Encoding.BACON_24.get(s.upper()))
+                    hold.append(constants.Encoding.BACON_24.get(s.upper()))
         updated = []
         for h in hold:
             if invert:  # pragma: no cover
@@ -1958,9 +1980,10 @@ class DataFormat(ChepyCore):
         """
         split_by = self._bytes_to_str(split_by)
         if complete:
-            mapping = {v: k for k, v in Encoding.BACON_26.items()}
+            mapping = {v: k for k, v in constants.Encoding.BACON_26.items()}
         else:
-            mapping = {v: k for k, v in Encoding.BACON_26.items()}  # pragma: no cover
+            bacon = constants.Encoding.BACON_26  # pragma: no cover
+            mapping = {v: k for k, v in bacon.items()}  # pragma: no cover
         data = self.state
         if not isinstance(self.state, list):  # pragma: no cover
             data = self._convert_to_str().split(split_by)
@@ -1986,7 +2009,7 @@ class DataFormat(ChepyCore):
         """
         hold = ""
         for s in self._convert_to_str():
-            hold += Encoding.UPSIDE_DOWN.get(s, s)
+            hold += constants.Encoding.UPSIDE_DOWN.get(s, s)
         if reverse:
             self.state = hold[::-1]
         else:
@@ -2003,7 +2026,7 @@ class DataFormat(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        encoding = {v: k for k, v in Encoding.UPSIDE_DOWN.items()}
+        encoding = {v: k for k, v in constants.Encoding.UPSIDE_DOWN.items()}
         hold = ""
         for s in self._convert_to_str():
             hold += encoding.get(s, s)
@@ -2117,6 +2140,15 @@ class DataFormat(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
+        if self._is_stream() and not carry:
+
+            def rotate(b):
+                for _ in range(radix):
+                    b = Rotate.rotate_right(b)
+                return b
+
+            self.state = self.state.pipe(Translate.from_function(rotate, widen=True))
+            return self
         r = Rotate(self._convert_to_bytes(), radix)
         if carry:
             self.state = r.rot_right_carry()
@@ -2135,6 +2167,15 @@ class DataFormat(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
+        if self._is_stream() and not carry:
+
+            def rotate(b):
+                for _ in range(radix):
+                    b = Rotate.rotate_left(b)
+                return b
+
+            self.state = self.state.pipe(Translate.from_function(rotate, widen=True))
+            return self
         r = Rotate(self._convert_to_bytes(), radix)
         if carry:
             self.state = r.rotate_left_carry()
@@ -2179,7 +2220,7 @@ class DataFormat(ChepyCore):
             code_point = ord(ch)
             b1 = code_point & ((1 << 8) - 1)
             try:
-                b2 = Base65536.B2[code_point - b1]
+                b2 = constants.Base65536.B2[code_point - b1]
             except KeyError:  # pragma: no cover
                 raise ValueError("Invalid base65536 code point: %d" % code_point)
             b = int2byte(b1) if b2 == -1 else int2byte(b1) + int2byte(b2)
@@ -2204,7 +2245,7 @@ class DataFormat(ChepyCore):
         for x in range(0, length, 2):
             b1 = indexbytes(data, x)
             b2 = indexbytes(data, x + 1) if x + 1 < length else -1
-            code_point = Base65536.BLOCK_START[b2] + b1
+            code_point = constants.Base65536.BLOCK_START[b2] + b1
             stream.write(unichr(code_point))
         self.state = stream.getvalue()
         return self
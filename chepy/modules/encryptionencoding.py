@@ -13,12 +13,13 @@ from .internal.ls47 import (
     decrypt_pad as _ls47_dec,
     derive_key as _derive_key,
 )
-from .internal.constants import Ciphers, Rabbit
 from .internal.helpers import detect_delimiter
 from .internal.helpers import Zeckendorf
+from .internal.storage import Translate, Xor
 
 import lazy_import
 
+constants = lazy_import.lazy_module("chepy.modules.internal.constants")
 pgpy = lazy_import.lazy_module("pgpy")
 
 
@@ -41,7 +42,6 @@ Fernet = lazy_import.lazy_callable("cryptography.fernet.Fernet")
 
 from ..core import ChepyCore, ChepyDecorators
 from ..extras.combinatons import hex_chars
-from .internal.constants import EncryptionConsts
 
 EncryptionEncodingT = TypeVar("EncryptionEncodingT", bound="EncryptionEncoding")
 
@@ -179,6 +179,20 @@ class EncryptionEncoding(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
+        if self._is_stream():
+
+            def rotate(b):
+                if rotate_lower and 97 <= b <= 122:
+                    return (b - 97 + amount) % 26 + 97
+                if rotate_upper and 65 <= b <= 90:
+                    return (b - 65 + amount) % 26 + 65
+                if rotate_numbers and 48 <= b <= 57:
+                    return (b - 48 + amount) % 10 + 48
+                return b
+
+            self.state = self.state.pipe(Translate.from_function(rotate))
+            return self
+
         text = self._convert_to_str()
         result = []
         for char in text:
@@ -210,6 +224,14 @@ class EncryptionEncoding(ChepyCore):
             >>> Chepy("some").rot_47().out
             b"D@>6"
         """
+        if self._is_stream():
+            self.state = self.state.pipe(
+                Translate.from_function(
+                    lambda b: (b - 33 + rotation) % 94 + 33 if 33 <= b <= 126 else b
+                )
+            )
+            return self
+
         decoded_string = ""
         for char in self._convert_to_str():
             if ord(char) >= 33 and ord(char) <= 126:
@@ -359,6 +381,14 @@ class EncryptionEncoding(ChepyCore):
                 if int(key) < 0 or int(key) > 255:
                     raise ValueError("Invalid decimal key")  # pragma: no cover
 
+            if self._is_stream():
+                if key_type == "decimal":
+                    key = bytes([int(key)])
+                else:
+                    key = binascii.unhexlify(key)
+                self.state = self.state.pipe(Xor(key))
+                return self
+
             _s = self._convert_to_bytes()
 
             if key_type == "decimal":
@@ -1196,7 +1226,7 @@ class EncryptionEncoding(ChepyCore):
         input_str = self._convert_to_str()
         alphabet = "abcdefghijklmnopqrstuvwxyz"
         key = key.lower()
-        output = ""
+        output = []
         fail = 0
 
         if not key:
@@ -1213,12 +1243,12 @@ class EncryptionEncoding(ChepyCore):
                 input_index = alphabet.index(input_char)
                 encoded_index = (key_index + input_index) % 26
                 encoded_char = alphabet[encoded_index]
-                output += encoded_char.upper() if is_upper else encoded_char
+                output.append(encoded_char.upper() if is_upper else encoded_char)
             else:
-                output += input_str[i]
+                output.append(input_str[i])
                 fail += 1
 
-        self.state = output
+        self.state = "".join(output)
         return self
 
     @ChepyDecorators.call_stack
@@ -1237,7 +1267,7 @@ class EncryptionEncoding(ChepyCore):
         """
         input_str = self._convert_to_str()
         alphabet = "abcdefghijklmnopqrstuvwxyz"
-        output = ""
+        output = []
         fail = 0
         key = key.lower()
 
@@ -1257,12 +1287,12 @@ class EncryptionEncoding(ChepyCore):
                     alphabet
                 )
                 encoded_char = alphabet[encoded_index]
-                output += encoded_char.upper() if is_upper else encoded_char
+                output.append(encoded_char.upper() if is_upper else encoded_char)
             else:
-                output += input_str[i]
+                output.append(input_str[i])
                 fail += 1
 
-        self.state = output
+        self.state = "".join(output)
         return self
 
     @ChepyDecorators.call_stack
@@ -1316,7 +1346,7 @@ class EncryptionEncoding(ChepyCore):
         key = "ZYXWVUTSRQPONMLKJIHGFEDCBA"
         data = self._convert_to_str()
         ret = ""
-        arr = Ciphers.ATBASH
+        arr = constants.Ciphers.ATBASH
         for c in data:
             if c.isalpha():
                 if c.islower():
@@ -1349,7 +1379,7 @@ class EncryptionEncoding(ChepyCore):
             Chepy: The Chepy object.
         """
         encode = ""
-        morse_code_dict = EncryptionConsts.MORSE_CODE_DICT
+        morse_code_dict = constants.EncryptionConsts.MORSE_CODE_DICT
         for k, v in morse_code_dict.items():
             morse_code_dict[k] = v.replace(".", dot).replace("-", dash)
         for word in self._convert_to_str().split():
@@ -1379,7 +1409,7 @@ class EncryptionEncoding(ChepyCore):
             Chepy: The Chepy object.
         """
         decode = ""
-        morse_code_dict = EncryptionConsts.MORSE_CODE_DICT
+        morse_code_dict = constants.EncryptionConsts.MORSE_CODE_DICT
         for k, v in morse_code_dict.items():
             morse_code_dict[k] = v.replace(".", dot).replace("-", dash)
 
@@ -1718,7 +1748,7 @@ class EncryptionEncoding(ChepyCore):
         output = ""
         count = 0
 
-        polybius = Ciphers.gen_polybius_square(keyword_str)
+        polybius = constants.Ciphers.gen_polybius_square(keyword_str)
 
         for letter in self._convert_to_str().replace("J", "I"):
             alp_ind = letter.upper() in alpha
@@ -1778,7 +1808,7 @@ class EncryptionEncoding(ChepyCore):
         count = 0
         trans = ""
 
-        polybius = Ciphers.gen_polybius_square(keyword_str)
+        polybius = constants.Ciphers.gen_polybius_square(keyword_str)
 
         for letter in self._convert_to_str().replace("J", "I"):
             alp_ind = letter.upper() in alpha
@@ -1821,9 +1851,9 @@ class EncryptionEncoding(ChepyCore):
             Chepy: The Chepy object.
         """
         data = self._convert_to_str()
-        root = Ciphers.build_huffman_tree(data)
+        root = constants.Ciphers.build_huffman_tree(data)
         huffman_codes = {}
-        Ciphers.build_huffman_codes(root, "", huffman_codes)
+        constants.Ciphers.build_huffman_codes(root, "", huffman_codes)
         encoded_data = "".join(huffman_codes[char] for char in data)
         self.state = {"encoded": encoded_data, "codes": huffman_codes}
         return self
@@ -1838,19 +1868,22 @@ class EncryptionEncoding(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        decoded_data = ""
+        decoded_data = []
         current_code = ""
+        # the first char of a code wins, like a scan of the codes in order
+        chars = {}
+        for char, code in huffman_codes.items():
+            chars.setdefault(code, char)
 
         encoded_data = self._convert_to_str()
         for bit in encoded_data:
             current_code += bit
-            for char, code in huffman_codes.items():
-                if code == current_code:
-                    decoded_data += char
-                    current_code = ""
-                    break
+            char = chars.get(current_code)
+            if char is not None:
+                decoded_data.append(char)
+                current_code = ""
 
-        self.state = decoded_data
+        self.state = "".join(decoded_data)
         return self
 
     @ChepyDecorators.call_stack
@@ -1909,7 +1942,7 @@ class EncryptionEncoding(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        self.state = Rabbit(key, iv).encrypt(self._convert_to_str())
+        self.state = constants.Rabbit(key, iv).encrypt(self._convert_to_str())
         return self
 
     @ChepyDecorators.call_stack
@@ -6,3 +6,9 @@ class StateNotList(Exception):  # pragma: no cover
 class StateNotDict(Exception):  # pragma: no cover
     def __init__(self, msg="State is not a dict", *args, **kwargs):
         super().__init__(msg, *args, **kwargs)
+
+
+class RecipeError(ValueError, AttributeError, TypeError):
+    """A recipe step names a method that does not exist, or passes arguments
+    the method does not take. It subclasses the AttributeError and TypeError
+    that running such a step raised before recipes were compiled."""
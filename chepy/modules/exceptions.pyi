@@ -5,3 +5,5 @@ class StateNotList(Exception):
 
 class StateNotDict(Exception):
     def __init__(self, msg: str = ..., *args: Any, **kwargs: Any) -> None: ...
+
+class RecipeError(ValueError, AttributeError, TypeError): ...
@@ -5,8 +5,7 @@ import lazy_import
 
 from typing import TypeVar, Union, Any
 
-from crccheck.crc import Crc8, Crc32, CrcArc
-from typing_extensions import Literal
+from typing import Literal
 
 HashingT = TypeVar("HashingT", bound="Hashing")
 
@@ -23,7 +22,8 @@ SHAKE256 = lazy_import.lazy_module("Crypto.Hash.SHAKE256")
 RIPEMD = lazy_import.lazy_module("Crypto.Hash.RIPEMD")
 BLAKE2s = lazy_import.lazy_module("Crypto.Hash.BLAKE2s")
 BLAKE2b = lazy_import.lazy_module("Crypto.Hash.BLAKE2b")
-import passlib.hash
+passlib_registry = lazy_import.lazy_module("passlib.registry")
+crc = lazy_import.lazy_module("crccheck.crc")
 
 # from Crypto.Protocol.KDF import PBKDF2
 KDF = lazy_import.lazy_module("Crypto.Protocol.KDF")
@@ -54,7 +54,7 @@ class Hashing(ChepyCore):
             >>> Chepy("A").sha1().out
             "6dcd4ce23d88e2ee9568ba546c007c63d9131c1b"
         """
-        self.state = hashlib.sha1(self._convert_to_bytes()).hexdigest()
+        self.state = self._update_hash(hashlib.sha1()).hexdigest()
         return self
 
     @ChepyDecorators.call_stack
@@ -68,7 +68,7 @@ class Hashing(ChepyCore):
             >>> Chepy("A").sha2_256().out
             "559aead08264d5795d3909718cdd05abd49572e84fe55590eef31a88a08fdffd"
         """
-        self.state = hashlib.sha256(self._convert_to_bytes()).hexdigest()
+        self.state = self._update_hash(hashlib.sha256()).hexdigest()
         return self
 
     @ChepyDecorators.call_stack
@@ -82,7 +82,7 @@ class Hashing(ChepyCore):
             >>> Chepy("A").sha2_512().out
             21b4f4bd9e64ed355c3eb676a28ebedaf6d8f17bdc365995b319097153044080516bd083bfcce66121a3072646994c8430cc382b8dc543e84880183bf856cff5
         """
-        self.state = hashlib.sha512(self._convert_to_bytes()).hexdigest()
+        self.state = self._update_hash(hashlib.sha512()).hexdigest()
         return self
 
     @ChepyDecorators.call_stack
@@ -96,7 +96,7 @@ class Hashing(ChepyCore):
             Chepy: The Chepy object.
         """
         assert truncate in [256, 224], "Valid truncates are 256, 224"
-        h = SHA512.new(self._convert_to_bytes(), truncate=str(truncate))
+        h = self._update_hash(SHA512.new(truncate=str(truncate)))
         self.state = h.hexdigest()
         return self
 
@@ -107,7 +107,7 @@ class Hashing(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        self.state = hashlib.sha384(self._convert_to_bytes()).hexdigest()
+        self.state = self._update_hash(hashlib.sha384()).hexdigest()
         return self
 
     @ChepyDecorators.call_stack
@@ -121,7 +121,7 @@ class Hashing(ChepyCore):
             >>> Chepy("A").sha2_224().out
             "5cfe2cddbb9940fb4d8505e25ea77e763a0077693dbb01b1a6aa94f2"
         """
-        self.state = hashlib.sha224(self._convert_to_bytes()).hexdigest()
+        self.state = self._update_hash(hashlib.sha224()).hexdigest()
         return self
 
     @ChepyDecorators.call_stack
@@ -131,7 +131,7 @@ class Hashing(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        self.state = hashlib.sha3_512(self._convert_to_bytes()).hexdigest()
+        self.state = self._update_hash(hashlib.sha3_512()).hexdigest()
         return self
 
     @ChepyDecorators.call_stack
@@ -141,7 +141,7 @@ class Hashing(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        self.state = hashlib.sha3_256(self._convert_to_bytes()).hexdigest()
+        self.state = self._update_hash(hashlib.sha3_256()).hexdigest()
         return self
 
     @ChepyDecorators.call_stack
@@ -151,7 +151,7 @@ class Hashing(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        self.state = hashlib.sha3_384(self._convert_to_bytes()).hexdigest()
+        self.state = self._update_hash(hashlib.sha3_384()).hexdigest()
         return self
 
     @ChepyDecorators.call_stack
@@ -161,7 +161,7 @@ class Hashing(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        self.state = hashlib.sha3_224(self._convert_to_bytes()).hexdigest()
+        self.state = self._update_hash(hashlib.sha3_224()).hexdigest()
         return self
 
     @ChepyDecorators.call_stack
@@ -171,8 +171,7 @@ class Hashing(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        h = MD2.new()
-        h.update(self._convert_to_bytes())
+        h = self._update_hash(MD2.new())
         self.state = h.hexdigest()
         return self
 
@@ -183,8 +182,7 @@ class Hashing(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        h = MD4.new()
-        h.update(self._convert_to_bytes())
+        h = self._update_hash(MD4.new())
         self.state = h.hexdigest()
         return self
 
@@ -199,8 +197,7 @@ class Hashing(ChepyCore):
             >>> Chepy("A").md5().out
             "7fc56270e7a70fa81a5935b72eacbe29"
         """
-        h = MD5.new()
-        h.update(self._convert_to_bytes())
+        h = self._update_hash(MD5.new())
         self.state = h.hexdigest()
         return self
 
@@ -211,8 +208,7 @@ class Hashing(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        h = keccak.new(digest_bits=512)
-        h.update(self._convert_to_bytes())
+        h = self._update_hash(keccak.new(digest_bits=512))
         self.state = h.hexdigest()
         return self
 
@@ -223,8 +219,7 @@ class Hashing(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        h = keccak.new(digest_bits=384)
-        h.update(self._convert_to_bytes())
+        h = self._update_hash(keccak.new(digest_bits=384))
         self.state = h.hexdigest()
         return self
 
@@ -235,8 +230,7 @@ class Hashing(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        h = keccak.new(digest_bits=256)
-        h.update(self._convert_to_bytes())
+        h = self._update_hash(keccak.new(digest_bits=256))
         self.state = h.hexdigest()
         return self
 
@@ -247,8 +241,7 @@ class Hashing(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        h = keccak.new(digest_bits=224)
-        h.update(self._convert_to_bytes())
+        h = self._update_hash(keccak.new(digest_bits=224))
         self.state = h.hexdigest()
         return self
 
@@ -265,8 +258,7 @@ class Hashing(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        h = SHAKE256.new()
-        h.update(self._convert_to_bytes())
+        h = self._update_hash(SHAKE256.new())
         self.state = binascii.hexlify(h.read(size))
         return self
 
@@ -283,8 +275,7 @@ class Hashing(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        h = SHAKE128.new()
-        h.update(self._convert_to_bytes())
+        h = self._update_hash(SHAKE128.new())
         self.state = binascii.hexlify(h.read(size))
         return self
 
@@ -295,8 +286,7 @@ class Hashing(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        h = RIPEMD.new()
-        h.update(self._convert_to_bytes())
+        h = self._update_hash(RIPEMD.new())
         self.state = h.hexdigest()
         return self
 
@@ -322,8 +312,7 @@ class Hashing(ChepyCore):
             160,
             128,
         ], "Valid bits are 512, 384, 256, 160, 128"
-        h = BLAKE2b.new(digest_bits=bits, key=key.encode())
-        h.update(self._convert_to_bytes())
+        h = self._update_hash(BLAKE2b.new(digest_bits=bits, key=key.encode()))
         self.state = h.hexdigest()
         return self
 
@@ -343,8 +332,7 @@ class Hashing(ChepyCore):
             "4e33cc702e9d08c28a5e9691f23bc66a"
         """
         assert bits in [256, 160, 128], "Valid bits are 256, 160, 128"
-        h = BLAKE2s.new(digest_bits=bits, key=key.encode())
-        h.update(self._convert_to_bytes())
+        h = self._update_hash(BLAKE2s.new(digest_bits=bits, key=key.encode()))
         self.state = h.hexdigest()
         return self
 
@@ -355,7 +343,7 @@ class Hashing(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        self.state = Crc8().process(self._convert_to_bytes()).finalhex()
+        self.state = crc.Crc8().process(self._convert_to_bytes()).finalhex()
         return self
 
     @ChepyDecorators.call_stack
@@ -365,7 +353,7 @@ class Hashing(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        self.state = CrcArc().process(self._convert_to_bytes()).finalhex()
+        self.state = crc.CrcArc().process(self._convert_to_bytes()).finalhex()
         return self
 
     @ChepyDecorators.call_stack
@@ -379,7 +367,7 @@ class Hashing(ChepyCore):
             >>> Chepy("a").crc32_checksum().out
             "e8b7be43"
         """
-        self.state = Crc32().process(self._convert_to_bytes()).finalhex()
+        self.state = crc.Crc32().process(self._convert_to_bytes()).finalhex()
         return self
 
     @ChepyDecorators.call_stack
@@ -412,13 +400,13 @@ class Hashing(ChepyCore):
                 raise TypeError("key has to be bytes")
 
         if digest == "md5":
-            h = hmac.new(key, self._convert_to_bytes(), hashlib.md5)
+            h = self._update_hash(hmac.new(key, digestmod=hashlib.md5))
         elif digest == "sha1":
-            h = hmac.new(key, self._convert_to_bytes(), hashlib.sha1)
+            h = self._update_hash(hmac.new(key, digestmod=hashlib.sha1))
         elif digest == "sha256":
-            h = hmac.new(key, self._convert_to_bytes(), hashlib.sha256)
+            h = self._update_hash(hmac.new(key, digestmod=hashlib.sha256))
         elif digest == "sha512":
-            h = hmac.new(key, self._convert_to_bytes(), hashlib.sha512)
+            h = self._update_hash(hmac.new(key, digestmod=hashlib.sha512))
         else:  # pragma: no cover
             raise TypeError(
                 "Currently supported digests are md5, sha1, sha256 and sha512"
@@ -570,7 +558,7 @@ class Hashing(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        self.state = getattr(passlib.hash, format).hash(
+        self.state = passlib_registry.get_crypt_handler(format).hash(
             self._convert_to_bytes(), **kwargs
         )
         return self
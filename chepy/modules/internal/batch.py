@@ -0,0 +1,406 @@
+import hashlib
+import json
+import os
+import time
+from concurrent import futures
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, NamedTuple, TextIO, Union
+
+from chepy.__version__ import __version__
+
+from .files import read_state, walk_files
+from .paths import compile_path
+from .storage import _unlink
+from .workers import BatchResult, run_recipe_batch
+
+#: Record formats of the stdin batch mode and the delimiter of their records
+DELIMITERS = {"line": b"\n", "nul": b"\0", "ndjson": b"\n"}
+
+#: Largest block read from the input stream at once
+BLOCK_SIZE = 1 << 20
+
+#: Name of the file in the output directory of a directory batch that records
+#: the inputs that are up to date
+MANIFEST_NAME = ".chepy-batch.json"
+
+
+def iter_records(
+    stream: BinaryIO, delimiter: bytes = b"\n", block_size: int = BLOCK_SIZE
+) -> Iterator[bytes]:
+    """Split a binary stream into records without reading it whole. Records
+    are yielded as soon as their delimiter is read, and a trailing delimiter
+    does not start an empty record.
+
+    Args:
+        stream (BinaryIO): The stream
+        delimiter (bytes, optional): The record delimiter. Defaults to b"\\n".
+        block_size (int, optional): Largest block read at once. Defaults to 1MB.
+
+    Yields:
+        bytes: Every record without its delimiter
+    """
+    # read1 returns what is available instead of waiting for a full block
+    read = getattr(stream, "read1", stream.read)
+    pending = []
+    while True:
+        block = read(block_size)
+        if not block:
+            break
+        if delimiter not in block:
+            pending.append(block)
+            continue
+        records = block.split(delimiter)
+        if pending:
+            pending.append(records[0])
+            records[0] = b"".join(pending)
+        pending = [records.pop()]
+        yield from records
+    tail = b"".join(pending)
+    if tail:
+        yield tail
+
+
+class NdjsonField(object):
+    """Parse an NDJSON record and select the value the recipe runs on. It is
+    called by the batch workers, so the records are parsed in parallel.
+
+    Args:
+        field (Union[str, None], optional): A py style key path, like
+            `data.value`. Defaults to None, which selects the whole object.
+    """
+
+    def __init__(self, field: Union[str, None] = None):
+        self.field = field
+
+    def __call__(self, record: bytes) -> Any:
+        value = json.loads(record)
+        if self.field:
+            return compile_path(self.field).get(value)
+        return value
+
+
+def read_records(
+    stream: BinaryIO, records: str = "line", block_size: int = BLOCK_SIZE
+) -> Iterator[bytes]:
+    """Read the records of a stream in one of the `DELIMITERS` formats. Line
+    records lose a trailing carriage return, and blank NDJSON lines are
+    skipped.
+
+    Args:
+        stream (BinaryIO): The stream
+        records (str, optional): line, nul or ndjson. Defaults to "line".
+        block_size (int, optional): Largest block read at once. Defaults to 1MB.
+
+    Raises:
+        ValueError: If the format is not valid
+
+    Returns:
+        Iterator[bytes]: The records
+    """
+    if records not in DELIMITERS:
+        raise ValueError(
+            "records must be one of {}".format(", ".join(sorted(DELIMITERS)))
+        )
+    items = iter_records(stream, DELIMITERS[records], block_size)
+    if records == "line":
+        return (r[:-1] if r.endswith(b"\r") else r for r in items)
+    if records == "ndjson":
+        return (r for r in items if r.strip())
+    return items
+
+
+def encode_output(output: Any, records: str = "line") -> bytes:
+    """Encode the output of a record. NDJSON outputs are written as JSON
+    values, bytes are decoded as UTF-8 with undecodable bytes escaped.
+
+    Args:
+        output (Any): The output
+        records (str, optional): line, nul or ndjson. Defaults to "line".
+
+    Returns:
+        bytes: The encoded output
+    """
+    if records == "ndjson":
+        if isinstance(output, bytes):
+            output = output.decode("utf-8", "backslashreplace")
+        return json.dumps(output, default=str).encode()
+    if isinstance(output, bytes):
+        return output
+    return str(output).encode()
+
+
+def write_results(
+    results: Iterable[BatchResult],
+    out: BinaryIO,
+    err: BinaryIO,
+    records: str = "line",
+    encoded: bool = False,
+) -> int:
+    """Write the outputs of a batch as they arrive, followed by the delimiter
+    of the format. Failed records are written to `err` with their index.
+
+    Args:
+        results (Iterable[BatchResult]): The results
+        out (BinaryIO): The output stream
+        err (BinaryIO): The error stream
+        records (str, optional): line, nul or ndjson. Defaults to "line".
+        encoded (bool, optional): The outputs are already encoded with
+            `encode_output`. Defaults to False.
+
+    Returns:
+        int: Number of failed records
+    """
+    delimiter = DELIMITERS[records]
+    failed = 0
+    for result in results:
+        if result.error is not None:
+            failed += 1
+            err.write("{}: {}\n".format(result.index, result.error).encode())
+            continue
+        out.write(result.output if encoded else encode_output(result.output, records))
+        out.write(delimiter)
+    return failed
+
+
+def run_stream_batch(
+    cls: type,
+    recipe: str,
+    stream: BinaryIO,
+    out: BinaryIO,
+    err: BinaryIO,
+    records: str = "line",
+    field: Union[str, None] = None,
+    workers: int = 1,
+    ordered: bool = True,
+    chunksize: int = 64,
+) -> int:
+    """Run a recipe over every record of a stream and write the outputs as
+    they arrive. The recipe is compiled once, and once per worker process.
+
+    Args:
+        cls (type): The Chepy class
+        recipe (str): Path to the recipe file
+        stream (BinaryIO): The input stream
+        out (BinaryIO): The output stream
+        err (BinaryIO): The error stream
+        records (str, optional): line, nul or ndjson. Defaults to "line".
+        field (Union[str, None], optional): Key path of the NDJSON value the recipe
+            runs on. Defaults to None.
+        workers (int, optional): Number of processes. 1 runs the recipe in this
+            process. Defaults to 1.
+        ordered (bool, optional): Write outputs in input order. Defaults to True.
+        chunksize (int, optional): Records sent to a worker at once. Defaults to 64.
+
+    Raises:
+        ValueError: If the recipe or the format is not valid
+
+    Returns:
+        int: Number of failed records
+    """
+    pipeline = cls.compile_recipe(recipe)
+    loader = NdjsonField(field) if records == "ndjson" else None
+    results = run_recipe_batch(
+        pipeline,
+        read_records(stream, records),
+        workers,
+        chunksize,
+        ordered=ordered,
+        loader=loader,
+    )
+    return write_results(results, out, err, records)
+
+
+class FileResult(NamedTuple):
+    """The result of running a recipe on one file of a directory batch.
+
+    Args:
+        path (str): Path of the file relative to the input directory
+        seconds (float, optional): Time taken to read, run and write. Defaults to 0.0.
+        error (Union[str, None], optional): The error raised. Defaults to None.
+        skipped (bool, optional): The file is unchanged since the last run.
+            Defaults to False.
+    """
+
+    path: str
+    seconds: float = 0.0
+    error: Union[str, None] = None
+    skipped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def recipe_hash(pipeline) -> str:
+    """Hash of a compiled recipe and the Chepy version, which decides if the
+    outputs of an earlier directory batch are still valid.
+
+    Args:
+        pipeline (CompiledRecipe): The compiled recipe
+
+    Returns:
+        str: Hex digest
+    """
+    recipe = json.dumps([__version__, pipeline.recipe], sort_keys=True, default=str)
+    return hashlib.sha256(recipe.encode()).hexdigest()
+
+
+def _read_manifest(path: Path) -> Dict[str, list]:
+    try:
+        with open(str(path)) as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(str(tmp), "wb") as f:
+        f.write(data)
+    os.replace(str(tmp), str(path))
+
+
+def _run_file(pipeline, task: tuple) -> FileResult:
+    relative, source, target = task
+    start = time.perf_counter()
+    try:
+        output = pipeline(read_state(source)).o
+        target.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(target, encode_output(output))
+        error = None
+    except Exception as e:
+        error = "{}: {}".format(type(e).__name__, e)
+        # do not leave the output of an earlier run behind
+        _unlink(str(target))
+    return FileResult(relative, time.perf_counter() - start, error)
+
+
+# the compiled recipe of a directory batch worker, set by the pool initializer
+_dir_pipeline = None
+
+
+def _init_dir_worker(cls: type, recipe: list) -> None:
+    global _dir_pipeline
+    _dir_pipeline = cls.compile_recipe(recipe)
+
+
+def _run_worker_file(task: tuple) -> FileResult:
+    return _run_file(_dir_pipeline, task)
+
+
+def run_dir_batch(
+    cls: type,
+    recipe: str,
+    in_dir: Union[str, Path],
+    out_dir: Union[str, Path],
+    include: Union[str, Iterable[str], None] = "*",
+    workers: int = 1,
+    force: bool = False,
+) -> Iterator[FileResult]:
+    """Run a recipe on every file of a directory tree, and write the outputs
+    to the same relative paths under `out_dir`. Files whose size, modification
+    time and recipe hash match the last successful run are skipped, using a
+    manifest kept in `out_dir`. The manifest is saved even if the batch is
+    interrupted.
+
+    Args:
+        cls (type): The Chepy class
+        recipe (str): Path to the recipe file
+        in_dir (Union[str, Path]): The input directory
+        out_dir (Union[str, Path]): The output directory
+        include (Union[str, Iterable[str], None], optional): Glob patterns of the
+            files to run on. Defaults to "*".
+        workers (int, optional): Number of processes. 1 runs the recipe in this
+            process. Defaults to 1.
+        force (bool, optional): Run on every file, even unchanged ones. Defaults
+            to False.
+
+    Raises:
+        ValueError: If the recipe is not valid, or the directories are the same
+
+    Yields:
+        FileResult: The skipped files first, then every other file as it completes
+    """
+    pipeline = cls.compile_recipe(recipe)
+    digest = recipe_hash(pipeline)
+    in_dir = Path(in_dir).expanduser().resolve()
+    out_dir = Path(out_dir).expanduser().resolve()
+    if in_dir == out_dir:
+        raise ValueError("The input and output directories must differ")
+    # the output files are skipped when out_dir is inside in_dir, however the
+    # walk reaches them
+    nested = in_dir in out_dir.parents
+    manifest_path = out_dir / MANIFEST_NAME
+    previous = {} if force else _read_manifest(manifest_path)
+
+    # the new manifest only keeps the files seen by this run
+    manifest, stats, tasks = {}, {}, []
+    for source in walk_files(in_dir, include):
+        if nested and out_dir in Path(source).resolve().parents:
+            continue
+        relative = Path(source).relative_to(in_dir).as_posix()
+        target = out_dir / relative
+        stat = os.stat(source)
+        stats[relative] = [stat.st_mtime_ns, stat.st_size, digest]
+        if previous.get(relative) == stats[relative] and target.exists():
+            manifest[relative] = stats[relative]
+            yield FileResult(relative, skipped=True)
+        else:
+            tasks.append((relative, source, target))
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        if workers <= 1:
+            results = (_run_file(pipeline, task) for task in tasks)
+            for result in results:
+                if result.ok:
+                    manifest[result.path] = stats[result.path]
+                yield result
+            return
+        with futures.ProcessPoolExecutor(
+            workers, initializer=_init_dir_worker, initargs=(cls, pipeline.recipe)
+        ) as executor:
+            pending = [executor.submit(_run_worker_file, task) for task in tasks]
+            try:
+                for future in futures.as_completed(pending):
+                    result = future.result()
+                    if result.ok:
+                        manifest[result.path] = stats[result.path]
+                    yield result
+            finally:
+                for future in pending:
+                    future.cancel()
+    finally:
+        _write_atomic(manifest_path, json.dumps(manifest, indent=1).encode())
+
+
+def write_summary(results: Iterable[FileResult], out: TextIO, err: TextIO) -> int:
+    """Write the time taken by every file of a directory batch as it
+    completes, the error of every failed file, and the totals.
+
+    Args:
+        results (Iterable[FileResult]): The results of `run_dir_batch`
+        out (TextIO): The output stream
+        err (TextIO): The error stream
+
+    Returns:
+        int: Number of failed files
+    """
+    start = time.perf_counter()
+    done = failed = skipped = 0
+    for result in results:
+        if result.skipped:
+            skipped += 1
+        elif result.ok:
+            done += 1
+            out.write("{:10.3f}s  {}\n".format(result.seconds, result.path))
+        else:
+            failed += 1
+            err.write("{:>11}  {}: {}\n".format("failed", result.path, result.error))
+    out.write(
+        "{} done, {} failed, {} unchanged in {:.3f}s\n".format(
+            done, failed, skipped, time.perf_counter() - start
+        )
+    )
+    return failed
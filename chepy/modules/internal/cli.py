@@ -1,23 +1,382 @@
 import sys
+import bisect
+import copy
+import functools
 import inspect
+import itertools
+import json
+import os
 import regex as re
 import pprint
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Union
 
+import fire
+import pretty_errors  # noqa: F401
 from docstring_parser import parse as _parse_doc
 from prompt_toolkit.completion import Completer, Completion
+from prompt_toolkit.validation import ValidationError, Validator
 from prompt_toolkit import print_formatted_text
 from prompt_toolkit.styles import Style
 from prompt_toolkit.formatted_text import FormattedText
 
-from chepy import Chepy
-from chepy.config import ChepyConfig
+from chepy import Chepy, _config
+from chepy.__version__ import __version__
 from chepy.modules.internal.colors import yellow, red, yellow_background
 
 pprint.sorted = lambda x, key=None: x
 
 module = sys.modules[__name__]
 options = []
-config = ChepyConfig()
+errors = []
+config = _config
+
+#: Number of commands that cli_go_back can undo
+UNDO_STEPS = 50
+
+#: Memory the undo history may hold. The oldest snapshots are dropped beyond
+#: it, but the last command can always be undone
+UNDO_BYTES = 256 * 1024 * 1024
+
+_MUTABLE = (bytearray, list, dict, set)
+
+
+def _sizeof(value: Any) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        items = itertools.chain(value.keys(), value.values())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        items = value
+    else:
+        return size
+    return size + sum(_sizeof(item) for item in items)
+
+# the method index of the session and its sorted method names
+_methods = None
+_method_names = []
+
+
+class ReplSession(object):
+    """The live Chepy object of the interactive prompt. Every command is
+    applied to it with fire, instead of replaying the whole history, and a
+    snapshot of its states, buffers, registers and recipe is kept so a command
+    can be undone. Commands that change nothing are not kept, and a failed
+    command restores the snapshot.
+
+    Snapshots are copy on write. Bytes and str values are shared with the
+    object, and mutable values like lists are copied deeply, so methods that
+    change them in place can be undone too, unless they are equal to the copy
+    in the previous snapshot, which is then shared. The oldest snapshots are
+    dropped once the history holds more than `undo_bytes`.
+
+    Args:
+        data (List[str]): The cli data, used to create the object on the first command
+        undo (int, optional): Number of snapshots kept. Defaults to 50.
+        undo_bytes (int, optional): Memory the snapshots may hold. Defaults to 256MB.
+    """
+
+    def __init__(
+        self, data: List[str], undo: int = UNDO_STEPS, undo_bytes: int = UNDO_BYTES
+    ):
+        self.data = list(data)
+        self.chepy: Union[Chepy, None] = None
+        self.undo_bytes = undo_bytes
+        self._snapshots = deque(maxlen=undo)
+
+    def _copy(self, items: dict, previous: dict, sizes: Dict[int, int]) -> dict:
+        last = self._snapshots[-1][5] if self._snapshots else {}
+        copied = {}
+        for key, value in items.items():
+            if isinstance(value, _MUTABLE):
+                old = previous.get(key)
+                try:
+                    # the live value itself can not be shared, since the
+                    # next command may change it
+                    shared = (
+                        old is not value and type(old) is type(value) and old == value
+                    )
+                except Exception:  # pragma: no cover
+                    shared = False
+                if shared:
+                    value = old
+                else:
+                    try:
+                        value = copy.deepcopy(value)
+                    except Exception:  # pragma: no cover
+                        value = copy.copy(value)
+            copied[key] = value
+            if id(value) not in sizes:
+                sizes[id(value)] = last.get(id(value)) or _sizeof(value)
+        return copied
+
+    def _snapshot(
+        self, states: dict, buffers: dict, index: int, stack: list, registers: dict
+    ) -> tuple:
+        previous = self._snapshots[-1] if self._snapshots else ({}, {}, 0, [], {})
+        sizes = {}
+        return (
+            self._copy(states, previous[0], sizes),
+            self._copy(buffers, previous[1], sizes),
+            index,
+            list(stack),
+            self._copy(registers, previous[4], sizes),
+            sizes,
+        )
+
+    def _push(self, snapshot: tuple) -> None:
+        self._snapshots.append(snapshot)
+        # values shared by several snapshots are counted once
+        while len(self._snapshots) > 1:
+            sizes = {}
+            for kept in self._snapshots:
+                sizes.update(kept[5])
+            if sum(sizes.values()) <= self.undo_bytes:
+                break
+            self._snapshots.popleft()
+
+    @staticmethod
+    def _changed(chepy: Chepy, snapshot: tuple) -> bool:
+        states, buffers, index, _, registers, _ = snapshot
+        try:
+            return (
+                chepy._current_index != index
+                or dict(chepy.states) != states
+                or dict(chepy.buffers) != buffers
+                or dict(chepy._registers) != registers
+            )
+        except Exception:  # pragma: no cover
+            return True
+
+    @staticmethod
+    def _restore(chepy: Chepy, snapshot: tuple) -> None:
+        states, buffers, index, stack, registers, _ = snapshot
+
+        # older snapshots may share the mutable values, so the object gets
+        # copies it can change in place
+        def live(items):
+            return {
+                k: copy.deepcopy(v) if isinstance(v, _MUTABLE) else v
+                for k, v in items.items()
+            }
+
+        chepy.states = live(states)
+        chepy.buffers = live(buffers)
+        chepy._current_index = index
+        chepy._stack = list(stack)
+        chepy._registers = live(registers)
+
+    def run(self, command: List[str]) -> Any:
+        """Apply a command to the live object
+
+        Args:
+            command (List[str]): The command, split like a shell command
+
+        Returns:
+            Any: The result of the command
+        """
+        command = list(command)
+        if command and command[-1] != "-":
+            command.append("-")
+        if self.chepy is None:
+            result = fire.Fire(Chepy, command=self.data + ["-"] + command)
+            if isinstance(result, Chepy):
+                self.chepy = result
+                # going back from the first command returns to the cli data
+                self._push(self._snapshot(result._initial_states, {}, 0, [], {}))
+            return result
+        c = self.chepy
+        snapshot = self._snapshot(
+            c.states, c.buffers, c._current_index, c._stack, c._registers
+        )
+        try:
+            result = fire.Fire(c, command=command)
+        except BaseException:
+            self._restore(c, snapshot)
+            raise
+        if self._changed(c, snapshot):
+            self._push(snapshot)
+        return result
+
+    def go_back(self) -> bool:
+        """Undo the last command
+
+        Returns:
+            bool: False if there is nothing to undo
+        """
+        if not self._snapshots:
+            return False
+        self._restore(self.chepy, self._snapshots.pop())
+        return True
+
+
+def get_options():
+    options = dict()
+    for method in dir(Chepy):
+        try:
+            attributes = getattr(Chepy, method)
+            if not method.startswith("_") and not isinstance(attributes, property):
+                args = inspect.getfullargspec(attributes).args
+                parsed_doc = _parse_doc(attributes.__doc__)
+                if len(args) == 1:
+                    options[method] = {
+                        "options": list(
+                            map(lambda d: {"flag": d, "meta": ""}, args[1:])
+                        ),
+                        "meta": parsed_doc.short_description,
+                        "returns": parsed_doc.returns.type_name,
+                    }
+                else:
+                    options[method] = {
+                        "options": list(
+                            map(
+                                lambda d: {
+                                    "flag": d[1],
+                                    "meta": parsed_doc.params[d[0]].description,
+                                },
+                                enumerate(args[1:]),
+                            )
+                        ),
+                        "meta": parsed_doc.short_description,
+                        "returns": parsed_doc.returns.type_name,
+                    }
+        except:
+            e_type, e_msg, e_traceback = sys.exc_info()
+            errors.append((e_type.__name__, "Error parsing options in:", method))
+            continue
+    return options
+
+
+def _index_key() -> dict:
+    """What the method index depends on: the Chepy version and sources, and
+    the plugin files recorded in the plugin index"""
+    package = Path(__file__).resolve().parent.parent.parent
+    plugins = config._read_plugin_index().get(str(config.plugin_path), {})
+    return {
+        "version": __version__,
+        "source": max(p.stat().st_mtime_ns for p in package.rglob("*.py")),
+        "plugins": plugins.get("files") if config.enable_plugins else None,
+    }
+
+
+def _write_index(index: dict) -> None:
+    path = Path(config.completion_index)
+    tmp = path.with_suffix(".tmp")
+    try:
+        with open(str(tmp), "w") as f:
+            json.dump(index, f)
+        os.replace(str(tmp), str(path))
+    except OSError:  # pragma: no cover
+        pass
+
+
+def method_index() -> Dict[str, dict]:
+    """The options of every Chepy method, as returned by `get_options`. It is
+    built once and saved in methods.json in the .chepy folder, and rebuilt when
+    the Chepy version, its sources or the plugins change.
+
+    Returns:
+        Dict[str, dict]: Method names and their options
+    """
+    global _methods
+    if _methods is None:
+        key = _index_key()
+        try:
+            with open(str(config.completion_index)) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            cached = {}
+        if cached.get("key") == key:
+            methods = cached["methods"]
+            errors.extend(tuple(e) for e in cached["errors"])
+        else:
+            methods = get_options()
+            _write_index({"key": key, "methods": methods, "errors": errors})
+        _method_names[:] = sorted(methods)
+        _methods = methods
+    return _methods
+
+
+def complete_methods(prefix: str) -> List[str]:
+    """Method names that start with a prefix, in order
+
+    Args:
+        prefix (str): The prefix
+
+    Returns:
+        List[str]: The method names
+    """
+    method_index()
+    start = bisect.bisect_left(_method_names, prefix)
+    end = bisect.bisect_left(_method_names, prefix + "\U0010ffff", start)
+    return _method_names[start:end]
+
+
+class CustomValidator(Validator):
+    def validate(self, document):
+        text = document.text.split()
+        if re.search(r"^(!|#|\?)", document.text):
+            pass
+        elif len(text) > 1:
+            if not text[-2].startswith("--"):
+                if (
+                    not re.search(r"\"|'", text[-1])
+                    and not text[-1].startswith("--")
+                    and text[-1] not in method_index()
+                ):
+                    raise ValidationError(
+                        cursor_position=1,
+                        message="{text} is not a valid Chepy method".format(
+                            text=text[-1]
+                        ),
+                    )
+
+
+class CustomCompleter(Completer):
+    def get_completions(self, document, complete_event):
+        global options
+        method_dict = method_index()
+        word = document.get_word_before_cursor()
+
+        methods = [(name, method_dict[name]) for name in complete_methods(word)]
+
+        selected = document.text.split()
+        if len(selected) > 0:
+            selected = selected[-1]
+            if selected.startswith("cli_"):
+                methods = options
+            elif not selected.startswith("--"):
+                current = method_dict.get(selected)
+                if current is not None:
+                    has_options = method_dict.get(selected)["options"]
+                    if has_options is not None:
+                        options = [
+                            ("--{}".format(o["flag"]), {"meta": o["meta"]})
+                            for o in has_options
+                        ]
+                        methods = options + methods
+            else:
+                methods = options
+
+        for method_name, method_docs in methods:
+            if method_name.startswith(word):
+                meta = (
+                    method_docs["meta"]
+                    if isinstance(method_docs, dict) and method_docs.get("meta")
+                    else ""
+                )
+                not_chepy_obj = ""
+                if method_docs.get("returns"):
+                    if method_docs["returns"] is None:
+                        not_chepy_obj = "bg:{}".format(config.prompt_cli_method)
+                    elif method_docs["returns"] == "ChepyPlugin":
+                        not_chepy_obj = "bg:{}".format(config.prompt_plugin_method)
+                yield Completion(
+                    method_name,
+                    start_position=-len(word),
+                    display_meta=meta,
+                    style=not_chepy_obj,
+                )
 
 
 class CliCompleter(Completer):
@@ -115,6 +474,7 @@ def cli_highlight(fire: object, highlight: str):
         print(type(fire))
 
 
+@functools.lru_cache(maxsize=None)
 def get_cli_options():
     options = dict()
     for method in functions_cli():
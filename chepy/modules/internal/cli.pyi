@@ -1,9 +1,32 @@
 from prompt_toolkit.completion import Completer
-from typing import Any
+from prompt_toolkit.validation import Validator
+from typing import Any, Dict, List, Union
+from chepy import Chepy
 
 module: Any
 options: Any
+errors: Any
 config: Any
+UNDO_STEPS: int
+UNDO_BYTES: int
+
+class ReplSession:
+    data: List[str] = ...
+    chepy: Union[Chepy, None] = ...
+    undo_bytes: int = ...
+    def __init__(self, data: List[str], undo: int = ..., undo_bytes: int = ...) -> None: ...
+    def run(self, command: List[str]) -> Any: ...
+    def go_back(self) -> bool: ...
+
+def get_options() -> dict: ...
+def method_index() -> Dict[str, dict]: ...
+def complete_methods(prefix: str) -> List[str]: ...
+
+class CustomValidator(Validator):
+    def validate(self, document: Any) -> None: ...
+
+class CustomCompleter(Completer):
+    def get_completions(self, document: Any, complete_event: Any) -> None: ...
 
 class CliCompleter(Completer):
     def get_completions(self, document: Any, complete_event: Any) -> None: ...
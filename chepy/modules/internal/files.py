@@ -0,0 +1,172 @@
+import fnmatch
+import mmap
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, List, Tuple, Union
+
+from .storage import FileStream
+
+#: Number of leading bytes checked by `is_binary`
+BINARY_SNIFF_SIZE = 8192
+
+#: Files smaller than this are read instead of memory mapped, which is faster
+MMAP_MIN_SIZE = 1024 * 1024
+
+
+def _patterns(patterns: Union[str, Iterable[str], None]) -> List[str]:
+    if patterns is None:
+        return []
+    if isinstance(patterns, str):
+        return [patterns]
+    return list(patterns)
+
+
+def _matches(relative: str, name: str, patterns: List[str]) -> bool:
+    return any(
+        fnmatch.fnmatch(relative, p) or fnmatch.fnmatch(name, p) for p in patterns
+    )
+
+
+def walk_files(
+    root: Union[str, Path],
+    include: Union[str, Iterable[str], None] = "*",
+    exclude: Union[str, Iterable[str], None] = None,
+    max_size: Union[int, None] = None,
+    dirs: bool = False,
+) -> Iterator[str]:
+    """Lazily walk a directory tree and yield the paths of its files. Glob
+    patterns are matched against the path relative to `root` and against the
+    file name. Directories matching an exclude pattern are not entered.
+
+    Args:
+        root (Union[str, Path]): Directory to walk
+        include (Union[str, Iterable[str], None], optional): Glob patterns of files to
+            yield. Defaults to "*".
+        exclude (Union[str, Iterable[str], None], optional): Glob patterns of files and
+            directories to skip. Defaults to None.
+        max_size (Union[int, None], optional): Skip files larger than this many bytes.
+            Defaults to None.
+        dirs (bool, optional): Also yield the paths of directories that match
+            `include`. Defaults to False.
+
+    Yields:
+        str: File paths
+    """
+    include = [p for p in _patterns(include) if p != "*"]
+    exclude = _patterns(exclude)
+    root = str(root)
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = sorted(os.scandir(directory), key=lambda e: e.name)
+        except OSError:  # pragma: no cover
+            continue
+        subdirectories = []
+        for entry in entries:
+            relative = None
+            if include or exclude:
+                relative = os.path.relpath(entry.path, root).replace(os.sep, "/")
+            if exclude and _matches(relative, entry.name, exclude):
+                continue
+            try:
+                if entry.is_dir():
+                    subdirectories.append(entry.path)
+                    if dirs and (
+                        not include or _matches(relative, entry.name, include)
+                    ):
+                        yield entry.path
+                    continue
+                if not entry.is_file():  # pragma: no cover
+                    continue
+                if max_size is not None and entry.stat().st_size > max_size:
+                    continue
+            except OSError:  # pragma: no cover
+                continue
+            if not include or _matches(relative, entry.name, include):
+                yield entry.path
+        stack.extend(reversed(subdirectories))
+
+
+def is_binary(data: Union[bytes, bytearray, memoryview, mmap.mmap]) -> bool:
+    """Guess if data is binary: it has a null byte in its first 8KB
+
+    Args:
+        data (Union[bytes, bytearray, memoryview, mmap.mmap]): The data
+
+    Returns:
+        bool: True if binary
+    """
+    return b"\x00" in data[:BINARY_SNIFF_SIZE]
+
+
+def read_state(
+    path: Union[str, Path], stream: bool = False
+) -> Union[str, bytearray, FileStream]:
+    """Read a file into a state like `load_file`: text files are decoded as
+    UTF-8, binary files and files that do not decode are kept as bytes.
+
+    Args:
+        path (Union[str, Path]): File path
+        stream (bool, optional): Return a lazy `FileStream` instead of reading the
+            file. Defaults to False.
+
+    Returns:
+        Union[str, bytearray, FileStream]: The state
+    """
+    if stream:
+        return FileStream(path)
+    with open(path, "rb") as f:
+        data = bytearray(os.fstat(f.fileno()).st_size)
+        # read straight into the buffer to avoid copying the content
+        del data[f.readinto(data) :]
+    if is_binary(data):
+        return data
+    try:
+        return data.decode()
+    except UnicodeDecodeError:
+        return data
+
+
+def search_file(
+    path: Union[str, Path],
+    rgx,
+    skip_binary: bool = False,
+    offsets: bool = False,
+) -> Union[list, List[Tuple[str, int, bytes]]]:
+    """Search a file with a compiled bytes regex. Files of 1MB or more are memory
+    mapped, and the search releases the GIL so files can be searched on several
+    threads.
+
+    Args:
+        path (Union[str, Path]): File path
+        rgx (regex.Pattern): Compiled bytes pattern
+        skip_binary (bool, optional): Return nothing for binary files. Defaults to False.
+        offsets (bool, optional): Return `(path, offset, match)` tuples instead of
+            the matches. Defaults to False.
+
+    Returns:
+        list: The matches, as returned by `findall`, or tuples
+    """
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return []
+            if size < MMAP_MIN_SIZE:
+                return _search(path, f.read(), rgx, skip_binary, offsets)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return _search(path, data, rgx, skip_binary, offsets)
+    except OSError:  # pragma: no cover
+        return []
+
+
+def _search(path, data, rgx, skip_binary: bool, offsets: bool) -> list:
+    if skip_binary and is_binary(data):
+        return []
+    if offsets:
+        return [
+            (str(path), m.start(), m.group())
+            for m in rgx.finditer(data, concurrent=True)
+        ]
+    return rgx.findall(data, concurrent=True)
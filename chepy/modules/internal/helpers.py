@@ -11,19 +11,19 @@ class Base45:
 
     def b45encode(self, buf: bytes) -> bytes:
         """Convert bytes to base45-encoded string"""
-        res = ""
+        res = []
         buflen = len(buf)
         for i in range(0, buflen & ~1, 2):
             x = (buf[i] << 8) + buf[i + 1]
             e, x = divmod(x, 45 * 45)
             d, c = divmod(x, 45)
-            res += (
+            res.append(
                 self.BASE45_CHARSET[c] + self.BASE45_CHARSET[d] + self.BASE45_CHARSET[e]
             )
         if buflen & 1:
             d, c = divmod(buf[-1], 45)
-            res += self.BASE45_CHARSET[c] + self.BASE45_CHARSET[d]
-        return res.encode()
+            res.append(self.BASE45_CHARSET[c] + self.BASE45_CHARSET[d])
+        return "".join(res).encode()
 
     def b45decode(self, s: Union[bytes, str]) -> bytes:
         """Decode base45-encoded string to bytes"""
@@ -92,39 +92,40 @@ class Base92(object):
             raise TypeError(f"a bytes-like object is required, not '{type(byt)}'")
         if not byt:
             return "~"
-        if not isinstance(byt, str):
-            byt = "".join([chr(b) for b in byt])
+        # the bit buffer never holds more than 20 bits, and the input is
+        # read by position, so every step is constant time
+        pos = 0
         bitstr = ""
-        while len(bitstr) < 13 and byt:
-            bitstr += "{:08b}".format(ord(byt[0]))
-            byt = byt[1:]
-        resstr = ""
-        while len(bitstr) > 13 or byt:
+        while len(bitstr) < 13 and pos < len(byt):
+            bitstr += "{:08b}".format(byt[pos])
+            pos += 1
+        res = []
+        while len(bitstr) > 13 or pos < len(byt):
             i = int(bitstr[:13], 2)
-            resstr += cls.base92_chr(i // 91)
-            resstr += cls.base92_chr(i % 91)
+            res.append(cls.base92_chr(i // 91))
+            res.append(cls.base92_chr(i % 91))
             bitstr = bitstr[13:]
-            while len(bitstr) < 13 and byt:
-                bitstr += "{:08b}".format(ord(byt[0]))
-                byt = byt[1:]
+            while len(bitstr) < 13 and pos < len(byt):
+                bitstr += "{:08b}".format(byt[pos])
+                pos += 1
 
         if bitstr:
             if len(bitstr) < 7:
                 bitstr += "0" * (6 - len(bitstr))
-                resstr += cls.base92_chr(int(bitstr, 2))
+                res.append(cls.base92_chr(int(bitstr, 2)))
             else:  # pragma: no cover
                 bitstr += "0" * (13 - len(bitstr))
                 i = int(bitstr, 2)
-                resstr += cls.base92_chr(i // 91)
-                resstr += cls.base92_chr(i % 91)
-        return resstr
+                res.append(cls.base92_chr(i // 91))
+                res.append(cls.base92_chr(i % 91))
+        return "".join(res)
 
     @classmethod
     def b92decode(cls, bstr: str) -> bytes:
         if not isinstance(bstr, str):  # pragma: no cover
             raise TypeError(f"a str object is required, not '{type(bstr)}'")
         bitstr = ""
-        resstr = ""
+        res = bytearray()
         if bstr == "~":
             return "".encode(encoding="latin-1")
 
@@ -132,15 +133,15 @@ class Base92(object):
             x = cls.base92_ord(bstr[2 * i]) * 91 + cls.base92_ord(bstr[2 * i + 1])
             bitstr += "{:013b}".format(x)
             while 8 <= len(bitstr):
-                resstr += chr(int(bitstr[0:8], 2))
+                res.append(int(bitstr[0:8], 2))
                 bitstr = bitstr[8:]
         if len(bstr) % 2 == 1:
             x = cls.base92_ord(bstr[-1])
             bitstr += "{:06b}".format(x)
             while 8 <= len(bitstr):
-                resstr += chr(int(bitstr[0:8], 2))
+                res.append(int(bitstr[0:8], 2))
                 bitstr = bitstr[8:]
-        return resstr.encode(encoding="latin-1")
+        return bytes(res)
 
 
 class LZ77Compressor:
@@ -461,7 +462,7 @@ class _Base64:
 
     @staticmethod
     def encode_base64(data: bytes, alphabet: str):
-        output = ""
+        output = []
         i = 0
         padding_char = (
             "=" if alphabet[-1] == "=" else None
@@ -486,19 +487,21 @@ class _Base64:
             elif i > len(data):
                 enc4 = 64
 
-            output += alphabet[enc1]
-            output += alphabet[enc2]
-            output += (
+            output.append(alphabet[enc1])
+            output.append(alphabet[enc2])
+            output.append(
                 alphabet[enc3]
                 if enc3 < 64
                 else (padding_char if padding_char is not None else "")
             )
-            output += (
+            output.append(
                 alphabet[enc4]
                 if enc4 < 64
                 else (padding_char if padding_char is not None else "")
             )
 
+        output = "".join(output)
+
         # Remove padding characters if they are not part of the alphabet
         if padding_char is None:
             output = output.rstrip(
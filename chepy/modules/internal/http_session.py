@@ -0,0 +1,133 @@
+import threading
+from typing import Any, Dict, Iterable, Iterator, Union
+
+import lazy_import
+
+requests = lazy_import.lazy_module("requests")
+adapters = lazy_import.lazy_module("requests.adapters")
+Retry = lazy_import.lazy_callable("urllib3.util.retry.Retry")
+
+from .workers import imap_threads
+
+#: Limits of the shared session. `connections` is the number of hosts whose
+#: connections are kept, `maxsize` the number of connections kept per host,
+#: `retries` the number of retries of failed idempotent requests and of 429
+#: and 5xx responses, and `timeout` the connect and read timeout in seconds.
+LIMITS: Dict[str, Union[int, float]] = {
+    "connections": 10,
+    "maxsize": 10,
+    "retries": 2,
+    "timeout": 30.0,
+}
+
+_session = None
+_lock = threading.Lock()
+
+
+def configure(**limits: Union[int, float]) -> None:
+    """Change the limits of the shared session. It is rebuilt on next use.
+
+    Args:
+        **limits (Union[int, float]): New values for keys of `LIMITS`
+
+    Raises:
+        KeyError: If a limit is not valid
+    """
+    global _session
+    for name, value in limits.items():
+        if name not in LIMITS:
+            raise KeyError("Unknown limit {}".format(name))
+        LIMITS[name] = type(LIMITS[name])(value)
+    with _lock:
+        _session = None
+
+
+def shared_session():
+    """The `requests.Session` shared by all Chepy objects, so connections are
+    kept alive and reused between requests and threads. It is created by the
+    first call.
+
+    Raises:
+        ImportError: If requests is not installed
+
+    Returns:
+        requests.Session: The session
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = adapters.HTTPAdapter(
+                pool_connections=int(LIMITS["connections"]),
+                pool_maxsize=int(LIMITS["maxsize"]),
+                max_retries=Retry(
+                    total=int(LIMITS["retries"]),
+                    backoff_factor=0.2,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    raise_on_status=False,
+                ),
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def request(
+    url: str, method: str = "GET", timeout: Union[float, None] = None, **kwargs: Any
+):
+    """Make a request with the shared session
+
+    Args:
+        url (str): The url
+        method (str, optional): Request method. Defaults to "GET".
+        timeout (Union[float, None], optional): Timeout in seconds. Defaults to
+            the `timeout` limit.
+        **kwargs (Any): Arguments of `requests.Session.request`
+
+    Returns:
+        requests.Response: The response
+    """
+    return shared_session().request(
+        method, url, timeout=timeout or LIMITS["timeout"], **kwargs
+    )
+
+
+def _fetch(url: Any, method: str, timeout, kwargs: dict) -> Union[bytes, Exception]:
+    try:
+        if isinstance(url, (bytes, bytearray)):
+            url = bytes(url).decode()
+        return request(url, method, timeout, **kwargs).content
+    except Exception as e:  # noqa: B902
+        return e
+
+
+def fetch_all(
+    urls: Iterable[Any],
+    method: str = "GET",
+    workers: Union[int, None] = None,
+    timeout: Union[float, None] = None,
+    **kwargs: Any
+) -> Iterator[Union[bytes, Exception]]:
+    """Fetch urls concurrently with the shared session. At most `workers`
+    requests are in flight.
+
+    Args:
+        urls (Iterable[Any]): The urls
+        method (str, optional): Request method. Defaults to "GET".
+        workers (Union[int, None], optional): Concurrent requests. Defaults to the
+            `maxsize` limit, so every request can keep its connection.
+        timeout (Union[float, None], optional): Timeout in seconds. Defaults to
+            the `timeout` limit.
+        **kwargs (Any): Arguments of `requests.Session.request`
+
+    Yields:
+        Union[bytes, Exception]: The content of every response in url order,
+            or the error of a failed request
+    """
+    workers = workers or int(LIMITS["maxsize"])
+
+    def fetch(url):
+        return _fetch(url, method, timeout, kwargs)
+
+    return imap_threads(fetch, urls, workers, window=workers)
@@ -0,0 +1,209 @@
+import functools
+from typing import Any, Callable, List, Tuple, Union
+
+import lazy_import
+
+jmespath = lazy_import.lazy_module("jmespath")
+
+#: Number of compiled key paths and jmespath expressions kept
+MAX_COMPILED = 1024
+
+
+def _key(data: Any, key: str, _: Any) -> Any:
+    if isinstance(data, list):
+        return [item[key] for item in data if key in item]
+    return data[key] if key in data else data
+
+
+def _index(data: Any, key: str, index: int) -> Any:
+    return data[key][index]
+
+
+def _all(data: Any, key: str, _: Any) -> Any:
+    value = data[key]
+    return [value[i] for i in range(len(value))]
+
+
+def _invalid(data: Any, key: str, error: str) -> Any:
+    raise ValueError("Invalid key {}: {}".format(key, error))
+
+
+def _parse(segment: str) -> tuple:
+    # a step is a (function, key, argument) tuple
+    if "[" not in segment:
+        return (_key, segment, None)
+    try:
+        key, index = segment.split("[")
+        index = index.rstrip("]").strip()
+        if index == "*":
+            return (_all, key, None)
+        return (_index, key, int(index))
+    except ValueError as e:
+        return (_invalid, segment, str(e))
+
+
+class KeyPath(object):
+    """A py style key path, like `menu.items[0].value` or `items[*].id`,
+    parsed once. A key missing from a dict leaves the value as is, a key
+    applied to a list is applied to every item that has it.
+
+    Args:
+        path (str): The key path
+        split_by (Union[str, None], optional): Separator of nested keys. If empty,
+            the path is a single key. Defaults to ".".
+    """
+
+    __slots__ = ("path", "split_by", "steps")
+
+    def __init__(self, path: str, split_by: Union[str, None] = "."):
+        self.path = path
+        self.split_by = split_by
+        self.steps = None
+        if split_by:
+            self.steps = tuple(_parse(key) for key in str(path).split(split_by))
+
+    def __repr__(self) -> str:
+        return "<KeyPath {!r}>".format(self.path)
+
+    def get(self, data: Any, on_error: Union[Callable, None] = None) -> Any:
+        """Get the value of the path
+
+        Args:
+            data (Any): A dict or list
+            on_error (Union[Callable, None], optional): Called with the error when a
+                step fails, and the value reached so far is returned. Defaults to
+                None, which raises the error.
+
+        Returns:
+            Any: The value
+        """
+        if self.steps is None:
+            return data[self.path]
+        try:
+            for func, key, arg in self.steps:
+                data = func(data, key, arg)
+        except Exception as e:  # noqa: B902
+            if on_error is None:
+                raise
+            on_error(e)
+        return data
+
+
+class KeyPathSet(object):
+    """Several key paths that are extracted in one traversal. Paths that start
+    with the same keys share the steps of that prefix.
+
+    Args:
+        paths (Tuple[str, ...]): The key paths
+        split_by (Union[str, None], optional): Separator of nested keys. Defaults
+            to ".".
+    """
+
+    def __init__(self, paths: Tuple[str, ...], split_by: Union[str, None] = "."):
+        self.paths = tuple(compile_path(path, split_by) for path in paths)
+        # every distinct prefix gets a slot holding its value, and the plan
+        # computes each slot once from the slot of its parent prefix
+        slots = {(): 0}
+        plan = []
+        ends = []
+        for path in self.paths:
+            prefix = ()
+            for step in path.steps or ():
+                parent = slots[prefix]
+                prefix += (step,)
+                if prefix not in slots:
+                    slots[prefix] = len(slots)
+                    plan.append((parent, slots[prefix]) + step)
+            ends.append(slots[prefix])
+        self._plan = tuple(plan)
+        self._ends = tuple(ends)
+        self._size = len(slots)
+
+    def __repr__(self) -> str:
+        return "<KeyPathSet {!r}>".format([p.path for p in self.paths])
+
+    def get(self, data: Any, on_error: Union[Callable, None] = None) -> List[Any]:
+        """Get the value of every path
+
+        Args:
+            data (Any): A dict or list
+            on_error (Union[Callable, None], optional): Called with the error of
+                every path with a failing step, and the value reached so far is
+                returned for it. Defaults to None, which raises the error.
+
+        Returns:
+            List[Any]: The values in path order
+        """
+        if self.paths and self.paths[0].steps is None:
+            return [data[path.path] for path in self.paths]
+        values = [data] * self._size
+        try:
+            for parent, slot, func, key, arg in self._plan:
+                values[slot] = func(values[parent], key, arg)
+        except Exception:  # noqa: B902
+            if on_error is None:
+                raise
+            return self._get_errors(data, on_error)
+        return [values[slot] for slot in self._ends]
+
+    def _get_errors(self, data: Any, on_error: Callable) -> List[Any]:
+        values = [data] * self._size
+        errors = {}
+        for parent, slot, func, key, arg in self._plan:
+            if parent in errors:
+                values[slot], errors[slot] = values[parent], errors[parent]
+                continue
+            try:
+                values[slot] = func(values[parent], key, arg)
+            except Exception as e:  # noqa: B902
+                values[slot], errors[slot] = values[parent], e
+        for slot in self._ends:
+            if slot in errors:
+                on_error(errors[slot])
+        return [values[slot] for slot in self._ends]
+
+
+@functools.lru_cache(maxsize=MAX_COMPILED)
+def compile_path(path: str, split_by: Union[str, None] = ".") -> KeyPath:
+    """Parse a py style key path, or return it from the cache
+
+    Args:
+        path (str): The key path
+        split_by (Union[str, None], optional): Separator of nested keys. Defaults
+            to ".".
+
+    Returns:
+        KeyPath: The compiled path
+    """
+    return KeyPath(path, split_by)
+
+
+@functools.lru_cache(maxsize=MAX_COMPILED)
+def compile_paths(
+    paths: Tuple[str, ...], split_by: Union[str, None] = "."
+) -> KeyPathSet:
+    """Parse several py style key paths, or return them from the cache
+
+    Args:
+        paths (Tuple[str, ...]): The key paths
+        split_by (Union[str, None], optional): Separator of nested keys. Defaults
+            to ".".
+
+    Returns:
+        KeyPathSet: The compiled paths
+    """
+    return KeyPathSet(paths, split_by)
+
+
+@functools.lru_cache(maxsize=MAX_COMPILED)
+def compile_query(expression: str):
+    """Compile a jmespath expression, or return it from the cache
+
+    Args:
+        expression (str): The expression
+
+    Returns:
+        jmespath.parser.ParsedResult: The compiled expression, with a `search`
+            method
+    """
+    return jmespath.compile(expression)
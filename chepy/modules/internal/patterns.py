@@ -0,0 +1,132 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Union
+
+import regex as re
+
+#: Default number of compiled patterns kept by the shared pattern cache
+DEFAULT_MAX_PATTERNS = 512
+
+
+class PatternCache(object):
+    """A bounded cache of compiled `regex` patterns, keyed by pattern and
+    flags. It is evicted least recently used first once it holds more than
+    `maxsize` patterns. Pinned patterns, like the fixed patterns of the
+    extractors, are compiled on first use and never evicted.
+
+    Args:
+        maxsize (int, optional): Number of patterns kept. Defaults to 512.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAX_PATTERNS):
+        self.maxsize = int(maxsize)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._pinned = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._pinned)
+
+    def __repr__(self) -> str:
+        return "<PatternCache hits={} misses={} patterns={}>".format(
+            self.hits, self.misses, len(self)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """Cache counters
+
+        Returns:
+            Dict[str, int]: hits, misses, patterns, pinned patterns and maxsize
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "patterns": len(self),
+            "pinned": len(self._pinned),
+            "maxsize": self.maxsize,
+        }
+
+    def clear(self) -> None:
+        """Remove every pattern and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+            self.hits = self.misses = 0
+
+    def compile(
+        self, pattern: Union[str, bytes, re.Pattern], flags: int = 0, pin: bool = False
+    ) -> re.Pattern:
+        """Compile a pattern, or return it from the cache
+
+        Args:
+            pattern (Union[str, bytes, re.Pattern]): The pattern. Compiled patterns
+                are returned as is.
+            flags (int, optional): Regex flags. Defaults to 0.
+            pin (bool, optional): Never evict the pattern. Defaults to False.
+
+        Returns:
+            re.Pattern: The compiled pattern
+        """
+        if isinstance(pattern, re.Pattern):
+            return pattern
+        key = (type(pattern), pattern, int(flags))
+        entries = self._pinned if pin else self._entries
+        with self._lock:
+            rgx = entries.get(key)
+            if rgx is not None:
+                self.hits += 1
+                if not pin:
+                    entries.move_to_end(key)
+                return rgx
+            self.misses += 1
+        # compile outside the lock, a pattern compiled twice by two threads is
+        # harmless
+        rgx = re.compile(pattern, flags)
+        with self._lock:
+            entries[key] = rgx
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return rgx
+
+
+_shared = PatternCache()
+
+
+def shared_patterns() -> PatternCache:
+    """The pattern cache shared by all Chepy objects
+
+    Returns:
+        PatternCache: The cache
+    """
+    return _shared
+
+
+def compile_pattern(
+    pattern: Union[str, bytes, re.Pattern], flags: int = 0
+) -> re.Pattern:
+    """Compile a user supplied pattern with the shared pattern cache
+
+    Args:
+        pattern (Union[str, bytes, re.Pattern]): The pattern
+        flags (int, optional): Regex flags. Defaults to 0.
+
+    Returns:
+        re.Pattern: The compiled pattern
+    """
+    return _shared.compile(pattern, flags)
+
+
+def fixed_pattern(pattern: Union[str, bytes], flags: int = 0) -> re.Pattern:
+    """Compile a fixed pattern of a method with the shared pattern cache. It is
+    compiled on first use and never evicted.
+
+    Args:
+        pattern (Union[str, bytes]): The pattern
+        flags (int, optional): Regex flags. Defaults to 0.
+
+    Returns:
+        re.Pattern: The compiled pattern
+    """
+    return _shared.compile(pattern, flags, pin=True)
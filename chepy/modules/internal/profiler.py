@@ -0,0 +1,323 @@
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Union
+
+from .storage import DeferredStream
+
+
+def _size(state: Any) -> Union[int, None]:
+    if isinstance(state, DeferredStream):
+        # the length of a deferred stream is only known once it runs
+        return None
+    try:
+        return len(state)
+    except TypeError:
+        return None
+
+
+class Span(object):
+    """Timing of one method call
+
+    Args:
+        name (str): Method name
+        parent (Union[Span, None]): The span of the calling method
+        in_size (Union[int, None]): Length of the input state
+    """
+
+    __slots__ = (
+        "name",
+        "parent",
+        "children",
+        "thread",
+        "start",
+        "cpu_start",
+        "wall",
+        "cpu",
+        "in_size",
+        "out_size",
+        "memory_start",
+        "memory_peak",
+        "error",
+    )
+
+    def __init__(
+        self, name: str, parent: Union["Span", None], in_size: Union[int, None]
+    ):
+        self.name = name
+        self.parent = parent
+        self.children = []
+        self.thread = threading.get_ident()
+        self.in_size = in_size
+        self.out_size = None
+        self.wall = self.cpu = 0.0
+        self.memory_start = self.memory_peak = None
+        self.error = None
+        self.cpu_start = time.thread_time()
+        self.start = time.perf_counter()
+
+    @property
+    def peak(self) -> Union[int, None]:
+        """Peak memory allocated during the call, in bytes"""
+        if self.memory_peak is None:
+            return None
+        return max(0, self.memory_peak - self.memory_start)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The span and its children as a dictionary
+
+        Returns:
+            Dict[str, Any]: Times are in seconds and sizes in bytes
+        """
+        return {
+            "function": self.name,
+            "wall": self.wall,
+            "cpu": self.cpu,
+            "in_size": self.in_size,
+            "out_size": self.out_size,
+            "peak_memory": self.peak,
+            "error": self.error,
+            "children": [child.as_dict() for child in self.children],
+        }
+
+
+class Profiler(object):
+    """Records the wall time, CPU time, input and output size and optionally
+    the peak memory of every Chepy method call. Calls made by a method, like
+    the callback of `loop_list`, are recorded as children of its span.
+
+    Args:
+        memory (bool, optional): Track peak memory with tracemalloc. This slows
+            down every call. Defaults to False.
+    """
+
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.spans = []
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+        self._tracing = memory and not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def __repr__(self) -> str:
+        return "<Profiler {} calls>".format(len(self.spans))
+
+    def _open(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current(self) -> Union[Span, None]:
+        """The innermost open span of the calling thread
+
+        Returns:
+            Union[Span, None]: The span, or None outside of any call
+        """
+        stack = self._open()
+        return stack[-1] if stack else None
+
+    @contextlib.contextmanager
+    def adopt(self, span: Union[Span, None]) -> Iterator[None]:
+        """Record the calls made by the calling thread inside the block as
+        children of a span opened by another thread, like the span of the
+        method that started a pool of workers.
+
+        Args:
+            span (Union[Span, None]): The parent span. Nothing is changed if it
+                is None.
+        """
+        if span is None:
+            yield
+            return
+        stack = self._open()
+        stack.append(span)
+        try:
+            yield
+        finally:
+            stack.remove(span)
+
+    def start(self, chepy, name: str) -> Span:
+        """Open a span for a method call
+
+        Args:
+            chepy (ChepyCore): The Chepy object
+            name (str): Method name
+
+        Returns:
+            Span: The span
+        """
+        stack = self._open()
+        parent = stack[-1] if stack else None
+        span = Span(name, parent, _size(chepy.state))
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                parent.memory_peak = max(parent.memory_peak, peak)
+            tracemalloc.reset_peak()
+            span.memory_start = span.memory_peak = current
+        if parent is not None:
+            parent.children.append(span)
+        else:
+            self.spans.append(span)
+        stack.append(span)
+        return span
+
+    def stop(
+        self, span: Span, chepy, error: Union[BaseException, None] = None
+    ) -> None:
+        """Close a span
+
+        Args:
+            span (Span): The span returned by `start`
+            chepy (ChepyCore): The Chepy object
+            error (Union[BaseException, None], optional): Error raised by the call. Defaults to None.
+        """
+        span.wall = time.perf_counter() - span.start
+        span.cpu = time.thread_time() - span.cpu_start
+        span.out_size = _size(chepy.state)
+        if error is not None:
+            span.error = "{}: {}".format(type(error).__name__, error)
+        if self.memory and span.memory_start is not None:
+            peak = max(span.memory_peak, tracemalloc.get_traced_memory()[1])
+            span.memory_peak = peak
+            parent = span.parent
+            if parent is not None and parent.memory_peak is not None:
+                parent.memory_peak = max(parent.memory_peak, peak)
+        self._open().pop()
+
+    def walk(self):
+        """Iterate over all spans depth first
+
+        Yields:
+            Tuple[int, Span]: The nesting depth and the span
+        """
+        todo = [(0, span) for span in reversed(self.spans)]
+        while todo:
+            depth, span = todo.pop()
+            yield depth, span
+            todo.extend((depth + 1, child) for child in reversed(span.children))
+
+    def clear(self) -> None:
+        """Remove all recorded spans"""
+        self.spans = []
+
+    def close(self) -> None:
+        """Stop tracemalloc if this profiler started it. Spans recorded after
+        this have no peak memory.
+        """
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+        self.memory = False
+
+    def as_dict(self) -> List[Dict[str, Any]]:
+        """All spans as a list of nested dictionaries
+
+        Returns:
+            List[Dict[str, Any]]: The spans
+        """
+        return [span.as_dict() for span in self.spans]
+
+    def to_json(self, indent: Union[int, None] = None) -> str:
+        """All spans as JSON
+
+        Args:
+            indent (Union[int, None], optional): JSON indent. Defaults to None.
+
+        Returns:
+            str: The report
+        """
+        return json.dumps(self.as_dict(), indent=indent)
+
+    def table(self) -> str:
+        """A text table with one row per call. Nested calls are indented.
+
+        Returns:
+            str: The report
+        """
+
+        def fmt(value, scale=1, spec="{:.3f}"):
+            return "-" if value is None else spec.format(value * scale)
+
+        header = ("function", "wall ms", "cpu ms", "in", "out", "peak")
+        rows = [
+            (
+                "  " * depth + span.name + (" !" if span.error else ""),
+                fmt(span.wall, 1000),
+                fmt(span.cpu, 1000),
+                fmt(span.in_size, spec="{}"),
+                fmt(span.out_size, spec="{}"),
+                fmt(span.peak, spec="{}"),
+            )
+            for depth, span in self.walk()
+        ]
+        rows.append(
+            (
+                "total",
+                fmt(sum(s.wall for s in self.spans), 1000),
+                fmt(sum(s.cpu for s in self.spans), 1000),
+                "",
+                "",
+                "",
+            )
+        )
+        widths = [max(len(row[i]) for row in [header] + rows) for i in range(6)]
+        lines = []
+        for row in [header] + rows:
+            lines.append(
+                "  ".join(
+                    cell.ljust(w) if i == 0 else cell.rjust(w)
+                    for i, (cell, w) in enumerate(zip(row, widths))
+                )
+            )
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """All spans as Chrome trace events. Load the saved file in
+        chrome://tracing or https://ui.perfetto.dev
+
+        Returns:
+            Dict[str, Any]: The trace
+        """
+        pid = os.getpid()
+        events = []
+        for _, span in self.walk():
+            args = {
+                "cpu_ms": span.cpu * 1000,
+                "in_size": span.in_size,
+                "out_size": span.out_size,
+            }
+            if span.peak is not None:
+                args["peak_memory"] = span.peak
+            if span.error:
+                args["error"] = span.error
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": "chepy",
+                    "ph": "X",
+                    "ts": (span.start - self._origin) * 1e6,
+                    "dur": span.wall * 1e6,
+                    "pid": pid,
+                    "tid": span.thread,
+                    "args": args,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, path: Union[str, Path]) -> None:
+        """Write the Chrome trace events to a file
+
+        Args:
+            path (Union[str, Path]): Path of the trace file
+        """
+        Path(path).expanduser().write_text(json.dumps(self.chrome_trace()))
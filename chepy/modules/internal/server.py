@@ -0,0 +1,756 @@
+import base64
+import functools
+import hmac
+import http.client
+import http.server
+import ipaddress
+import itertools
+import json
+import os
+import secrets
+import socket
+import socketserver
+import threading
+import time
+from concurrent import futures
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union
+
+from .batch import BLOCK_SIZE, DELIMITERS, NdjsonField, encode_output, iter_records
+from .cache import CACHEABLE
+from .workers import BatchResult, _chunks, _run_recipe
+
+#: Address `chepy serve` listens on when none is given, a Unix socket that is
+#: only accessible by its owner
+DEFAULT_ADDRESS = os.path.join(os.path.expanduser("~"), ".chepy", "serve.sock")
+
+#: Environment variable with the token of a server listening on TCP
+TOKEN_ENV = "CHEPY_SERVE_TOKEN"
+
+#: Methods recipes sent to `chepy serve` may use unless the server is started
+#: with `allow_unsafe`. They only transform the states, buffers and registers;
+#: methods that read or write files, run commands or scripts, make network
+#: requests, unpickle data, use the clipboard or a browser, load other recipes
+#: or change the config are not in it, and neither are plugin methods. Every
+#: pure method that can be cached is allowed, except `from_pickle`.
+SERVE_METHODS = (CACHEABLE - frozenset(["from_pickle"])) | frozenset(
+    [
+        "bcrypt_hash",
+        "change_state",
+        "copy_state",
+        "create_state",
+        "create_zip_file",
+        "delete_buffer",
+        "delete_state",
+        "diff",
+        "fernet_encrypt",
+        "for_each",
+        "fork",
+        "from_unix_timestamp",
+        "generate_ecc_keypair",
+        "generate_rsa_keypair",
+        "generate_uuid",
+        "get_register",
+        "get_state",
+        "gzip_compress",
+        "load_buffer",
+        "loop",
+        "loop_dict",
+        "loop_list",
+        "lz77_decompress",
+        "password_hashing",
+        "pgp_decrypt",
+        "pgp_encrypt",
+        "pretty",
+        "random_case",
+        "regex_to_str",
+        "register",
+        "reset",
+        "save_buffer",
+        "set_register",
+        "set_state",
+        "shuffle",
+        "subsection",
+        "switch_state",
+        "to_leetcode",
+        "to_letter_number_code",
+        "to_unix_timestamp",
+    ]
+)
+
+#: Methods that read a key file unless they are called with `is_file=False`
+KEY_FILE_METHODS = frozenset(["rsa_decrypt", "rsa_encrypt", "rsa_sign", "rsa_verify"])
+
+#: Number of compiled recipes kept by the server and by every worker
+RECIPE_CACHE_SIZE = 128
+
+#: Records sent to a worker at once
+SERVE_CHUNK_SIZE = 64
+
+#: Records sent by the remote client in one request
+REMOTE_BATCH_SIZE = 1024
+
+#: Upper bounds in seconds of the request latency histogram
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+
+def parse_address(address: Union[str, None]) -> Tuple[str, Union[str, tuple]]:
+    """Parse a server address. `unix:PATH`, or anything with a path separator,
+    is a Unix domain socket. Otherwise it is `HOST:PORT`, `PORT` or an
+    `http://HOST:PORT` url.
+
+    Args:
+        address (Union[str, None]): The address. Defaults to `DEFAULT_ADDRESS`.
+
+    Raises:
+        ValueError: If the address is not valid
+
+    Returns:
+        Tuple[str, Union[str, tuple]]: ("unix", path) or ("tcp", (host, port))
+    """
+    address = address or DEFAULT_ADDRESS
+    if address.startswith("unix:"):
+        return ("unix", address[5:])
+    if os.sep in address and not address.startswith("http://"):
+        return ("unix", address)
+    address = address[7:] if address.startswith("http://") else address
+    host, _, port = address.rstrip("/").rpartition(":")
+    try:
+        return ("tcp", (host.strip("[]") or "127.0.0.1", int(port)))
+    except ValueError:
+        raise ValueError("Invalid address {}".format(address))
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _host_name(host: str) -> str:
+    if host.startswith("["):
+        return host[1:].partition("]")[0]
+    if host.count(":") == 1:
+        return host.partition(":")[0]
+    return host
+
+
+def _strings(value: Any) -> Iterator[str]:
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        # keys are argument names
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _strings(item)
+
+
+def check_recipe(recipe: Any, allow_unsafe: bool = False, cls: type = None) -> None:
+    """Check that a recipe sent to `chepy serve` is a list of steps, and
+    unless `allow_unsafe` is set, that its steps and the methods named in
+    their arguments are `SERVE_METHODS`.
+
+    Args:
+        recipe (Any): The recipe
+        allow_unsafe (bool, optional): Allow every method. Defaults to False.
+        cls (type, optional): The Chepy class whose methods can be named in
+            the arguments. Defaults to Chepy.
+
+    Raises:
+        ValueError: If the recipe is not valid or not allowed
+    """
+    if not isinstance(recipe, list) or not all(isinstance(s, dict) for s in recipe):
+        raise ValueError("The recipe must be a list of steps")
+    if allow_unsafe:
+        return
+    if cls is None:
+        from ... import Chepy as cls
+    for step in recipe:
+        args = step.get("args") or {}
+        function = step.get("function")
+        if function in KEY_FILE_METHODS and args.get("is_file") is False:
+            function = None
+        # names that are not methods are left to compile_recipe to report
+        for name in itertools.chain(_strings(function), _strings(args)):
+            if hasattr(cls, name) and name not in SERVE_METHODS:
+                raise ValueError(
+                    "{} is not allowed by chepy serve without --allow-unsafe".format(
+                        name
+                    )
+                )
+
+
+def recipe_key(recipe: List[dict]) -> str:
+    """A canonical form of a recipe that compiled recipes are cached by
+
+    Args:
+        recipe (List[dict]): The recipe
+
+    Returns:
+        str: The recipe as sorted JSON
+    """
+    return json.dumps(recipe, sort_keys=True, separators=(",", ":"))
+
+
+class Metrics(object):
+    """Request, record, latency and queue depth counters of a server. They
+    are rendered in the Prometheus text format by `GET /metrics`.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests = 0
+        self.failed_requests = 0
+        self.records = 0
+        self.record_errors = 0
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._lock = threading.Lock()
+
+    def start_request(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def end_request(self, seconds: float, ok: bool = True) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.requests += 1
+            self.failed_requests += not ok
+            self.latency_sum += seconds
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    self.latency_buckets[i] += 1
+                    break
+            else:
+                self.latency_buckets[-1] += 1
+
+    def queued(self, records: int) -> None:
+        with self._lock:
+            self.queue_depth += records
+
+    def done(self, records: int, errors: int) -> None:
+        with self._lock:
+            self.queue_depth -= records
+            self.records += records
+            self.record_errors += errors
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The current counters
+
+        Returns:
+            Dict[str, Any]: The counters by name
+        """
+        with self._lock:
+            return {
+                "uptime_seconds": time.time() - self.started,
+                "requests": self.requests,
+                "failed_requests": self.failed_requests,
+                "in_flight_requests": self.in_flight,
+                "records": self.records,
+                "record_errors": self.record_errors,
+                "queue_depth": self.queue_depth,
+                "latency_sum": self.latency_sum,
+                "latency_buckets": list(self.latency_buckets),
+            }
+
+    def render(self, workers: int, recipes: Any) -> str:
+        """Render the counters in the Prometheus text format
+
+        Args:
+            workers (int): Number of worker processes
+            recipes (Any): `cache_info()` of the compiled recipe cache
+
+        Returns:
+            str: The metrics
+        """
+        s = self.snapshot()
+        lines = [
+            "# TYPE chepy_requests_total counter",
+            "chepy_requests_total {}".format(s["requests"]),
+            "# TYPE chepy_failed_requests_total counter",
+            "chepy_failed_requests_total {}".format(s["failed_requests"]),
+            "# TYPE chepy_in_flight_requests gauge",
+            "chepy_in_flight_requests {}".format(s["in_flight_requests"]),
+            "# TYPE chepy_records_total counter",
+            "chepy_records_total {}".format(s["records"]),
+            "# TYPE chepy_record_errors_total counter",
+            "chepy_record_errors_total {}".format(s["record_errors"]),
+            "# TYPE chepy_queue_depth gauge",
+            "chepy_queue_depth {}".format(s["queue_depth"]),
+            "# TYPE chepy_workers gauge",
+            "chepy_workers {}".format(workers),
+            "# TYPE chepy_recipe_cache_hits_total counter",
+            "chepy_recipe_cache_hits_total {}".format(recipes.hits),
+            "# TYPE chepy_recipe_cache_misses_total counter",
+            "chepy_recipe_cache_misses_total {}".format(recipes.misses),
+            "# TYPE chepy_uptime_seconds gauge",
+            "chepy_uptime_seconds {:.3f}".format(s["uptime_seconds"]),
+            "# TYPE chepy_request_seconds histogram",
+        ]
+        total = 0
+        for bound, count in zip(LATENCY_BUCKETS, s["latency_buckets"]):
+            total += count
+            lines.append(
+                'chepy_request_seconds_bucket{{le="{}"}} {}'.format(bound, total)
+            )
+        lines += [
+            'chepy_request_seconds_bucket{{le="+Inf"}} {}'.format(s["requests"]),
+            "chepy_request_seconds_sum {:.6f}".format(s["latency_sum"]),
+            "chepy_request_seconds_count {}".format(s["requests"]),
+        ]
+        return "\n".join(lines) + "\n"
+
+
+# the Chepy class of a server worker, set by the pool initializer
+_serve_cls = None
+
+
+def _init_serve_worker(cls: type) -> None:
+    global _serve_cls
+    _serve_cls = cls
+
+
+@functools.lru_cache(maxsize=RECIPE_CACHE_SIZE)
+def _worker_recipe(key: str):
+    return _serve_cls.compile_recipe(json.loads(key))
+
+
+def _warm(seconds: float) -> int:
+    # keeps a worker busy for a moment so that every worker is started
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def _serve_chunk(
+    key: str, records: str, field: Union[str, None], chunk: List[Tuple[int, Any]]
+) -> List[BatchResult]:
+    pipeline = _worker_recipe(key)
+    loader = NdjsonField(field) if records == "ndjson" else None
+    results = []
+    for index, data in chunk:
+        result = _run_recipe(index, data, pipeline, loader)
+        if result.error is None:
+            try:
+                result = result._replace(output=encode_output(result.output, records))
+            except Exception as e:
+                result = BatchResult(index, error="{}: {}".format(type(e).__name__, e))
+        results.append(result)
+    return results
+
+
+class RecipeServer(object):
+    """Runs recipes for `chepy serve` on a pool of worker processes that are
+    started before the first request. Recipes are compiled once by the
+    server to validate them, and once by every worker that runs them, and
+    both keep the compiled recipes in an LRU cache.
+
+    Args:
+        cls (type): The Chepy class
+        workers (Union[int, None], optional): Number of processes. Defaults to the
+            number of CPUs.
+        allow_unsafe (bool, optional): Allow recipes that use methods that are
+            not `SERVE_METHODS`. Defaults to False.
+    """
+
+    def __init__(
+        self, cls: type, workers: Union[int, None] = None, allow_unsafe: bool = False
+    ):
+        self.cls = cls
+        self.allow_unsafe = allow_unsafe
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.metrics = Metrics()
+        self.compile = functools.lru_cache(maxsize=RECIPE_CACHE_SIZE)(self._compile)
+        self.executor = futures.ProcessPoolExecutor(
+            self.workers, initializer=_init_serve_worker, initargs=(cls,)
+        )
+
+    def _compile(self, key: str):
+        recipe = json.loads(key)
+        check_recipe(recipe, self.allow_unsafe, self.cls)
+        return self.cls.compile_recipe(recipe)
+
+    def warm(self) -> None:
+        """Start every worker process"""
+        pending = [self.executor.submit(_warm, 0.05) for _ in range(self.workers)]
+        for future in pending:
+            future.result()
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+    def run(
+        self,
+        recipe: List[dict],
+        data: List[Any],
+        records: str = "line",
+        field: Union[str, None] = None,
+        ordered: bool = True,
+    ) -> Iterator[List[BatchResult]]:
+        """Run a recipe on every record on the worker processes. Outputs are
+        encoded like the outputs of `chepy --stdin`.
+
+        Args:
+            recipe (List[dict]): The recipe
+            data (List[Any]): The records
+            records (str, optional): line, nul or ndjson. Defaults to "line".
+            field (Union[str, None], optional): Key path of the NDJSON value the recipe
+                runs on. Defaults to None.
+            ordered (bool, optional): Yield results in input order. Defaults to True.
+
+        Raises:
+            ValueError: If the recipe is not valid or not allowed
+
+        Yields:
+            List[BatchResult]: The results of every chunk of records, with the
+                outputs as bytes
+        """
+        if records not in DELIMITERS:
+            raise ValueError(
+                "records must be one of {}".format(", ".join(sorted(DELIMITERS)))
+            )
+        key = recipe_key(recipe)
+        self.compile(key)
+        pending = []
+        try:
+            for chunk in _chunks(enumerate(data), SERVE_CHUNK_SIZE):
+                self.metrics.queued(len(chunk))
+                future = self.executor.submit(_serve_chunk, key, records, field, chunk)
+                future.add_done_callback(functools.partial(self._done, len(chunk)))
+                pending.append(future)
+            done = pending if ordered else futures.as_completed(pending)
+            for future in done:
+                yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _done(self, records: int, future: futures.Future) -> None:
+        # a cancelled or crashed chunk counts as failed records
+        if future.cancelled() or future.exception() is not None:
+            self.metrics.done(records, records)
+        else:
+            results = future.result()
+            self.metrics.done(records, sum(r.error is not None for r in results))
+
+
+def _result_line(result: BatchResult) -> bytes:
+    line = {"index": result.index}
+    if result.error is None:
+        line["output"] = base64.b64encode(result.output).decode()
+    else:
+        line["error"] = result.error
+    return json.dumps(line).encode() + b"\n"
+
+
+class RecipeHandler(http.server.BaseHTTPRequestHandler):
+    """HTTP handler of `chepy serve`.
+
+    `POST /run` takes a JSON object with the `recipe`, the base64 encoded
+    `data` records, and optionally `records`, `field` and `ordered`. The
+    response streams one JSON line per record, with its `index` and either
+    the base64 encoded `output` or the `error`.
+
+    `GET /metrics` returns the metrics in the Prometheus text format.
+
+    Requests must have a loopback `Host`, so that web pages can not reach
+    the server by DNS rebinding, and `POST` requests must be
+    `application/json`, which browsers do not send cross site without a
+    preflight. Servers with a token also require it as a bearer token.
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "chepy"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, error: str) -> None:
+        body = json.dumps({"error": error}).encode()
+        self._send(status, body, "application/json")
+
+    def _refuse(self, status: int, error: str) -> bool:
+        # the body of the request is not read, so the connection can not be reused
+        self.close_connection = True
+        self._send_error(status, error)
+        return False
+
+    def _allowed(self, content_type: Union[str, None] = None) -> bool:
+        host = self.headers.get("Host", "")
+        if not _is_loopback(_host_name(host)):
+            return self._refuse(403, "Host {!r} is not a loopback host".format(host))
+        token = self.server.token
+        if token is not None:
+            authorization = self.headers.get("Authorization", "")
+            if not hmac.compare_digest(authorization, "Bearer " + token):
+                return self._refuse(401, "Invalid or missing token")
+        if content_type and self.headers.get_content_type() != content_type:
+            return self._refuse(415, "Content-Type must be {}".format(content_type))
+        return True
+
+    def do_GET(self) -> None:
+        server = self.server.recipes
+        if not self._allowed():
+            return
+        if self.path != "/metrics":
+            self._send_error(404, "Not found")
+            return
+        body = server.metrics.render(server.workers, server.compile.cache_info())
+        self._send(200, body.encode(), "text/plain; version=0.0.4")
+
+    def do_POST(self) -> None:
+        server = self.server.recipes
+        if not self._allowed("application/json"):
+            return
+        if self.path != "/run":
+            self._send_error(404, "Not found")
+            return
+        start = time.perf_counter()
+        server.metrics.start_request()
+        ok = False
+        try:
+            try:
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                data = [base64.b64decode(item) for item in body.get("data", [])]
+                results = server.run(
+                    body["recipe"],
+                    data,
+                    body.get("records", "line"),
+                    body.get("field"),
+                    body.get("ordered", True),
+                )
+                first = next(results, None)
+            except ValueError as e:
+                self._send_error(400, str(e))
+                return
+            except (AttributeError, KeyError, TypeError) as e:
+                self._send_error(400, "{}: {}".format(type(e).__name__, e))
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            # one http chunk of json lines for every chunk of records
+            for chunk in itertools.chain([first] if first else [], results):
+                lines = b"".join(map(_result_line, chunk))
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(lines), lines))
+            self.wfile.write(b"0\r\n\r\n")
+            ok = True
+        finally:
+            server.metrics.end_request(time.perf_counter() - start, ok)
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+
+    class ThreadingUnixHTTPServer(
+        socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+    ):
+        daemon_threads = True
+
+        def get_request(self):
+            request, _ = super().get_request()
+            # http.server expects a (host, port) client address
+            return request, ("unix", 0)
+
+        def server_close(self) -> None:
+            super().server_close()
+            if os.path.exists(self.server_address):
+                os.unlink(self.server_address)
+
+
+def make_server(
+    cls: type,
+    address: Union[str, None] = None,
+    workers: Union[int, None] = None,
+    token: Union[str, None] = None,
+    allow_unsafe: bool = False,
+) -> socketserver.BaseServer:
+    """Create the server of `chepy serve` and start its workers. Recipes can
+    read and write local files, so TCP servers only listen on loopback
+    addresses and require a token, and Unix sockets are only accessible by
+    their owner.
+
+    Args:
+        cls (type): The Chepy class
+        address (Union[str, None], optional): See `parse_address`. Defaults to
+            `DEFAULT_ADDRESS`.
+        workers (Union[int, None], optional): Number of processes. Defaults to the
+            number of CPUs.
+        token (Union[str, None], optional): Token clients must send. A random
+            token is created for TCP servers when none is given, and Unix
+            sockets do not require one. Defaults to None.
+        allow_unsafe (bool, optional): Allow recipes that use methods that are
+            not `SERVE_METHODS`. Defaults to False.
+
+    Raises:
+        ValueError: If the address is not a Unix socket or a loopback address
+
+    Returns:
+        socketserver.BaseServer: The server. Its token is in `token`. Call
+            `serve_forever` to run it.
+    """
+    kind, address = parse_address(address)
+    if kind == "tcp" and not _is_loopback(address[0]):
+        raise ValueError("chepy serve only listens on loopback addresses")
+    if kind == "unix" and not hasattr(socketserver, "UnixStreamServer"):
+        raise ValueError(  # pragma: no cover
+            "Unix sockets are not supported on this platform"
+        )
+    if kind == "tcp" and not token:
+        token = secrets.token_urlsafe(32)
+    recipes = RecipeServer(cls, workers, allow_unsafe)
+    recipes.warm()
+    if kind == "unix":
+        if address == DEFAULT_ADDRESS:
+            os.makedirs(os.path.dirname(address), mode=0o700, exist_ok=True)
+        if os.path.exists(address):
+            os.unlink(address)
+        umask = os.umask(0o177)
+        try:
+            server = ThreadingUnixHTTPServer(address, RecipeHandler)
+        finally:
+            os.umask(umask)
+    else:
+        server = http.server.ThreadingHTTPServer(address, RecipeHandler)
+    server.recipes = recipes
+    server.token = token
+    return server
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """An HTTP connection over a Unix domain socket
+
+    Args:
+        socket_path (str): Path to the socket
+        timeout (Union[float, None], optional): Socket timeout. Defaults to None.
+    """
+
+    def __init__(self, socket_path: str, timeout: Union[float, None] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class RemoteClient(object):
+    """Client of `chepy serve`. It keeps one connection open and sends the
+    records in batches, so inputs of any size are streamed.
+
+    Args:
+        address (Union[str, None], optional): See `parse_address`. Defaults to
+            `DEFAULT_ADDRESS`.
+        timeout (Union[float, None], optional): Socket timeout. Defaults to None.
+        token (Union[str, None], optional): Token of the server. Defaults to the
+            `CHEPY_SERVE_TOKEN` environment variable.
+    """
+
+    def __init__(
+        self,
+        address: Union[str, None] = None,
+        timeout: Union[float, None] = None,
+        token: Union[str, None] = None,
+    ):
+        self.address = address or DEFAULT_ADDRESS
+        self.token = token or os.environ.get(TOKEN_ENV)
+        kind, address = parse_address(address)
+        if kind == "unix":
+            self.connection = UnixHTTPConnection(address, timeout)
+        else:
+            self.connection = http.client.HTTPConnection(*address, timeout=timeout)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _request(self, method: str, path: str, body: Union[bytes, None] = None):
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        if self.token:
+            headers["Authorization"] = "Bearer " + self.token
+        try:
+            self.connection.request(method, path, body, headers)
+        except (ConnectionRefusedError, FileNotFoundError) as e:
+            raise ConnectionError(
+                "No chepy serve process at {}: {}".format(self.address, e)
+            ) from None
+        response = self.connection.getresponse()
+        if response.status != 200:
+            error = response.read()
+            try:
+                error = json.loads(error)["error"]
+            except (ValueError, KeyError):
+                error = error.decode(errors="replace")
+            raise ValueError(error)
+        return response
+
+    def metrics(self) -> str:
+        """The metrics of the server
+
+        Returns:
+            str: The metrics in the Prometheus text format
+        """
+        return self._request("GET", "/metrics").read().decode()
+
+    def run(
+        self,
+        recipe: List[dict],
+        data: Iterable[bytes],
+        records: str = "line",
+        field: Union[str, None] = None,
+        ordered: bool = True,
+        batch_size: int = REMOTE_BATCH_SIZE,
+    ) -> Iterator[BatchResult]:
+        """Run a recipe on every record on the server, and yield the results
+        as they are streamed back.
+
+        Args:
+            recipe (List[dict]): The recipe
+            data (Iterable[bytes]): The records
+            records (str, optional): line, nul or ndjson. Defaults to "line".
+            field (Union[str, None], optional): Key path of the NDJSON value the recipe
+                runs on. Defaults to None.
+            ordered (bool, optional): Yield results in input order within a batch.
+                Defaults to True.
+            batch_size (int, optional): Records sent in one request. Defaults to 1024.
+
+        Raises:
+            ValueError: If the server rejects the request
+
+        Yields:
+            BatchResult: The result of every record, with its output encoded like
+                the outputs of `chepy --stdin`
+        """
+        offset = 0
+        for batch in _chunks(data, batch_size):
+            body = {
+                "recipe": recipe,
+                "data": [base64.b64encode(item).decode() for item in batch],
+                "records": records,
+                "field": field,
+                "ordered": ordered,
+            }
+            response = self._request("POST", "/run", json.dumps(body).encode())
+            # splitting blocks is much faster than readline on a chunked response
+            for line in iter_records(response, b"\n", BLOCK_SIZE):
+                result = json.loads(line)
+                index = offset + result["index"]
+                if "error" in result:
+                    yield BatchResult(index, error=result["error"])
+                else:
+                    yield BatchResult(index, base64.b64decode(result["output"]))
+            offset += len(batch)
@@ -0,0 +1,837 @@
+import base64
+import binascii
+import mmap
+import os
+import tempfile
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Union
+
+import regex as re
+
+#: Default read size used when iterating over a file backed state
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+#: Methods that process a stream chunk by chunk, either by piping it through
+#: transforms or by consuming it. Lazy plans fuse consecutive runs of these.
+STREAMING_METHODS = frozenset(
+    {
+        "add",
+        "sub",
+        "rot_13",
+        "rot_47",
+        "rotate_left",
+        "rotate_right",
+        "to_hex",
+        "from_hex",
+        "to_base64",
+        "from_base64",
+        "xor",
+        "gzip_compress",
+        "gzip_decompress",
+        "bzip_compress",
+        "bzip_decompress",
+        "zlib_compress",
+        "zlib_decompress",
+        "lzma_compress",
+        "lzma_decompress",
+        "blake_2b",
+        "blake_2s",
+        "hmac_hash",
+        "keccak_224",
+        "keccak_256",
+        "keccak_384",
+        "keccak_512",
+        "md2",
+        "md4",
+        "md5",
+        "ripemd_160",
+        "sha1",
+        "sha2_224",
+        "sha2_256",
+        "sha2_384",
+        "sha2_512",
+        "sha2_512_truncate",
+        "sha3_224",
+        "sha3_256",
+        "sha3_384",
+        "sha3_512",
+        "shake_128",
+        "shake_256",
+        "write_binary",
+    }
+)
+
+#: States and buffers smaller than this are not counted by a memory budget
+MIN_SPILL_SIZE = 1024 * 1024
+
+_STD_BASE64 = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:  # pragma: no cover
+        pass
+
+
+class Transform(object):
+    """A chunk transform. `update` is called with every chunk of input and
+    returns the output that is ready, `flush` is called once all the input
+    has been consumed and returns whatever is left.
+
+    Args:
+        update (Callable[[bytes], bytes]): Process a chunk of data
+        flush (Callable[[], bytes], optional): Finalize the transform. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        update: Callable[[bytes], bytes],
+        flush: Union[Callable[[], bytes], None] = None,
+    ):
+        self.update = update
+        self.flush = flush if flush is not None else bytes
+
+
+def run_transforms(
+    chunks: Iterable[bytes], transforms: Iterable[Transform]
+) -> Iterator[bytes]:
+    """Push chunks of data through a chain of transforms.
+
+    Args:
+        chunks (Iterable[bytes]): Input chunks
+        transforms (Iterable[Transform]): Transforms in the order they should run
+
+    Yields:
+        bytes: Output chunks
+    """
+    transforms = list(transforms)
+    for chunk in chunks:
+        for t in transforms:
+            chunk = t.update(chunk)
+        if chunk:
+            yield chunk
+    tail = b""
+    for t in transforms:
+        tail = (t.update(tail) if tail else b"") + t.flush()
+    if tail:
+        yield tail
+
+
+class FileStream(object):
+    """A lazy file backed state. The content of the file is never held in
+    memory; methods that support streaming read it `chunk_size` bytes at a
+    time, everything else materializes it with `read`.
+
+    Args:
+        path (Union[str, Path]): Path to the file
+        chunk_size (int, optional): Read size. Defaults to 1MB.
+        temporary (bool, optional): Delete the file once the stream is garbage
+            collected. Defaults to False.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        temporary: bool = False,
+    ):
+        self.path = Path(path)
+        self.chunk_size = int(chunk_size)
+        self.temporary = temporary
+        if temporary:
+            weakref.finalize(self, _unlink, str(self.path))
+
+    def __len__(self) -> int:
+        return self.path.stat().st_size
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self.chunks()
+
+    def __repr__(self) -> str:
+        return "<FileStream {} ({} bytes)>".format(self.path, len(self))
+
+    def chunks(self) -> Iterator[bytes]:
+        """Iterate over the content of the file
+
+        Yields:
+            bytes: At most `chunk_size` bytes
+        """
+        with open(self.path, "rb") as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def read(self) -> bytes:
+        """Read the whole file into memory
+
+        Returns:
+            bytes: File content
+        """
+        return self.path.read_bytes()
+
+    def pipe(self, *transforms: Transform) -> "FileStream":
+        """Run the content through transforms into a new temporary stream
+
+        Returns:
+            FileStream: A new stream with the transformed data
+        """
+        return FileStream.from_chunks(
+            run_transforms(self.chunks(), transforms), self.chunk_size
+        )
+
+    def write_to(self, f) -> None:
+        """Copy the content into an open binary file object
+
+        Args:
+            f (object): A writable binary file object
+        """
+        for chunk in self.chunks():
+            f.write(chunk)
+
+    @classmethod
+    def from_chunks(
+        cls, chunks: Iterable[bytes], chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> "FileStream":
+        """Write chunks into a temporary file and return a stream over it.
+        The file is deleted once the stream is garbage collected.
+
+        Args:
+            chunks (Iterable[bytes]): Data to write
+            chunk_size (int, optional): Read size. Defaults to 1MB.
+
+        Returns:
+            FileStream: The stream
+        """
+        fd, name = tempfile.mkstemp(prefix="chepy_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        except BaseException:
+            _unlink(name)
+            raise
+        return cls(name, chunk_size=chunk_size, temporary=True)
+
+
+class DeferredStream(FileStream):
+    """A stream that defers its transforms until it is read. `pipe` only
+    appends transforms, so consecutive streaming methods are fused into a
+    single chunked pass over the source without intermediate copies, and
+    adjacent byte substitutions are composed into one translation table.
+
+    Reading the stream with `read` keeps the result, so it can be read
+    again. Iterating over `chunks` runs the transforms and can only be
+    done once.
+
+    Args:
+        source (Union[bytes, bytearray, FileStream]): In memory data or a file backed stream
+        transforms (tuple, optional): Pending transforms. Defaults to ().
+        chunk_size (int, optional): Read size. Defaults to 1MB.
+    """
+
+    def __init__(
+        self,
+        source: Union[bytes, bytearray, FileStream],
+        transforms: tuple = (),
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self.source = source
+        self.transforms = tuple(transforms)
+        self.chunk_size = int(chunk_size)
+        self.path = source.path if isinstance(source, FileStream) else None
+        self.temporary = False
+        self._consumed = False
+
+    def __len__(self) -> int:
+        if not self.transforms:
+            return len(self.source)
+        return len(self.read())
+
+    def __repr__(self) -> str:
+        return "<DeferredStream {} with {} pending transforms>".format(
+            self.path or "({} bytes)".format(len(self.source)), len(self.transforms)
+        )
+
+    def _source_chunks(self) -> Iterator[bytes]:
+        if isinstance(self.source, FileStream):
+            yield from self.source.chunks()
+            return
+        view = memoryview(self.source)
+        for i in range(0, len(view), self.chunk_size):
+            yield bytes(view[i : i + self.chunk_size])
+
+    def chunks(self) -> Iterator[bytes]:
+        """Run the pending transforms over the source
+
+        Raises:
+            ValueError: If the transforms have already run
+
+        Yields:
+            bytes: Output chunks
+        """
+        if not self.transforms:
+            return self._source_chunks()
+        if self._consumed:
+            raise ValueError("The stream has already been consumed")
+        self._consumed = True
+        return run_transforms(self._source_chunks(), self.transforms)
+
+    def read(self) -> bytes:
+        """Run the pending transforms and keep the result in memory
+
+        Returns:
+            bytes: The transformed data
+        """
+        if isinstance(self.source, FileStream) and not self.transforms:
+            return self.source.read()
+        if self.transforms:
+            self.source, self.transforms = b"".join(self.chunks()), ()
+        return bytes(self.source)
+
+    def pipe(self, *transforms: Transform) -> "DeferredStream":
+        """Append transforms without running them
+
+        Returns:
+            DeferredStream: A new stream with the transforms pending
+        """
+        pending = list(self.transforms)
+        for t in transforms:
+            if (
+                pending
+                and isinstance(t, Translate)
+                and isinstance(pending[-1], Translate)
+            ):
+                t = pending.pop().then(t)
+            pending.append(t)
+        return DeferredStream(self.source, pending, self.chunk_size)
+
+
+class MappedFile(mmap.mmap):
+    """A read only memory mapped file used as a binary state. It supports the
+    buffer protocol, so hashing and regex searches run over the mapping
+    without copying it, and slicing only copies the requested range.
+
+    Args:
+        path (Union[str, Path]): Path to the file. Empty files cannot be mapped.
+    """
+
+    def __new__(cls, path: Union[str, Path]):
+        with open(path, "rb") as f:
+            self = super().__new__(cls, f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = Path(path)
+        return self
+
+    def __init__(self, path: Union[str, Path]):
+        pass
+
+    def __repr__(self) -> str:
+        return "<MappedFile {} ({} bytes)>".format(self.path, len(self))
+
+    def __eq__(self, other) -> bool:
+        try:
+            return memoryview(self) == memoryview(other)
+        except TypeError:
+            return NotImplemented
+
+    __hash__ = None
+
+
+class SpilledFile(MappedFile):
+    """A payload spilled to disk by a `StatePool`. It stays inside the
+    states and buffers that held the payload, and is loaded back as its
+    original type when one of them is read.
+
+    Args:
+        path (Union[str, Path]): Path to the spill file
+        kind (type): Type of the payload, bytes, bytearray or str
+    """
+
+    def __new__(cls, path: Union[str, Path], kind: type = bytes):
+        self = super().__new__(cls, path)
+        self.kind = kind
+        return self
+
+    def __init__(self, path: Union[str, Path], kind: type = bytes):
+        pass
+
+    def __repr__(self) -> str:
+        return "<SpilledFile {} ({} bytes)>".format(self.kind.__name__, len(self))
+
+    def __reduce__(self):
+        return (_identity, (self.load(),))
+
+    def load(self) -> Union[bytes, bytearray, str]:
+        """Read the payload back into memory
+
+        Returns:
+            Union[bytes, bytearray, str]: The payload as its original type
+        """
+        data = self[:]
+        if self.kind is str:
+            return data.decode("utf-8", "surrogatepass")
+        return self.kind(data)
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _unspill(value: Any) -> Any:
+    return value.load() if isinstance(value, SpilledFile) else value
+
+
+class StatePool(object):
+    """Memory budget shared by the states, initial states and buffers of a
+    Chepy object. Payloads are counted once no matter how many states and
+    buffers share them. When the payloads in memory exceed `max_bytes`, the
+    least recently used ones are written to temporary files and every
+    reference to them is replaced by a `SpilledFile`, a memory map of the
+    file. Reading a spilled state or buffer loads it back as its original
+    type and counts it again, so spilling is not visible to callers.
+
+    Only bytes, bytearray and str payloads of at least `min_size` bytes are
+    counted. A str payload is spilled as its UTF-8 encoding. The most
+    recently used payload is never spilled.
+
+    Args:
+        max_bytes (Union[int, None]): Budget in bytes. None disables the budget.
+        path (Union[str, Path, None], optional): Directory of the spill files.
+            Defaults to the system temporary directory.
+        min_size (int, optional): Smallest payload counted. Defaults to 1MB.
+    """
+
+    def __init__(
+        self,
+        max_bytes: Union[int, None],
+        path: Union[str, Path, None] = None,
+        min_size: int = MIN_SPILL_SIZE,
+    ):
+        self.max_bytes = max_bytes
+        self.path = str(path) if path else None
+        self.min_size = int(min_size)
+        #: Number of payloads spilled to disk
+        self.spilled = 0
+        self._resident = 0
+        self._entries = OrderedDict()
+        self._stores = weakref.WeakValueDictionary()
+
+    @property
+    def resident(self) -> int:
+        """Bytes of the counted payloads that are in memory
+
+        Returns:
+            int: Bytes
+        """
+        return self._resident
+
+    def _size(self, value: Any) -> int:
+        if self.max_bytes is None or not isinstance(value, (bytes, bytearray, str)):
+            return 0
+        size = len(value)
+        return size if size >= self.min_size else 0
+
+    def attach(self, store: "StateStore") -> None:
+        """Count the payloads of a store
+
+        Args:
+            store (StateStore): The store
+        """
+        self._stores[id(store)] = store
+        for value in dict.values(store):
+            self.add(value)
+
+    def detach(self, store: "StateStore") -> None:
+        """Stop counting the payloads of a store. The store keeps its items.
+
+        Args:
+            store (StateStore): The store
+        """
+        self._stores.pop(id(store), None)
+        for value in dict.values(store):
+            self.remove(value)
+
+    def add(self, value: Any) -> None:
+        """Count a new reference to a payload
+
+        Args:
+            value (Any): The payload
+        """
+        size = self._size(value)
+        if not size:
+            return
+        entry = self._entries.get(id(value))
+        if entry is None:
+            self._entries[id(value)] = [value, size, 1]
+            self._resident += size
+        else:
+            entry[2] += 1
+            self._entries.move_to_end(id(value))
+
+    def remove(self, value: Any) -> None:
+        """Drop a reference to a payload
+
+        Args:
+            value (Any): The payload
+        """
+        entry = self._entries.get(id(value))
+        if entry is None:
+            return
+        entry[2] -= 1
+        if entry[2] <= 0:
+            del self._entries[id(value)]
+            self._resident -= entry[1]
+
+    def touch(self, value: Any) -> None:
+        """Mark a payload as the most recently used
+
+        Args:
+            value (Any): The payload
+        """
+        if id(value) in self._entries:
+            self._entries.move_to_end(id(value))
+
+    def enforce(self) -> None:
+        """Spill the least recently used payloads until the budget is met"""
+        if self.max_bytes is None:
+            return
+        while self._resident > self.max_bytes and len(self._entries) > 1:
+            self._spill(next(iter(self._entries)))
+
+    def _spill(self, key: int) -> None:
+        value, size, _ = self._entries.pop(key)
+        self._resident -= size
+        fd, name = tempfile.mkstemp(prefix="chepy_spill_", dir=self.path)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if isinstance(value, str):
+                    f.write(value.encode("utf-8", "surrogatepass"))
+                else:
+                    f.write(value)
+            mapped = SpilledFile(name, type(value))
+        except BaseException:
+            _unlink(name)
+            raise
+        try:
+            os.unlink(name)
+        except OSError:  # pragma: no cover
+            # a mapped file cannot be removed on Windows until it is closed
+            weakref.finalize(mapped, _unlink, name)
+        for store in list(self._stores.values()):
+            for k, v in list(dict.items(store)):
+                if v is value:
+                    dict.__setitem__(store, k, mapped)
+        self.spilled += 1
+
+    def restore(self, spilled: SpilledFile, store: "StateStore") -> Any:
+        """Load a spilled payload back into every store that holds it, and
+        count it as the most recently used payload
+
+        Args:
+            spilled (SpilledFile): The spilled payload
+            store (StateStore): The store it was read from
+
+        Returns:
+            Any: The payload as its original type
+        """
+        value = spilled.load()
+        stores = list(self._stores.values())
+        if store not in stores:
+            stores.append(store)
+        for s in stores:
+            for k, v in list(dict.items(s)):
+                if v is spilled:
+                    dict.__setitem__(s, k, value)
+                    self.add(value)
+        self.enforce()
+        return value
+
+
+#: Pool of stores that are no longer tracked
+_UNTRACKED = StatePool(None)
+
+
+class StateStore(dict):
+    """A dict of states or buffers whose payloads are counted by a `StatePool`.
+    Reading an item marks its payload as recently used, and setting an item
+    can spill cold payloads to disk.
+
+    Args:
+        pool (StatePool): The memory budget
+        data (dict, optional): Initial items. Defaults to ().
+    """
+
+    def __init__(self, pool: StatePool, data=()):
+        super().__init__(data)
+        self.pool = pool
+        pool.attach(self)
+
+    def __reduce__(self):
+        return (dict, ({k: _unspill(v) for k, v in dict.items(self)},))
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if isinstance(value, SpilledFile):
+            return self.pool.restore(value, self)
+        self.pool.touch(value)
+        return value
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def __setitem__(self, key, value):
+        old = super().get(key)
+        super().__setitem__(key, value)
+        self.pool.add(value)
+        self.pool.remove(old)
+        self.pool.enforce()
+
+    def __delitem__(self, key):
+        value = super().__getitem__(key)
+        super().__delitem__(key)
+        self.pool.remove(value)
+
+    def pop(self, key, *default):
+        if key not in self:
+            return super().pop(key, *default)
+        value = super().pop(key)
+        self.pool.remove(value)
+        return value
+
+    def popitem(self):
+        key, value = super().popitem()
+        self.pool.remove(value)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        for value in dict.values(self):
+            self.pool.remove(value)
+        super().clear()
+
+    def detach(self) -> None:
+        """Stop counting the payloads of this store"""
+        self.pool.detach(self)
+        self.pool = _UNTRACKED
+
+
+class HexEncode(Transform):
+    """Streaming `binascii.hexlify`
+
+    Args:
+        delimiter (str, optional): Delimiter between bytes. Defaults to "".
+    """
+
+    def __init__(self, delimiter: str = ""):
+        self.delimiter = delimiter.encode() if isinstance(delimiter, str) else delimiter
+        self._started = False
+
+    def update(self, chunk: bytes) -> bytes:
+        if not chunk:
+            return b""
+        if not self.delimiter:
+            return binascii.hexlify(chunk)
+        out = binascii.hexlify(chunk, sep=self.delimiter)
+        if self._started:
+            out = self.delimiter + out
+        self._started = True
+        return out
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class HexDecode(Transform):
+    """Streaming hex decoder. Prefixes matching `replace` and any non hex
+    characters are dropped, so delimited hex decodes the same as plain hex.
+
+    Args:
+        replace (Union[bytes, None], optional): Regex of prefixes to remove. Defaults to b"%|0x".
+    """
+
+    def __init__(self, replace: Union[bytes, None] = b"%|0x"):
+        self.replace = re.compile(replace) if replace else None
+        self._carry = b""
+
+    def update(self, chunk: bytes) -> bytes:
+        data = self._carry + chunk
+        self._carry = b""
+        if self.replace is not None and data:
+            # a prefix could be split across two chunks
+            data, self._carry = data[:-1], data[-1:]
+            data = self.replace.sub(b"", data)
+        data = re.sub(rb"[^0-9a-fA-F]", b"", data)
+        if len(data) % 2:
+            data, odd = data[:-1], data[-1:]
+            self._carry = odd + self._carry
+        return binascii.unhexlify(data)
+
+    def flush(self) -> bytes:
+        data, self._carry = self._carry, b""
+        if self.replace is not None:
+            data = self.replace.sub(b"", data)
+        data = re.sub(rb"[^0-9a-fA-F]", b"", data)
+        return binascii.unhexlify(data[: len(data) - len(data) % 2])
+
+
+class Base64Encode(Transform):
+    """Streaming base64 encoder for 64 character alphabets with an optional
+    trailing `=` padding character.
+
+    Args:
+        alphabet (str): Expanded alphabet
+    """
+
+    def __init__(self, alphabet: str):
+        self.table = bytes.maketrans(_STD_BASE64, alphabet[:64].encode())
+        self.padding = len(alphabet) > 64
+        self._carry = b""
+
+    def update(self, chunk: bytes) -> bytes:
+        data = self._carry + chunk
+        cut = len(data) - len(data) % 3
+        data, self._carry = data[:cut], data[cut:]
+        return base64.b64encode(data).translate(self.table)
+
+    def flush(self) -> bytes:
+        out = base64.b64encode(self._carry)
+        self._carry = b""
+        if not self.padding:
+            out = out.rstrip(b"=")
+        return out.translate(self.table)
+
+
+class Base64Decode(Transform):
+    """Streaming base64 decoder for 64 character alphabets
+
+    Args:
+        alphabet (str): Expanded alphabet
+        remove_non_alpha (bool, optional): Drop characters that are not in the alphabet. Defaults to True.
+    """
+
+    def __init__(self, alphabet: str, remove_non_alpha: bool = True):
+        self.table = bytes.maketrans(alphabet[:64].encode(), _STD_BASE64)
+        self.strip = (
+            re.compile(b"[^" + re.escape(alphabet).encode() + b"]")
+            if remove_non_alpha
+            else None
+        )
+        self._carry = b""
+
+    def _clean(self, data: bytes) -> bytes:
+        if self.strip is not None:
+            data = self.strip.sub(b"", data)
+        return data.translate(self.table)
+
+    def update(self, chunk: bytes) -> bytes:
+        data = self._carry + self._clean(chunk)
+        cut = len(data) - len(data) % 4
+        data, self._carry = data[:cut], data[cut:]
+        return binascii.a2b_base64(data)
+
+    def flush(self) -> bytes:
+        data, self._carry = self._carry.rstrip(b"="), b""
+        if len(data) % 4 < 2:
+            data = data[: len(data) - len(data) % 4]
+        return binascii.a2b_base64(data + b"=" * (-len(data) % 4))
+
+
+class Translate(Transform):
+    """Streaming byte substitution
+
+    Args:
+        table (bytes): 256 byte translation table, see `bytes.maketrans`
+        widen (bool, optional): Encode every output byte as the UTF-8 encoding of
+            the code point with the same value. Defaults to False.
+    """
+
+    def __init__(self, table: bytes, widen: bool = False):
+        self.table = bytes(table)
+        self.widen = widen
+
+    @classmethod
+    def from_function(cls, func: Callable[[int], int], widen: bool = False):
+        """Build a substitution from a function that maps a byte value to a new value
+
+        Args:
+            func (Callable[[int], int]): The mapping
+            widen (bool, optional): See `Translate`. Defaults to False.
+
+        Returns:
+            Translate: The transform
+        """
+        return cls(bytes(func(i) for i in range(256)), widen)
+
+    def then(self, other: "Translate") -> "Translate":
+        """Compose with a substitution that runs after this one
+
+        Args:
+            other (Translate): The next substitution
+
+        Returns:
+            Translate: One substitution doing both, or a chain if this one widens
+        """
+        if self.widen:
+            return _TranslateChain(self, other)
+        return Translate(self.table.translate(other.table), other.widen)
+
+    def update(self, chunk: bytes) -> bytes:
+        out = chunk.translate(self.table)
+        if self.widen:
+            out = out.decode("latin-1").encode()
+        return out
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class _TranslateChain(Translate):
+    def __init__(self, first: Translate, second: Translate):
+        self.first, self.second = first, second
+        self.widen = second.widen
+
+    def then(self, other: Translate) -> Translate:
+        return _TranslateChain(self.first, self.second.then(other))
+
+    def update(self, chunk: bytes) -> bytes:
+        return self.second.update(self.first.update(chunk))
+
+
+class Xor(Transform):
+    """Streaming repeating key xor
+
+    Args:
+        key (bytes): Key
+    """
+
+    def __init__(self, key: bytes):
+        self.key = bytes(key)
+        self._offset = 0
+
+    def update(self, chunk: bytes) -> bytes:
+        if not chunk:
+            return b""
+        size = len(self.key)
+        start = self._offset % size
+        reps = (start + len(chunk)) // size + 1
+        key = (self.key * reps)[start : start + len(chunk)]
+        self._offset += len(chunk)
+        out = int.from_bytes(chunk, "big") ^ int.from_bytes(key, "big")
+        return out.to_bytes(len(chunk), "big")
+
+    def flush(self) -> bytes:
+        return b""
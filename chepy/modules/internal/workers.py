@@ -0,0 +1,303 @@
+import collections
+import contextlib
+import functools
+import itertools
+import os
+from concurrent import futures
+from typing import Any, Callable, Iterable, Iterator, List, NamedTuple, Tuple, Union
+
+from .cache import ResultCache
+
+
+class BatchResult(NamedTuple):
+    """The result of running a recipe on one input of a batch.
+
+    Args:
+        index (int): Position of the input in the batch
+        output (Any, optional): The final state. Defaults to None.
+        error (Union[str, None], optional): The error raised by the recipe. Defaults to None.
+    """
+
+    index: int
+    output: Any = None
+    error: Union[str, None] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+#: Executors accepted by the `executor` argument of the looping methods. The
+#: pools are looked up by name so that they are only imported when used.
+EXECUTORS = {"thread": "ThreadPoolExecutor", "process": "ProcessPoolExecutor"}
+
+
+def method_chain(methods: Iterable[tuple]) -> List[Tuple[str, dict]]:
+    """Normalize a list of `(method, args)` tuples, where method is a name or
+    a bound method, into `(name, args)` tuples that can be sent to a process.
+
+    Args:
+        methods (Iterable[tuple]): Methods and optional dictionaries of arguments
+
+    Returns:
+        List[Tuple[str, dict]]: Method names and arguments
+    """
+    return [
+        (
+            getattr(method[0], "__name__", method[0]),
+            method[1] if len(method) > 1 else {},
+        )
+        for method in methods
+    ]
+
+
+# the result caches of a process worker, by size and disk tier
+_worker_caches = {}
+
+
+def _worker_cache(max_bytes: int, path: Any, max_disk_bytes: int) -> ResultCache:
+    key = (max_bytes, str(path), max_disk_bytes)
+    if key not in _worker_caches:
+        _worker_caches[key] = ResultCache(max_bytes, path, max_disk_bytes)
+    return _worker_caches[key]
+
+
+def _apply_methods(
+    cls: type,
+    methods: List[Tuple[str, dict]],
+    cache: Union[ResultCache, tuple, None],
+    profiler: Any,
+    parent: Any,
+    data: Any,
+) -> Any:
+    chepy = cls(data)
+    chepy._record = False
+    if isinstance(cache, tuple):
+        cache = _worker_cache(*cache)
+    chepy._cache = cache
+    chepy._profiler = profiler
+    adopted = profiler.adopt(parent) if profiler else contextlib.nullcontext()
+    with adopted:
+        for name, kwargs in methods:
+            getattr(chepy, name)(**kwargs)
+    return chepy.o
+
+
+def map_methods(
+    cls: type,
+    items: Iterable[Any],
+    methods: List[Tuple[str, dict]],
+    workers: int,
+    executor: str = "thread",
+    cache: Union[ResultCache, None] = None,
+    profiler: Any = None,
+) -> list:
+    """Run a chain of methods over every item on a pool of workers. Every item
+    is loaded into its own Chepy object, so items never share a state.
+
+    Thread workers use the result cache and the profiler of the caller, and
+    their calls are recorded as children of the calling method.
+    Process workers use a result cache of their own with the same size and
+    disk tier, and are not profiled, since neither can be shared across
+    processes.
+
+    Args:
+        cls (type): The Chepy class
+        items (Iterable[Any]): The items
+        methods (List[Tuple[str, dict]]): Method names and arguments
+        workers (int): Number of workers
+        executor (str, optional): thread or process. Defaults to "thread".
+        cache (Union[ResultCache, None], optional): Result cache of the caller.
+            Defaults to None.
+        profiler (Profiler, optional): Profiler of the caller. Defaults to None.
+
+    Raises:
+        ValueError: If the executor is not valid
+
+    Returns:
+        list: The final state of every item, in order
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(
+            "executor must be one of {}".format(", ".join(sorted(EXECUTORS)))
+        )
+    if executor == "process":
+        if cache is not None:
+            cache = (cache.max_bytes, cache.path, cache.max_disk_bytes)
+        profiler = None
+    parent = profiler.current() if profiler is not None else None
+    func = functools.partial(_apply_methods, cls, methods, cache, profiler, parent)
+    with getattr(futures, EXECUTORS[executor])(int(workers)) as pool:
+        return list(pool.map(func, items))
+
+
+def default_threads() -> int:
+    """Default number of threads for I/O bound work, the same as
+    `ThreadPoolExecutor`
+
+    Returns:
+        int: Number of threads
+    """
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def _map_chunk(func: Callable[[Any], Any], chunk: list) -> list:
+    return [func(item) for item in chunk]
+
+
+def imap_threads(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    workers: Union[int, None] = None,
+    window: Union[int, None] = None,
+    chunksize: int = 1,
+) -> Iterator[Any]:
+    """Lazily map a function over items on a pool of threads. Results are
+    yielded in input order, and at most `window` items are in flight, so the
+    items are consumed as the results are.
+
+    Args:
+        func (Callable[[Any], Any]): The function
+        items (Iterable[Any]): The items
+        workers (Union[int, None], optional): Number of threads. Defaults to
+            `default_threads`.
+        window (Union[int, None], optional): Items in flight. Defaults to 4 per thread.
+        chunksize (int, optional): Items sent to a thread at once. Larger chunks cut
+            the overhead of cheap calls. Defaults to 1.
+
+    Yields:
+        Any: The result of every item
+    """
+    workers = workers or default_threads()
+    if workers <= 1:
+        yield from map(func, items)
+        return
+    if chunksize > 1:
+        chunks = _chunks(items, chunksize)
+        map_chunk = functools.partial(_map_chunk, func)
+        for results in imap_threads(map_chunk, chunks, workers, window):
+            yield from results
+        return
+    window = window or workers * 4
+    pending = collections.deque()
+    with futures.ThreadPoolExecutor(workers) as pool:
+        try:
+            for item in items:
+                pending.append(pool.submit(func, item))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+# the compiled recipe and the input loader of a pool worker, set once by the
+# pool initializer
+_pipeline = None
+_loader = None
+
+
+def _init_recipe_worker(
+    cls: type, recipe: list, loader: Union[Callable[[Any], Any], None] = None
+) -> None:
+    global _pipeline, _loader
+    _pipeline = cls.compile_recipe(recipe)
+    _loader = loader
+
+
+def _run_recipe(
+    index: int,
+    data: Any,
+    pipeline,
+    loader: Union[Callable[[Any], Any], None] = None,
+) -> BatchResult:
+    try:
+        if loader is not None:
+            data = loader(data)
+        return BatchResult(index, pipeline(data).o)
+    except Exception as e:
+        return BatchResult(index, error="{}: {}".format(type(e).__name__, e))
+
+
+def _run_recipe_chunk(chunk: List[Tuple[int, Any]]) -> List[BatchResult]:
+    return [_run_recipe(index, data, _pipeline, _loader) for index, data in chunk]
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[list]:
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, max(1, int(size))))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_recipe_batch(
+    pipeline,
+    inputs: Iterable[Any],
+    workers: Union[int, None] = None,
+    chunksize: int = 64,
+    ordered: bool = True,
+    loader: Union[Callable[[Any], Any], None] = None,
+) -> Iterator[BatchResult]:
+    """Run a compiled recipe over every input on a pool of processes. Every
+    worker compiles the recipe once when it starts and is reused for all the
+    chunks it receives. Only a few chunks per worker are in flight, so the
+    inputs are consumed as the results are.
+
+    Args:
+        pipeline (CompiledRecipe): The compiled recipe
+        inputs (Iterable[Any]): The inputs
+        workers (Union[int, None], optional): Number of processes. Defaults to the number of CPUs.
+        chunksize (int, optional): Number of inputs sent to a worker at once. Defaults to 64.
+        ordered (bool, optional): Yield results in input order instead of as they
+            complete. Defaults to True.
+        loader (Union[Callable[[Any], Any], None], optional): Called on every input
+            by the worker before the recipe runs, like a parser. It must be picklable,
+            and an input it fails on gets an error result. Defaults to None.
+
+    Yields:
+        BatchResult: The result of every input
+    """
+    items = enumerate(inputs)
+    workers = workers if workers is not None else os.cpu_count() or 1
+    if workers <= 1:
+        for index, data in items:
+            yield _run_recipe(index, data, pipeline, loader)
+        return
+
+    window = workers * 2
+    with futures.ProcessPoolExecutor(
+        workers,
+        initializer=_init_recipe_worker,
+        initargs=(pipeline.cls, pipeline.recipe, loader),
+    ) as executor:
+        chunks = _chunks(items, chunksize)
+        if ordered:
+            pending = collections.deque()
+            try:
+                for chunk in chunks:
+                    pending.append(executor.submit(_run_recipe_chunk, chunk))
+                    if len(pending) >= window:
+                        yield from pending.popleft().result()
+                while pending:
+                    yield from pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+            return
+        # keep a bounded number of chunks in flight so inputs are consumed lazily
+        pending = set()
+        for chunk in itertools.chain(chunks, [None]):
+            if chunk is not None:
+                pending.add(executor.submit(_run_recipe_chunk, chunk))
+                if len(pending) < window:
+                    continue
+            while pending and (chunk is None or len(pending) >= window):
+                done, pending = futures.wait(
+                    pending, return_when=futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    yield from future.result()
@@ -1,9 +1,11 @@
 import unicodedata
 from typing import TypeVar
 
-import emoji
+import lazy_import
 import regex as re
 
+emoji = lazy_import.lazy_module("emoji")
+
 from ..core import ChepyCore, ChepyDecorators
 
 LanguageT = TypeVar("LanguageT", bound="Language")
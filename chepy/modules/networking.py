@@ -1,14 +1,38 @@
 import collections
 import ipaddress
 import socket
-import ssl
 import urllib.parse as _py_urlparse
 from typing import TypeVar
 
+import lazy_import
 import regex as re
 
+ssl = lazy_import.lazy_module("ssl")
+
 from ..core import ChepyCore, ChepyDecorators
 
+
+def format_cert(cert: dict) -> dict:
+    """Flatten the subject, issuer and alt names of a certificate returned by
+    `SSLSocket.getpeercert` into dictionaries
+
+    Args:
+        cert (dict): The certificate
+
+    Returns:
+        dict: The certificate
+    """
+    final = {}
+    for key in cert.keys():
+        if key == "subject" or key == "issuer":
+            final[key] = dict(collections.ChainMap(*list(map(dict, cert[key]))))
+        elif key == "subjectAltName":
+            final[key] = list(map(lambda x: dict([x]), cert["subjectAltName"]))
+        else:
+            final[key] = cert[key]
+    return final
+
+
 NetworkingT = TypeVar("NetworkingT", bound="Networking")
 
 
@@ -184,20 +208,7 @@ class Networking(ChepyCore):
             context = ssl.create_default_context()
             context.check_hostname = False
             with context.wrap_socket(sock, server_hostname=domain) as sslsock:
-                cert = sslsock.getpeercert()
-                final = {}
-                for key in cert.keys():
-                    if key == "subject" or key == "issuer":
-                        final[key] = dict(
-                            collections.ChainMap(*list(map(dict, cert[key])))
-                        )
-                    elif key == "subjectAltName":
-                        final[key] = list(
-                            map(lambda x: dict([x]), cert["subjectAltName"])
-                        )
-                    else:
-                        final[key] = cert[key]
-                self.state = final
+                self.state = format_cert(sslsock.getpeercert())
                 return self
 
     @ChepyDecorators.call_stack
@@ -3,6 +3,8 @@ from typing import Any, TypeVar
 
 NetworkingT = TypeVar('NetworkingT', bound='Networking')
 
+def format_cert(cert: dict) -> dict: ...
+
 class Networking(ChepyCore):
     def __init__(self, *data: Any) -> None: ...
     state: Any = ...
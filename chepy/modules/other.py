@@ -1,8 +1,11 @@
 from typing import TypeVar
-from uuid import uuid4
+
+import lazy_import
 
 from ..core import ChepyCore, ChepyDecorators
 
+uuid4 = lazy_import.lazy_callable("uuid.uuid4")
+
 OtherT = TypeVar("OtherT", bound="Other")
 
 
@@ -3,6 +3,7 @@ from typing import TypeVar, Union
 import regex as re
 
 from ..core import ChepyCore, ChepyDecorators
+from .internal.patterns import compile_pattern, fixed_pattern
 
 SearchT = TypeVar("SearchT", bound="Search")
 
@@ -31,7 +32,7 @@ class Search(ChepyCore):
             [('abcdefg123', 'de', '12', '3'), ('abcdefg123', 'de', '12', '3')]
         """
         pattern = self._str_to_bytes(pattern)
-        self.state = re.findall(pattern, self._convert_to_bytes())
+        self.state = compile_pattern(pattern).findall(self._convert_to_buffer())
         return self
 
     @ChepyDecorators.call_stack
@@ -49,7 +50,7 @@ class Search(ChepyCore):
 
         converted = [self._to_bytes(s) for s in self.state]
         pattern = self._str_to_bytes(pattern)
-        pc = re.compile(pattern)
+        pc = compile_pattern(pattern)
 
         hold = []
         for search in converted:
@@ -79,7 +80,9 @@ class Search(ChepyCore):
             >>> Chepy("tests/files/flags").read_file().search_ctf_flags("pico").get_by_index(0)
             picoCTF{r3source_pag3_f1ag}
         """
-        self.state = re.findall(prefix + postfix, self._convert_to_str(), re.IGNORECASE)
+        self.state = compile_pattern(prefix + postfix, re.IGNORECASE).findall(
+            self._convert_to_str()
+        )
         return self
 
     @ChepyDecorators.call_stack
@@ -93,10 +96,9 @@ class Search(ChepyCore):
             >>> Chepy("tests/files/flags").read_file().search_slack_tokens().get_by_index(0)
             xoxp...859
         """
-        self.state = re.findall(
-            "(xox[p|b|o|a]-[0-9]{12}-[0-9]{12}-[0-9]{12}-[a-z0-9]{32})",
-            self._convert_to_str(),
-        )
+        self.state = fixed_pattern(
+            "(xox[p|b|o|a]-[0-9]{12}-[0-9]{12}-[0-9]{12}-[a-z0-9]{32})"
+        ).findall(self._convert_to_str())
         return self
 
     @ChepyDecorators.call_stack
@@ -106,10 +108,9 @@ class Search(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        self.state = re.findall(
-            r"https://hooks\.slack\.com/services/T[a-zA-Z0-9_]{8}/B[a-zA-Z0-9_]{8}/[a-zA-Z0-9_]{24}",
-            self._convert_to_str(),
-        )
+        self.state = fixed_pattern(
+            r"https://hooks\.slack\.com/services/T[a-zA-Z0-9_]{8}/B[a-zA-Z0-9_]{8}/[a-zA-Z0-9_]{24}"
+        ).findall(self._convert_to_str())
         return self
 
     @ChepyDecorators.call_stack
@@ -119,9 +120,9 @@ class Search(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        self.state = re.findall(
-            "-----BEGIN (RSA|OPENSSH|DSA|EC) PRIVATE KEY-----", self._convert_to_str()
-        )
+        self.state = fixed_pattern(
+            "-----BEGIN (RSA|OPENSSH|DSA|EC) PRIVATE KEY-----"
+        ).findall(self._convert_to_str())
         return self
 
     @ChepyDecorators.call_stack
@@ -131,7 +132,7 @@ class Search(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        self.state = re.findall("SK[a-z0-9]{32}", self._convert_to_str())
+        self.state = fixed_pattern("SK[a-z0-9]{32}").findall(self._convert_to_str())
         return self
 
     @ChepyDecorators.call_stack
@@ -141,5 +142,5 @@ class Search(ChepyCore):
         Returns:
             Chepy: The Chepy object.
         """
-        self.state = re.findall("AKIA[0-9A-Z]{16}", self._convert_to_str())
+        self.state = fixed_pattern("AKIA[0-9A-Z]{16}").findall(self._convert_to_str())
         return self
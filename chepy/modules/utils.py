@@ -1,6 +1,5 @@
 import lazy_import
 import random
-import difflib
 from collections import OrderedDict, Counter
 from typing import TypeVar, Union, Any
 from .internal.helpers import expand_alpha_range as _ex_al_range
@@ -8,11 +7,13 @@ from .internal.helpers import expand_alpha_range as _ex_al_range
 import chepy.modules.internal.colors as _int_colors
 
 exrex = lazy_import.lazy_module("exrex")
-import pydash
+pydash = lazy_import.lazy_module("pydash")
+difflib = lazy_import.lazy_module("difflib")
 import regex as re
 
 from ..core import ChepyCore, ChepyDecorators
 from .exceptions import StateNotDict, StateNotList
+from .internal.patterns import compile_pattern, fixed_pattern
 
 UtilsT = TypeVar("UtilsT", bound="Utils")
 
@@ -64,9 +65,9 @@ class Utils(ChepyCore):
             2
         """
         if case_sensitive:
-            r = re.compile(regex)
+            r = compile_pattern(regex)
         else:
-            r = re.compile(regex, re.IGNORECASE)
+            r = compile_pattern(regex, re.IGNORECASE)
         self.state = len(r.findall(self._convert_to_str()))
         return self
 
@@ -113,7 +114,7 @@ class Utils(ChepyCore):
             remove.append("\t")
         if form_feeds:
             remove.append("\f")
-        self.state = re.sub("|".join(remove), "", self._convert_to_str())
+        self.state = compile_pattern("|".join(remove)).sub("", self._convert_to_str())
         return self
 
     @ChepyDecorators.call_stack
@@ -167,11 +168,11 @@ class Utils(ChepyCore):
         if extended:
             flags += re.X
         if is_bytes:
-            self.state = re.findall(
-                self._to_bytes(pattern), self._convert_to_bytes(), flags=flags
+            self.state = compile_pattern(self._to_bytes(pattern), flags).findall(
+                self._convert_to_bytes()
             )
         else:
-            self.state = re.findall(pattern, self._convert_to_str(), flags=flags)
+            self.state = compile_pattern(pattern, flags).findall(self._convert_to_str())
         return self
 
     @ChepyDecorators.call_stack
@@ -201,10 +202,10 @@ class Utils(ChepyCore):
         """
         if trim:
             self.state = list(
-                map(pydash.trim, re.split(pattern, self._convert_to_str()))
+                map(pydash.trim, compile_pattern(pattern).split(self._convert_to_str()))
             )
         else:
-            self.state = re.split(pattern, self._convert_to_str())
+            self.state = compile_pattern(pattern).split(self._convert_to_str())
         return self
 
     @ChepyDecorators.call_stack
@@ -221,7 +222,9 @@ class Utils(ChepyCore):
             >>> Chepy("some string").split_by_n(2).o[2]
             " s"
         """
-        self.state = re.findall(".{1," + str(n) + "}", self._convert_to_str())
+        self.state = compile_pattern(".{1," + str(n) + "}").findall(
+            self._convert_to_str()
+        )
         return self
 
     @ChepyDecorators.call_stack
@@ -380,7 +383,8 @@ class Utils(ChepyCore):
         assert isinstance(self.state, list), StateNotList()
         if regex:
             pattern = by if isinstance(self.state[0], str) else by.encode()
-            self.state = [f for f in self.state if re.search(pattern, f)]
+            rgx = compile_pattern(pattern)
+            self.state = [f for f in self.state if rgx.search(f)]
         else:
             self.state = pydash.filter_(self.state, by)
         if len(self.state) == 1:
@@ -422,8 +426,9 @@ class Utils(ChepyCore):
             {'another': 'val'}
         """
         assert isinstance(self.state, dict), StateNotDict()
+        rgx = compile_pattern(by)
         self.state = {
-            key: val for (key, val) in self.state.items() if re.search(by, str(key))
+            key: val for (key, val) in self.state.items() if rgx.search(str(key))
         }
         return self
 
@@ -444,8 +449,9 @@ class Utils(ChepyCore):
             {'another': 'val'}
         """
         assert isinstance(self.state, dict), StateNotDict()
+        rgx = compile_pattern(by)
         self.state = {
-            key: val for (key, val) in self.state.items() if re.search(by, str(val))
+            key: val for (key, val) in self.state.items() if rgx.search(str(val))
         }
         return self
 
@@ -478,11 +484,9 @@ class Utils(ChepyCore):
             >>> Chepy("\033[31mThis is a string\033[0m").strip_ansi().o
             "This is a string"
         """
-        self.state = re.sub(
-            "[\u001b\u009b][[\\]()#;?]*(?:(?:(?:[a-zA-Z\\d]*(?:;[a-zA-Z\\d]*)*)?\u0007)|(?:(?:\\d{1,4}(?:;\\d{0,4})*)?[\\dA-PRZcf-ntqry=><~]))",
-            "",
-            self._convert_to_str(),
-        )
+        self.state = fixed_pattern(
+            "[\u001b\u009b][[\\]()#;?]*(?:(?:(?:[a-zA-Z\\d]*(?:;[a-zA-Z\\d]*)*)?\u0007)|(?:(?:\\d{1,4}(?:;\\d{0,4})*)?[\\dA-PRZcf-ntqry=><~]))"
+        ).sub("", self._convert_to_str())
         return self
 
     @ChepyDecorators.call_stack
@@ -503,7 +507,7 @@ class Utils(ChepyCore):
         flags = 0
         if ignore_case:
             flags = re.IGNORECASE
-        self.state = re.sub(pattern, "", self._convert_to_str(), flags=flags)
+        self.state = compile_pattern(pattern, flags).sub("", self._convert_to_str())
         return self
 
     @ChepyDecorators.call_stack
@@ -540,11 +544,8 @@ class Utils(ChepyCore):
         flags = 0
         if ignore_case:
             flags = re.IGNORECASE
-        self.state = re.sub(
-            self._to_bytes(pattern),
-            self._to_bytes(repl),
-            self._convert_to_bytes(),
-            flags=flags,
+        self.state = compile_pattern(self._to_bytes(pattern), flags).sub(
+            self._to_bytes(repl), self._convert_to_bytes()
         )
         return self
 
@@ -569,7 +570,7 @@ class Utils(ChepyCore):
             >>> Chepy("\\$ome' d@ta").unescape_string().o
             "$ome' d@ta"
         """
-        self.state = re.sub(r"\\", "", self._convert_to_str())
+        self.state = fixed_pattern(r"\\").sub("", self._convert_to_str())
         return self
 
     @ChepyDecorators.call_stack
@@ -890,7 +891,7 @@ class Utils(ChepyCore):
         data = self._convert_to_bytes()
         pattern = self._to_bytes(pattern)
         # Split the string using the regex pattern
-        split_items = re.split(pattern, data)
+        split_items = compile_pattern(pattern).split(data)
 
         # Filter out any empty strings from the split results
         filtered_items = [item for item in split_items if item]
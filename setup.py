@@ -48,7 +48,7 @@ setup(
         "Source Code": "https://github.com/securisec/chepy",
     },
     extras_require={"extras": core_extra_deps + plugin_deps},
-    packages=find_packages(exclude=(["tests", "docs"])),
+    packages=find_packages(exclude=(["tests", "docs", "benchmarks", "benchmarks.*"])),
     install_requires=requirements,
     classifiers=[
         "Programming Language :: Python :: 3.12",
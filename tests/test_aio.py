@@ -0,0 +1,82 @@
+import asyncio
+from concurrent import futures
+
+import pytest
+
+from chepy import Chepy
+from chepy.aio import AsyncChepy, shared_executor
+from chepy.modules.networking import format_cert
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_async_chain():
+    c = run(AsyncChepy("abc").to_hex().to_upper_case().run())
+    assert c.o == b"616263"
+    assert c.recipe == Chepy("abc").to_hex().to_upper_case().recipe
+
+    async def gather():
+        chains = [AsyncChepy(str(i)).to_hex() for i in range(10)]
+        return [c.o for c in await asyncio.gather(*chains)]
+
+    assert run(gather()) == [Chepy(str(i)).to_hex().o for i in range(10)]
+
+
+def test_async_executors():
+    async def chain(executor):
+        return await (
+            AsyncChepy("abc", "def", executor=executor)
+            .to_hex()
+            .save_buffer(0)
+            .change_state(1)
+            .to_base64()
+            .reverse()
+        )
+
+    expected = Chepy("def").to_base64().reverse().o
+    for executor in ("thread", "process", futures.ThreadPoolExecutor(2)):
+        c = run(chain(executor))
+        assert c.o == expected
+        assert c.buffers[0] == b"616263"
+        assert [s["function"] for s in c.recipe] == [
+            "to_hex",
+            "save_buffer",
+            "change_state",
+            "to_base64",
+            "reverse",
+        ]
+    assert shared_executor("process") is shared_executor("process")
+    with pytest.raises(ValueError):
+        AsyncChepy("a", executor="fiber")
+
+
+def test_async_files(tmp_path):
+    path = str(tmp_path / "out.bin")
+
+    async def chain():
+        await AsyncChepy("abc").to_hex().write_binary(path)
+        return await AsyncChepy(path).load_file().from_hex()
+
+    assert run(chain()).o == b"abc"
+
+
+def test_async_get_cert():
+    c = run(AsyncChepy("google.com").get_ssl_cert().run())
+    assert c.o["subject"]["commonName"] != ""
+
+
+def test_format_cert():
+    cert = {
+        "subject": ((("countryName", "US"),), (("commonName", "example.com"),)),
+        "issuer": ((("commonName", "CA"),),),
+        "subjectAltName": (("DNS", "example.com"), ("DNS", "www.example.com")),
+        "version": 3,
+    }
+    assert format_cert(cert) == {
+        "subject": {"countryName": "US", "commonName": "example.com"},
+        "issuer": {"commonName": "CA"},
+        "subjectAltName": [{"DNS": "example.com"}, {"DNS": "www.example.com"}],
+        "version": 3,
+    }
@@ -1,9 +1,18 @@
+import io
+import json
+import os
+import socket
+import subprocess
+import threading
 import sys
 import inspect
+import re
 import fire
 from docstring_parser import parse as _parse_doc
 from chepy import Chepy
-from chepy.modules.internal.cli import get_cli_options
+import pytest
+from chepy.modules.internal import batch, cli, server
+from chepy.modules.internal.cli import ReplSession, get_cli_options
 
 chepy = dir(Chepy)
 
@@ -62,3 +71,320 @@ def test_fire2():
 def test_fire3():
     fire_obj = fire.Fire(Chepy, command=["abc", "-", "hmac_hash", "--digest", "md5"])
     assert type(fire_obj) == Chepy
+
+
+def test_repl_session():
+    repl = ReplSession(["abc"])
+    assert not repl.go_back()
+    repl.run(["to_hex"])
+    assert repl.chepy.o == b"616263"
+    c = repl.chepy
+    # only the new command runs on the live object
+    repl.run(["from_hex", "-", "save_buffer", "-", "to_base64"])
+    assert repl.chepy is c and c.o == b"YWJj" and c.buffers == {0: b"abc"}
+    # a failed command leaves the object as it was
+    with pytest.raises(fire.core.FireExit):
+        repl.run(["reverse", "-", "search"])
+    assert c.o == b"YWJj" and len(c.recipe) == 4
+    assert repl.go_back()
+    assert c.o == b"616263" and c.buffers == {} and len(c.recipe) == 1
+    assert repl.go_back() and not repl.go_back()
+    assert c.state == "abc" and c.recipe == []
+
+
+def test_repl_session_undo():
+    repl = ReplSession(["a b"])
+    repl.run(["split_by_char", "--delimiter", " "])
+    items = repl.chepy.state
+    # for_each changes the list in place
+    repl.run(["for_each", "[('to_upper_case',)]"])
+    assert repl.chepy.state is items and items == [b"A", b"B"]
+    # commands that change nothing are not undone
+    repl.run(["state"])
+    assert len(repl._snapshots) == 2
+    assert repl.go_back() and repl.chepy.state == [b"a", b"b"]
+    # an unchanged list is copied once and shared by the following snapshots
+    repl.run(["save_buffer"])
+    repl.run(["save_buffer"])
+    first, second = [snapshot[0][0] for snapshot in list(repl._snapshots)[-2:]]
+    assert first is second and first is not repl.chepy.state
+    repl.chepy.state.append(b"c")
+    assert repl.go_back() and repl.go_back()
+    assert repl.chepy.state == [b"a", b"b"] and repl.chepy.buffers == {}
+
+
+def test_repl_session_undo_bytes():
+    repl = ReplSession(["a" * 1000], undo_bytes=8000)
+    for _ in range(4):
+        repl.run(["to_hex"])
+    # the history keeps the snapshots that fit, and always the last one
+    assert 1 <= len(repl._snapshots) < 4
+    assert repl.go_back() and len(repl.chepy.state) == 8000
+    repl = ReplSession(["a"], undo_bytes=0)
+    repl.run(["to_hex"])
+    repl.run(["to_hex"])
+    assert len(repl._snapshots) == 1 and repl.go_back()
+
+
+def test_lazy_startup():
+    # modules that are only loaded when a method or the prompt needs them.
+    # lazy_import registers placeholders, so check submodules that only the
+    # real import loads. The remote client does not assemble Chepy either
+    code = (
+        "import sys; from chepy.__main__ import main; "
+        "import chepy.modules.internal.server; "
+        "print(' '.join(m for m in {} if m in sys.modules))"
+    ).format(
+        [
+            "chepy._chepy",
+            "docstring_parser",
+            "emoji.core",
+            "fire.core",
+            "passlib.utils",
+            "pretty_errors",
+            "prompt_toolkit.application",
+            "pydash.arrays",
+            "concurrent.futures.process",
+        ]
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert out.stdout.strip() == ""
+
+
+def test_method_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(cli.config, "completion_index", tmp_path / "methods.json")
+    monkeypatch.setattr(cli, "_methods", None)
+    monkeypatch.setattr(cli, "_method_names", [])
+    methods = cli.method_index()
+    assert "to_hex" in methods and (tmp_path / "methods.json").exists()
+    assert cli.method_index() is methods
+    assert cli.complete_methods("to_he") == ["to_hex", "to_hexdump"]
+    assert cli.complete_methods("zzz") == []
+    # a later session reads the index from disk
+    monkeypatch.setattr(cli, "_methods", None)
+    monkeypatch.setattr(cli, "get_options", None)
+    assert cli.method_index() == methods
+    # and rebuilds it for another version
+    monkeypatch.setattr(cli, "_methods", None)
+    monkeypatch.setattr(cli, "__version__", "0")
+    monkeypatch.setattr(cli, "get_options", lambda: {"only": {}})
+    assert list(cli.method_index()) == ["only"]
+
+
+def test_stream_batch(tmp_path):
+    # records split across blocks, and no trailing delimiter
+    stream = io.BytesIO(b"ab\ncdefgh\n\nij")
+    assert list(batch.iter_records(stream, b"\n", 3)) == [b"ab", b"cdefgh", b"", b"ij"]
+    recipe = tmp_path / "recipe.json"
+    recipe.write_text(
+        json.dumps(
+            [{"function": "from_hex", "args": {}}, {"function": "to_upper_case"}]
+        )
+    )
+    out, err = io.BytesIO(), io.BytesIO()
+    failed = batch.run_stream_batch(
+        Chepy, str(recipe), io.BytesIO(b"6162\r\n6364\n"), out, err
+    )
+    assert failed == 0 and out.getvalue() == b"AB\nCD\n"
+    out = io.BytesIO()
+    records = b'{"a": {"b": "6162"}}\n\n{"a": {"b": "zz"}}\nnope\n'
+    failed = batch.run_stream_batch(
+        Chepy, str(recipe), io.BytesIO(records), out, err, "ndjson", "a.b"
+    )
+    assert failed == 2 and out.getvalue() == b'"AB"\n'
+    assert err.getvalue().split(b"\n")[1].startswith(b"2: JSONDecodeError")
+    assert batch.encode_output(b"\xff", "ndjson") == b'"\\\\xff"'
+
+    # the cli on a pool of processes
+    code = "from chepy.__main__ import main; main()"
+    args = ["-r", str(recipe), "--stdin", "--records", "nul"]
+    data = b"\0".join(b"%02x" % i for i in range(32, 127))
+    out = subprocess.run(
+        [sys.executable, "-c", code] + args + ["--workers", "2", "--unordered"],
+        input=data,
+        capture_output=True,
+        check=True,
+    )
+    assert sorted(out.stdout.split(b"\0")[:-1]) == sorted(
+        bytes([i]).upper() for i in range(32, 127)
+    )
+
+
+def test_dir_batch(tmp_path):
+    recipe = tmp_path / "recipe.json"
+    recipe.write_text(json.dumps([{"function": "from_hex"}, {"function": "reverse"}]))
+    in_dir, out_dir = tmp_path / "in", tmp_path / "in" / "out"
+    (in_dir / "a").mkdir(parents=True)
+    (in_dir / "a" / "1.hex").write_text("6162")
+    (in_dir / "2.hex").write_text("6364")
+    (in_dir / "3.hex").write_text("zz")
+    (in_dir / "4.txt").write_text("6566")
+
+    def run(**kwargs):
+        results = batch.run_dir_batch(
+            Chepy, str(recipe), in_dir, out_dir, "*.hex", **kwargs
+        )
+        return sorted(results)
+
+    results = run()
+    assert [(r.path, r.ok, r.skipped) for r in results] == [
+        ("2.hex", True, False),
+        ("3.hex", False, False),
+        ("a/1.hex", True, False),
+    ]
+    assert (out_dir / "a" / "1.hex").read_bytes() == b"ba"
+    assert not (out_dir / "4.txt").exists() and not (out_dir / "out").exists()
+    # unchanged files are skipped, changed ones and failures run again
+    (in_dir / "2.hex").write_text("656667")
+    assert [(r.path, r.skipped) for r in run()] == [
+        ("2.hex", False),
+        ("3.hex", False),
+        ("a/1.hex", True),
+    ]
+    assert (out_dir / "2.hex").read_bytes() == b"gfe"
+    out, err = io.StringIO(), io.StringIO()
+    assert batch.write_summary(run(force=True, workers=2), out, err) == 1
+    assert "2 done, 1 failed, 0 unchanged in " in out.getvalue()
+    assert "failed  3.hex: " in err.getvalue()
+    # only the output directory itself is skipped, not other files whose
+    # names match it, and its name is not a glob pattern
+    (in_dir / "a" / "out").mkdir()
+    (in_dir / "a" / "out" / "5.hex").write_text("6768")
+    (in_dir / "o1.hex").write_text("6970")
+    results = batch.run_dir_batch(Chepy, str(recipe), in_dir, in_dir / "o*", "*.hex")
+    assert sorted(r.path for r in results) == [
+        "2.hex",
+        "3.hex",
+        "a/1.hex",
+        "a/out/5.hex",
+        "o1.hex",
+        "out/2.hex",
+        "out/a/1.hex",
+    ]
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+def test_serve(tmp_path):
+    address = str(tmp_path / "chepy.sock")
+    httpd = server.make_server(Chepy, address, workers=1)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        client = server.RemoteClient(address)
+        recipe = [{"function": "from_hex"}, {"function": "to_upper_case"}]
+        results = list(client.run(recipe, [b"6162", b"zz", b"6364"], batch_size=2))
+        assert [(r.index, r.output) for r in results if r.ok] == [
+            (0, b"AB"),
+            (2, b"CD"),
+        ]
+        assert not results[1].ok
+        results = list(client.run(recipe, [b'{"a": "6162"}'], "ndjson", "a"))
+        assert results[0].output == b'"AB"'
+        with pytest.raises(ValueError, match="not a Chepy method"):
+            list(client.run([{"function": "nope"}], [b"x"]))
+        metrics = client.metrics()
+        assert "chepy_requests_total 4\n" in metrics
+        assert "chepy_failed_requests_total 1\n" in metrics
+        assert "chepy_record_errors_total 1\n" in metrics
+        assert "chepy_queue_depth 0\n" in metrics
+        assert "chepy_recipe_cache_hits_total 2\n" in metrics
+        for recipe in (
+            [{"function": "write_to_file", "args": {"path": "x"}}],
+            [{"function": "for_each", "args": {"methods": [["load_file", {}]]}}],
+            [{"function": "rsa_encrypt", "args": {"public_key": "/etc/passwd"}}],
+        ):
+            with pytest.raises(ValueError, match="not allowed by chepy serve"):
+                list(client.run(recipe, [b"x"]))
+        with pytest.raises(ValueError, match="list of steps"):
+            list(client.run("/etc/passwd", [b"x"]))
+        client.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        httpd.recipes.close()
+    assert not os.path.exists(address)
+    assert server.parse_address("8000") == ("tcp", ("127.0.0.1", 8000))
+    assert server.parse_address("http://[::1]:80/") == ("tcp", ("::1", 80))
+    assert server.parse_address("unix:chepy.sock") == ("unix", "chepy.sock")
+    with pytest.raises(ValueError, match="loopback"):
+        server.make_server(Chepy, "0.0.0.0:8765")
+    assert server.parse_address(None) == ("unix", server.DEFAULT_ADDRESS)
+    server.check_recipe(
+        [{"function": "rsa_encrypt", "args": {"public_key": "k", "is_file": False}}]
+    )
+    server.check_recipe([{"function": "load_file"}], allow_unsafe=True)
+    server.check_recipe([{"function": "loop_list", "args": {"callback": "to_hex"}}])
+
+
+# everything a method runs that reaches outside the states, found in its source
+_IO = re.compile(
+    r"(?<![\w.])open\(|_abs_path|walk_files|subprocess|_session|requests\.|"
+    r"socket|ssl\.|pickle\.loads|webbrowser|pyperclip|copy_to_clipboard|"
+    r"SourceFileLoader|_config|compile_recipe\(|is_file"
+)
+
+
+def test_serve_rejects_io_methods():
+    io_methods = []
+    for name in chepy:
+        method = getattr(Chepy, name)
+        if name.startswith("_") or not callable(method):
+            continue
+        source = inspect.getsource(inspect.unwrap(method))
+        if _IO.search(source.split('"""')[-1]):
+            io_methods.append(name)
+    assert {
+        "copy",
+        "copy_to_clipboard",
+        "from_pickle",
+        "load_file",
+        "run_recipe",
+        "run_script",
+        "search_dir",
+        "walk_dir",
+        "web",
+        "write_to_file",
+    } <= set(io_methods)
+    for name in io_methods:
+        for recipe in (
+            [{"function": name}],
+            [{"function": "loop_list", "args": {"callback": name}}],
+            [{"function": "for_each", "args": {"methods": [[name, {}]]}}],
+        ):
+            with pytest.raises(ValueError, match="not allowed by chepy serve"):
+                server.check_recipe(recipe)
+    assert not server.SERVE_METHODS - set(chepy)
+
+
+def test_serve_tcp():
+    httpd = server.make_server(Chepy, "127.0.0.1:0", workers=1)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    address = "127.0.0.1:{}".format(httpd.server_address[1])
+    recipe = [{"function": "from_hex"}]
+    try:
+        assert len(httpd.token) > 30
+        results = server.RemoteClient(address, token=httpd.token).run(recipe, [b"41"])
+        assert [r.output for r in results] == [b"A"]
+        with pytest.raises(ValueError, match="token"):
+            list(server.RemoteClient(address).run(recipe, [b"41"]))
+        with pytest.raises(ValueError, match="token"):
+            server.RemoteClient(address, token="wrong").metrics()
+
+        def post(headers):
+            connection = server.http.client.HTTPConnection(*httpd.server_address)
+            body = json.dumps({"recipe": recipe, "data": ["NDE="]})
+            headers["Authorization"] = "Bearer " + httpd.token
+            connection.request("POST", "/run", body, headers)
+            response = connection.getresponse()
+            return response.status, response.read()
+
+        # a cross site form post, and a page on a rebound domain
+        assert post({"Content-Type": "text/plain"})[0] == 415
+        status, body = post({"Content-Type": "application/json", "Host": "evil.com"})
+        assert status == 403 and b"loopback" in body
+        assert post({"Content-Type": "application/json"})[0] == 200
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        httpd.recipes.close()
@@ -1,5 +1,8 @@
+import os
+import sys
 from pathlib import Path
-from chepy.config import ChepyConfig
+from chepy.config import ChepyConfig, PluginAttribute, parse_size
+from chepy.core import ChepyCore
 
 
 def test_config():
@@ -18,3 +21,74 @@ def test_config():
     assert config.prompt_toolbar_version.startswith("#")
     assert config.prompt_char is not None
     assert len(config.prompt_colors.split()) == 3
+    assert config.memory_budget >= 0
+
+
+def test_parse_size():
+    assert parse_size("0") == 0
+    assert parse_size("512k") == 512 * 1024
+    assert parse_size("1.5G") == 1536 * 1024 ** 2
+    assert parse_size("64MB") == 64 * 1024 ** 2
+
+
+def test_plugin_index(tmp_path, monkeypatch):
+    plugins = tmp_path / "plugins"
+    plugins.mkdir()
+    source = plugins / "chepy_indextest.py"
+    source.write_text(
+        "import chepy.core\n\n\n"
+        "class _IndexBase(chepy.core.ChepyCore):\n"
+        "    def indextest_base(self):\n"
+        "        self.state = self.state + '!'\n"
+        "        return self\n\n\n"
+        "class IndexTest(_IndexBase):\n"
+        "    def __init__(self, *data):\n"
+        "        super().__init__(*data)\n\n"
+        "    def indextest_double(self):\n"
+        "        self.state = self.state * 2\n"
+        "        return self\n"
+    )
+    config = ChepyConfig()
+    config.plugin_path = plugins
+    config.plugin_index = tmp_path / "plugins.json"
+    try:
+        loaded = config.load_plugins()
+        assert [p.__name__ for p in loaded] == ["IndexTest"]
+        assert config.plugin_index.exists()
+
+        # a current index returns proxies without importing the plugin
+        del sys.modules["chepy_indextest"]
+        proxies = config.load_plugins()
+        assert isinstance(vars(proxies[0])["indextest_double"], PluginAttribute)
+        # inherited attributes and __init__ are known before the import too
+        assert {"__init__", "indextest_base"} <= set(vars(proxies[0]))
+        klass = type("WithPlugin", (*proxies, ChepyCore), {})
+        assert "indextest_base" in dir(klass)
+        assert "chepy_indextest" not in sys.modules
+        assert klass("ab").indextest_double().o == b"abab"
+        assert klass("ab").indextest_base().o == b"ab!"
+        assert "chepy_indextest" in sys.modules
+        assert "indextest_double" not in vars(proxies[0])
+        assert issubclass(proxies[0], sys.modules["chepy_indextest"].IndexTest)
+
+        # a changed plugin file is imported again
+        del sys.modules["chepy_indextest"]
+        mtime = source.stat().st_mtime_ns + 10 ** 9
+        os.utime(str(source), ns=(mtime, mtime))
+        assert config.load_plugins()[0] is sys.modules["chepy_indextest"].IndexTest
+
+        # sys.path is only scanned once a directory or a plugin file changes
+        with monkeypatch.context() as m:
+            m.setattr(config, "_discover_plugins", None)
+            assert len(config.load_plugins()) == 1
+        (plugins / "chepy_indexnew.py").write_text(
+            "import chepy.core\n\n\nclass IndexNew(chepy.core.ChepyCore):\n"
+            "    pass\n"
+        )
+        mtime = plugins.stat().st_mtime_ns + 10 ** 9
+        os.utime(str(plugins), ns=(mtime, mtime))
+        assert len(config.load_plugins()) == 2
+    finally:
+        sys.path.remove(str(plugins))
+        sys.modules.pop("chepy_indextest", None)
+        sys.modules.pop("chepy_indexnew", None)
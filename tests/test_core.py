@@ -1,7 +1,25 @@
+import collections
+import functools
+import http.server
+import importlib.machinery
+import json
 import os
 import tempfile
+import threading
+import pytest
+import regex as re
 from pathlib import Path
 from chepy import Chepy
+from chepy.core import ChepyCore, ChepyDecorators
+from chepy.modules.internal.cache import CACHEABLE, ResultCache, shared_cache
+from chepy.modules.internal.paths import compile_path, compile_paths, compile_query
+from chepy.modules.internal.patterns import PatternCache, compile_pattern
+from chepy.modules.internal.storage import (
+    DeferredStream,
+    FileStream,
+    SpilledFile,
+    Translate,
+)
 
 
 def test_states():
@@ -166,6 +184,29 @@ def test_load_dir():
     assert len(Chepy("tests/files/").load_dir().states) >= 10
 
 
+def test_load_dir_contents():
+    c = Chepy("tests/files/qr").load_dir(contents=True)
+    paths = Chepy("tests/files/qr").load_dir().states
+    assert len(c.states) == len(paths) == 2
+    for i, path in paths.items():
+        assert isinstance(c.states[i], bytearray)
+        assert c.states[i] == Path(path).read_bytes()
+    c = Chepy("tests/files/").load_dir("script.py", contents=True, workers=1)
+    assert c.state == Path("tests/files/script.py").read_text()
+    c = Chepy("tests/files/qr").load_dir(contents=True, max_size=10)
+    assert all(isinstance(s, FileStream) for s in c.states.values())
+    assert c.sha2_256().o == Chepy(paths[0]).load_file().sha2_256().o
+
+
+def test_load_dir_memory_budget(tmp_path):
+    mb = 1024 * 1024
+    for i in range(3):
+        (tmp_path / str(i)).write_bytes(b"\x00" * 2 * mb)
+    c = Chepy(str(tmp_path), memory_budget=5 * mb).load_dir(contents=True)
+    loaded = [s for s in c.states.values() if isinstance(s, bytearray)]
+    assert len(loaded) == 2 and len(c.states) == 3
+
+
 def test_load_file_binary():
     assert type(Chepy("tests/files/pkcs12").load_file(True).o) == bytearray
 
@@ -211,6 +252,256 @@ def test_recipe():
     Path(temp).unlink()
 
 
+def test_compile_recipe():
+    pipeline = Chepy.compile_recipe(
+        [
+            {"function": "from_base64", "args": {"alphabet": "standard"}},
+            {"function": "swap_case"},
+            {"function": "pick", "args": {"values": ["L", "O", "A", "B"]}},
+        ]
+    )
+    assert len(pipeline) == 3
+    assert "from_base64 -> swap_case" in repr(pipeline)
+    assert [pipeline(d).o for d in ("bG9sCg==", "YWJj")] == [b"LOL", b"AB"]
+    assert pipeline("bG9sCg==").recipe == []
+    c = pipeline.apply(Chepy("YWJj"))
+    assert c.o == b"AB"
+    assert [s["function"] for s in c.recipe] == ["from_base64", "swap_case", "pick"]
+    hashed = Chepy("abc").password_hashing("md5_crypt", salt="abc")
+    for recipe in (
+        hashed.recipe,
+        [{"function": "password_hashing", "args": {"format": "md5_crypt", "salt": "abc"}}],
+    ):
+        assert Chepy.compile_recipe(recipe)("abc").o == hashed.o
+    with pytest.raises(ValueError):
+        Chepy.compile_recipe([{"function": "not_a_method", "args": {}}])
+    with pytest.raises(ValueError):
+        Chepy.compile_recipe([{"function": "_convert_to_str", "args": {}}])
+    with pytest.raises(ValueError):
+        Chepy.compile_recipe([{"function": "to_hex", "args": {"nope": 1}}])
+    with pytest.raises(ValueError):
+        Chepy.compile_recipe([{"function": "xor", "args": {}}])
+    # callers of run_recipe caught the AttributeError of getattr
+    with pytest.raises(AttributeError):
+        Chepy("a").run_recipe([{"function": "not_a_method", "args": {}}])
+    with pytest.raises(TypeError):
+        Chepy("a").run_recipe([{"function": "to_hex", "args": {"nope": 1}}])
+    # the recorded recipe has the bound defaults, like chained calls
+    c = Chepy("a").run_recipe([{"function": "to_hex", "args": {}}])
+    assert c.recipe == Chepy("a").to_hex().recipe
+    assert c.recipe[0]["args"] == {"delimiter": ""}
+
+
+_decorated = collections.Counter()
+
+
+def _count(func):
+    @functools.wraps(func)
+    def counted(self, *args, **kwargs):
+        _decorated[func.__name__] += 1
+        return func(self, *args, **kwargs)
+
+    return counted
+
+
+class _Stacked(ChepyCore):
+    @ChepyDecorators.call_stack
+    @_count
+    def inner(self):
+        self.state = self.state + "i"
+        return self
+
+    @_count
+    @ChepyDecorators.call_stack
+    def outer(self):
+        self.state = self.state + "o"
+        return self
+
+    @_count
+    def plain(self):
+        self.state = self.state + "p"
+        return self
+
+
+def test_compile_recipe_stacked_decorators():
+    recipe = [{"function": name} for name in ("inner", "outer", "plain")]
+    chained = _Stacked("a").profile().inner().outer().plain()
+    _decorated.clear()
+    c = _Stacked("a").profile()
+    c.compile_recipe(recipe).apply(c)
+    assert c.state == chained.state == "aiop"
+    # every decorator runs once, and each step is recorded and profiled once
+    assert _decorated == {"inner": 1, "outer": 1, "plain": 1}
+    assert [s["function"] for s in c.recipe] == ["inner", "outer", "plain"]
+    assert [s.name for s in c.profiler.spans] == ["inner", "outer", "plain"]
+    assert c._record and c._profiler is not None
+
+
+def test_compile_recipe_file():
+    temp = Path(tempfile.gettempdir()) / os.urandom(24).hex()
+    Chepy("a").to_hex().save_recipe(str(temp))
+    first = Chepy.compile_recipe(str(temp))
+    assert Chepy.compile_recipe(str(temp)) is first
+    assert Chepy("b").load_recipe(str(temp)).o == b"62"
+    temp.write_text('[{"function": "to_base64", "args": {}}]')
+    os.utime(temp, ns=(0, 0))
+    assert Chepy.compile_recipe(str(temp)) is not first
+    assert Chepy("b").load_recipe(str(temp)).o == b"Yg=="
+    temp.unlink()
+
+
+def test_run_recipe_batch():
+    recipe = [{"function": "from_base64"}, {"function": "from_hex"}]
+    inputs = ["NDE=", "NDI=", "eno=", "NDM="] * 5
+    expected = [b"A", b"B", None, b"C"] * 5
+    for workers in (1, 2):
+        results = Chepy.run_recipe_batch(inputs, recipe, workers=workers, chunksize=3)
+        assert [r.index for r in results] == list(range(20))
+        assert [r.output for r in results] == expected
+        assert [r.ok for r in results[:4]] == [True, True, False, True]
+        assert results[2].error.startswith("Error")
+    unordered = Chepy.iter_recipe_batch(iter(inputs), recipe, workers=2, chunksize=2)
+    assert sorted(unordered) == sorted(results)
+    with pytest.raises(ValueError):
+        Chepy.run_recipe_batch(inputs, [{"function": "nope"}])
+
+
+def test_parallel_loops():
+    items = ["a", "bb", "ccc", "dddd"] * 4
+    expected = Chepy(list(items)).loop_list("sha1").o
+    for executor in ("thread", "process"):
+        assert (
+            Chepy(list(items)).loop_list("sha1", workers=2, executor=executor).o
+            == expected
+        )
+    assert Chepy(["41", "42"]).for_each(
+        [("from_hex",), ("to_hex",)], merge=",", workers=2
+    ).o == b"41,42"
+    c = Chepy("some", "data").fork([("to_hex",), ("sha1",)], workers=2)
+    assert c.states == Chepy("some", "data").fork([("to_hex",), ("sha1",)]).states
+    data = {"some": "val", "lol": "lol", "another": "aaaa"}
+    assert Chepy(data).loop_dict(
+        ["some", "lol", "nope"], "to_upper_case", workers=2, executor="process"
+    ).o == Chepy(data).loop_dict(["some", "lol", "nope"], "to_upper_case").o
+    with pytest.raises(ValueError):
+        Chepy(["a"]).loop_list("sha1", workers=2, executor="fiber")
+
+
+def test_parallel_loops_cache_and_profile():
+    items = ["a", "bb", "a", "bb"]
+    cache = ResultCache()
+    Chepy(list(items), cache=cache).loop_list("sha1", workers=2)
+    assert cache.hits + cache.misses == 4 and len(cache) == 2
+    Chepy(list(items), cache=cache).for_each([("sha1",)], workers=2)
+    assert cache.hits >= 4
+    c = Chepy(list(items)).profile().loop_list("sha1", workers=2)
+    (span,) = c.profiler.spans
+    # worker calls are children of the calling span, not roots of their own
+    assert span.name == "loop_list"
+    assert [child.name for child in span.children] == ["sha1"] * 4
+    assert all(child.parent is span for child in span.children)
+    assert c.profiler.current() is None
+    # process workers are not profiled, but still return the same results
+    c = Chepy(list(items), cache=cache).profile()
+    c.loop_list("sha1", workers=2, executor="process")
+    assert c.o == Chepy(list(items)).loop_list("sha1").o
+    assert [s.name for s in c.profiler.spans] == ["loop_list"]
+
+
+def test_result_cache():
+    cache = ResultCache()
+    for _ in range(3):
+        c = Chepy("aGVsbG8=", cache=cache).from_base64().to_hex()
+        assert c.o == b"68656c6c6f"
+    assert (cache.hits, cache.misses) == (4, 2)
+    assert c.cache is cache and c.recipe[0]["function"] == "from_base64"
+    assert Chepy("aGVsbG8=", cache=cache).to_hex(delimiter=":").o != c.o
+    assert cache.stats()["entries"] == 3 and "hits=4" in repr(cache)
+    Chepy([1, 2, 3], cache=cache).shuffle().shuffle()
+    Chepy({"a": 1}, cache=cache).get_by_key("a")
+    assert cache.stats()["entries"] == 3
+    Chepy(["a", "b"], cache=cache).loop_list("to_hex")
+    assert cache.stats()["entries"] == 5
+    pipeline = Chepy.compile_recipe(
+        [{"function": "from_base64"}, {"function": "pick", "args": {"values": ["h"]}}]
+    )
+    assert pipeline.apply(Chepy("aGVsbG8=", cache=cache)).o == b"h"
+    assert cache.hits == 5
+    cache.clear()
+    assert cache.stats()["entries"] == cache.hits == 0
+    assert Chepy("a").cache is None
+    assert Chepy("a", cache=True).cache is shared_cache()
+
+
+def test_result_cache_eviction_and_disk():
+    cache = ResultCache(max_bytes=100)
+    Chepy("a" * 200, cache=cache).to_hex()
+    for i in range(10):
+        Chepy(str(i), cache=cache).to_hex()
+    assert len(cache) < 10 and cache.size <= 100
+    path = Path(tempfile.gettempdir()) / os.urandom(8).hex()
+    Chepy("abc", cache=ResultCache(path=path)).sha2_256()
+    fresh = ResultCache(path=path)
+    assert Chepy("abc", cache=fresh).sha2_256().o.startswith(b"ba7816bf")
+    assert fresh.hits == 1
+    fresh.clear()
+    assert not list(path.glob("*/*"))
+    small = ResultCache(path=path, max_disk_bytes=600)
+    for i in range(20):
+        Chepy(str(i), cache=small).sha2_256()
+    assert 0 < len(list(path.glob("*/*"))) < 20
+    assert sum(f.stat().st_size for f in path.glob("*/*")) <= 600
+    small.clear()
+
+
+class _SideEffects(ChepyCore):
+    @ChepyDecorators.call_stack
+    def add_state(self):
+        self.states[len(self.states)] = self.state
+        return self
+
+
+def test_result_cache_side_effects():
+    c = _SideEffects("a")
+    c._cache = ResultCache()
+    c.add_state().add_state()
+    assert len(c.states) == 3 and len(c.cache) == 0
+
+    def append(chepy):
+        chepy.states[1].append("x")
+        return chepy
+
+    # changing another state in place is a side effect
+    cache = ResultCache()
+    c = Chepy("a", ["b"])
+    cache.call(c, append, "append", {}, (), {})
+    assert c.states[1] == ["b", "x"] and len(cache) == 0
+    cache.call(c, lambda chepy: chepy, "same", {}, (), {})
+    assert len(cache) == 1
+
+
+def test_result_cache_random_methods():
+    cache = ResultCache()
+    first, second = [
+        Chepy("x", cache=cache).generate_rsa_keypair().o["private"] for _ in range(2)
+    ]
+    assert first != second
+    key = "cGFzc3dvcmRwYXNzd29yZHBhc3N3b3JkcGFzc3dvcmQ="
+    assert len({Chepy("x", cache=cache).fernet_encrypt(key).o for _ in range(2)}) == 2
+    assert len({Chepy("x", cache=cache).bcrypt_hash(4).o for _ in range(2)}) == 2
+    assert len(cache) == 0 and cache.misses == 0
+    assert not CACHEABLE & {
+        "bcrypt_hash",
+        "fernet_encrypt",
+        "generate_ecc_keypair",
+        "generate_rsa_keypair",
+        "gzip_compress",
+        "password_hashing",
+        "pgp_encrypt",
+        "random_case",
+    }
+
+
 def test_loop():
     assert (
         Chepy("VmpGb2QxTXhXWGxTYmxKV1lrZDRWVmx0ZEV0alZsSllaVWRHYWxWVU1Eaz0=")
@@ -262,6 +553,56 @@ def test_loop_dict():
 
 def test_reset():
     assert Chepy("41", "42").from_hex().reset().states == {0: "41", 1: "42"}
+    c = Chepy("41").from_hex().reset().from_hex()
+    assert c._initial_states == {0: "41"}
+
+
+def test_memory_budget(tmp_path):
+    mb = 1024 * 1024
+    data = [bytes([i]) * 2 * mb for i in range(3)]
+    c = Chepy(*data, memory_budget=7 * mb)
+    assert c.memory.resident == 6 * mb
+    # payloads shared by states, buffers and the initial states count once
+    c.save_buffer().copy_state(3)
+    assert c.memory.resident == 6 * mb and c.memory.spilled == 0
+    c.change_state(1).state
+    c.change_state(2).state
+    c.set_state(b"\x09" * 2 * mb)
+    # the least recently used payload went to disk everywhere it was shared
+    assert c.memory.resident == 6 * mb
+    assert c.memory.spilled == 1
+    spilled = dict.__getitem__(c.states, 0)
+    assert isinstance(spilled, SpilledFile)
+    assert dict.__getitem__(c.buffers, 0) is spilled
+    assert dict.__getitem__(c._initial_states, 0) is spilled
+    # reading it loads it back everywhere it was shared
+    assert type(c.states[0]) is bytes and c.states[0] == data[0]
+    assert c.states[0] is c.buffers[0] is c.states[3] is c._initial_states[0]
+    assert c.memory.resident == 6 * mb and c.memory.spilled == 2
+    assert c.change_state(0).sha2_256().o == Chepy(data[0]).sha2_256().o
+    assert Chepy(*data, memory_budget=0).memory is None
+
+
+def test_memory_budget_types():
+    mb = 1024 * 1024
+    text = "\u00e9" * mb
+    c = Chepy(text, bytearray(b"b" * 2 * mb), b"c" * 2 * mb, memory_budget=4 * mb)
+    assert c.memory.spilled == 1
+    assert isinstance(dict.__getitem__(c.states, 0), SpilledFile)
+    c.change_state(0)
+    assert c.state == text and c.o.decode() == text
+    assert c.o + b"x" == text.encode() + b"x"
+    assert c.to_upper_case().o.decode() == text.upper()
+    assert isinstance(c.change_state(1).o, bytearray)
+    assert c.out == bytearray(b"b" * 2 * mb)
+    assert isinstance(c.states.get(2), bytes) and c.states.get(5) is None
+    # the cache does not load spilled states to look for side effects
+    c = Chepy(text, b"b" * 2 * mb, b"c" * 2 * mb, memory_budget=4 * mb)
+    c._cache = ResultCache()
+    assert isinstance(dict.__getitem__(c.states, 0), SpilledFile)
+    c.change_state(2).sha1()
+    assert isinstance(dict.__getitem__(c.states, 0), SpilledFile)
+    assert len(c.cache) == 1
 
 
 def test_load_from_url():
@@ -273,6 +614,63 @@ def test_load_from_url():
     )
 
 
+@pytest.fixture
+def http_server():
+    # requests is registered in sys.modules by lazy_import even when missing
+    if importlib.machinery.PathFinder.find_spec("requests") is None:
+        pytest.skip("requests is not installed")
+    connections = set()
+    hits = collections.Counter()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            connections.add(self.client_address)
+            hits[self.path] += 1
+            status, body = 200, self.path.encode()
+            if self.path == "/flaky" and hits[self.path] == 1:
+                status, body = 503, b""
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield "http://127.0.0.1:{}".format(server.server_port), connections, hits
+    server.shutdown()
+    server.server_close()
+
+
+def test_load_from_url_local(http_server):
+    url, connections, hits = http_server
+    assert Chepy(url + "/a").load_from_url().o == b"/a"
+    c = Chepy(url + "/b").http_request()
+    assert c.o["status"] == 200 and c.o["body"] == "/b"
+    # 503 is retried
+    assert Chepy(url + "/flaky").load_from_url().o == b"/flaky"
+    assert hits["/flaky"] == 2
+
+
+def test_load_from_urls(http_server):
+    url, connections, hits = http_server
+    urls = ["{}/{}".format(url, i) for i in range(40)]
+    c = Chepy(urls).load_from_urls(workers=4)
+    assert c.o == ["/{}".format(i).encode() for i in range(40)]
+    # keep-alive connections are reused
+    assert len(connections) <= 4
+    c = Chepy(url + "/x", url + "/y").load_from_urls(all_states=True)
+    assert c.states == {0: b"/x", 1: b"/y"}
+    assert Chepy([url + "/z", "http://127.0.0.1:1/"]).load_from_urls().o == [
+        b"/z",
+        None,
+    ]
+
+
 def test_for_each():
     assert Chepy(["41", "42"]).for_each([("from_hex",), ("to_hex",)]).o == [
         b"41",
@@ -361,7 +759,302 @@ def test_dump_json():
 
 def test_walk_dir():
     assert b"script.py" in Chepy("tests/files/").walk_dir().join("\n").o
+    # directories are listed like Path.glob("**/*") lists them
+    paths = Chepy("tests/files/").walk_dir().o
+    assert sorted(paths) == sorted(str(p) for p in Path("tests/files/").glob("**/*"))
+    files = Chepy("tests/files/").walk_dir(files_only=True).o
+    qr = str(Path("tests/files/qr"))
+    assert qr in paths and qr not in files
+    assert files == [p for p in paths if os.path.isfile(p)]
 
 
 def test_search_dir():
     assert len(Chepy("tests/files/qr/").search_dir("PNG").o) == 2
+    assert Chepy("tests/files/qr/").search_dir("PNG", workers=1).o == [b"PNG"] * 2
+    assert Chepy("tests/files/qr/").search_dir("PNG", skip_binary=True).o == []
+    assert Chepy("tests/files/qr/").search_dir("PNG", max_size=10).o == []
+    found = Chepy("tests/files/").search_dir("PNG", include="qr/*", offsets=True).o
+    assert isinstance(found, list) and sorted(found) == [
+        (str(Path("tests/files/qr", name)), 1, b"PNG")
+        for name in sorted(os.listdir("tests/files/qr"))
+    ]
+
+
+def test_walk_dir_filters():
+    paths = Chepy("tests/files/").walk_dir(include="*.py", lazy=True).o
+    assert not isinstance(paths, list)
+    assert str(Path("tests/files/script.py")) in list(paths)
+    assert Chepy("tests/files/").walk_dir(include="*.png", exclude="qr").o == [
+        p
+        for p in Chepy("tests/files/").walk_dir(include="*.png").o
+        if not p.startswith(str(Path("tests/files/qr")) + os.sep)
+    ]
+    empty = Chepy("tests/files/").walk_dir(max_size=0, files_only=True).o
+    assert sorted(empty) == sorted(
+        str(p)
+        for p in Path("tests/files/").rglob("*")
+        if p.is_file() and p.stat().st_size == 0
+    )
+
+
+def _stream(data: bytes, chunk_size: int = 7):
+    temp = Path(tempfile.gettempdir()) / os.urandom(12).hex()
+    temp.write_bytes(data)
+    c = Chepy(str(temp)).load_file(stream=True)
+    c.state.chunk_size = chunk_size
+    return c, temp
+
+
+def test_load_file_stream():
+    data = os.urandom(1000)
+    c, temp = _stream(data)
+    assert len(c.state) == 1000
+    assert c.sha2_256().o == Chepy(data).sha2_256().o
+    for method, args in [
+        ("md5", {}),
+        ("sha2_512_truncate", {}),
+        ("shake_128", {"size": 16}),
+        ("hmac_hash", {"key": "secret", "digest": "sha256"}),
+    ]:
+        c, _ = _stream(data)
+        assert getattr(c, method)(**args).o == getattr(Chepy(data), method)(**args).o
+    temp.unlink()
+
+
+def test_stream_transforms():
+    data = os.urandom(1000)
+    c, temp = _stream(data)
+    assert c.to_hex().o.read() == Chepy(data).to_hex().o
+    assert c.from_hex().o.read() == data
+    c.set_state(c.o).to_hex(":").from_hex()
+    assert c.o.read() == data
+    for alphabet in ["standard", "url_safe", "itoa64"]:
+        c, _ = _stream(data)
+        assert (
+            c.to_base64(alphabet).o.read() == Chepy(data).to_base64(alphabet).o
+        )
+        assert c.from_base64(alphabet).o.read() == data
+    c, _ = _stream(data)
+    assert c.xor("abcd", "utf8").o.read() == Chepy(data).xor("abcd", "utf8").o
+    assert c.xor("61626364").o.read() == data
+    temp.unlink()
+
+
+def test_stream_compression():
+    data = os.urandom(500) * 4
+    c, temp = _stream(data)
+    for compress, decompress in [
+        ("zlib_compress", "zlib_decompress"),
+        ("gzip_compress", "gzip_decompress"),
+        ("bzip_compress", "bzip_decompress"),
+        ("lzma_compress", "lzma_decompress"),
+    ]:
+        c, _ = _stream(data)
+        getattr(c, compress)()
+        assert len(c.o) < len(data)
+        assert getattr(Chepy(c.o.read()), decompress)().o == data
+        assert getattr(c, decompress)().o.read() == data
+    temp.unlink()
+
+
+def test_stream_write_and_materialize():
+    c, temp = _stream(b"stream data")
+    out = str(temp) + ".out"
+    c.write_binary(out)
+    assert Path(out).read_bytes() == b"stream data"
+    Path(out).unlink()
+    assert c.to_upper_case().o == b"STREAM DATA"
+    temp.unlink()
+
+
+def test_lazy():
+    data = os.urandom(5000).hex()
+
+    def chain(c):
+        return (
+            c.from_hex()
+            .xor("4142")
+            .to_base64()
+            .add(3)
+            .sub(3)
+            .rot_13()
+            .rot_47()
+            .rot_47()
+            .rot_13(rotate_numbers=True)
+            .from_base64()
+            .zlib_compress()
+            .zlib_decompress()
+            .rotate_left(2)
+            .rotate_right(3)
+            .to_hex()
+        )
+
+    lazy = chain(Chepy.lazy(data, chunk_size=7))
+    assert "from_hex -> xor" in repr(lazy)
+    assert lazy.o == chain(Chepy(data)).o
+    assert lazy.run() is lazy.run()
+    assert lazy.recipe == chain(Chepy(data)).recipe
+    assert (
+        Chepy.lazy("hello", chunk_size=2).to_hex().reverse().from_hex().sha2_256().o
+        == Chepy("hello").to_hex().reverse().from_hex().sha2_256().o
+    )
+    assert Chepy.lazy(["a", "b"]).loop_list("to_hex").o == [b"61", b"62"]
+    assert repr(Chepy.lazy("a")) == "<LazyChepy empty>"
+    with pytest.raises(AttributeError):
+        Chepy.lazy("a").not_a_method()
+
+
+def test_lazy_files():
+    c, temp = _stream(b"stream data")
+    out = str(temp) + ".out"
+    lazy = Chepy.lazy(str(temp), chunk_size=3).load_file(stream=True).to_hex().xor("01")
+    assert lazy.o.read() == Chepy(b"stream data").to_hex().xor("01").o
+    Chepy.lazy("abc").to_hex().write_binary(out).run()
+    assert Path(out).read_bytes() == b"616263"
+    Path(out).unlink()
+    temp.unlink()
+
+
+def test_deferred_stream():
+    add = Translate.from_function(lambda b: (b + 1) % 256)
+    stream = DeferredStream(b"abc", chunk_size=2).pipe(add, add, add)
+    assert len(stream.transforms) == 1
+    assert "1 pending" in repr(stream)
+    assert b"".join(stream.chunks()) == b"def"
+    with pytest.raises(ValueError):
+        stream.read()
+    rotate = Translate.from_function(lambda b: 255 - b, widen=True)
+    stream = DeferredStream(b"a").pipe(rotate, add, add)
+    assert len(stream) == 2
+    assert stream.read() == bytes(b + 2 for b in chr(255 - 97).encode())
+    assert DeferredStream(b"abc").read() == b"abc"
+
+
+def test_profile():
+    c = Chepy(["a", "b"], profile=True).loop_list("hmac_hash", {"key": "k"})
+    c.loop_list("to_hex")
+    spans = c.profiler.as_dict()
+    assert [s["function"] for s in spans] == ["loop_list", "loop_list"]
+    assert [s["function"] for s in spans[0]["children"]] == ["hmac_hash"] * 2
+    assert spans[0]["in_size"] == 2 and spans[0]["wall"] > 0
+    assert "  hmac_hash" in c.profiler.table()
+    assert json.loads(c.profiler.to_json())[1]["children"][0]["out_size"] == 80
+    trace = c.profiler.chrome_trace()["traceEvents"]
+    assert len(trace) == 6 and trace[0]["ph"] == "X"
+    temp = Path(tempfile.gettempdir()) / os.urandom(8).hex()
+    c.profiler.save_chrome_trace(temp)
+    assert json.loads(temp.read_text())["traceEvents"] == json.loads(json.dumps(trace))
+    temp.unlink()
+    with pytest.raises(Exception):
+        c.from_hex()
+    assert c.profiler.spans[-1].error is not None
+    assert len(c.profiler) == 3
+    c.profiler.clear()
+    assert len(c.profiler) == 0 and Chepy("a").profiler is None
+
+
+def test_profile_memory():
+    c = Chepy("abc").profile(memory=True).to_hex().to_base64()
+    pipeline = Chepy.compile_recipe(
+        [{"function": "from_base64"}, {"function": "from_hex"}]
+    )
+    pipeline.apply(c)
+    assert c.o == b"abc"
+    spans = c.profiler.spans
+    assert [s.name for s in spans] == ["to_hex", "to_base64", "from_base64", "from_hex"]
+    assert all(s.peak is not None for s in spans)
+    assert "peak_memory" in c.profiler.chrome_trace()["traceEvents"][0]["args"]
+    c.profiler.close()
+    assert c.to_hex().profiler.spans[-1].peak is None
+
+
+def test_load_file_memory_map():
+    data = Path("tests/files/hello").read_bytes()
+
+    def mapped():
+        return Chepy("tests/files/hello").load_file(binary_mode=True, memory_map=True)
+
+    c = mapped()
+    assert len(c.state) == len(data)
+    assert c._convert_to_bytes() == data
+    assert c.sha2_256().o == Chepy(data).sha2_256().o
+    assert mapped().md5().o == Chepy(data).md5().o
+    assert mapped().search(b"__[A-Z]+").o == Chepy(data).search(b"__[A-Z]+").o
+    assert mapped().extract_strings().o == Chepy(data).extract_strings().o
+    assert mapped().slice(0, 4).o == data[0:4]
+    assert mapped().register(b"(__[A-Z]+)")._registers["$R0"] == b"__PAGEZERO"
+
+
+def test_call_stack_args():
+    c = Chepy("abc").to_hex(delimiter=":").get_by_index(0, 1)
+    assert c.recipe == [
+        {"function": "to_hex", "args": {"delimiter": ":"}},
+        {"function": "get_by_index", "args": {"indexes": (0, 1)}},
+    ]
+    try:
+        Chepy("abc").to_hex(nope=1)
+    except TypeError:
+        pass
+    c = Chepy("abc")
+    try:
+        c.hmac_hash(b"k", "md5", "extra")
+    except TypeError:
+        assert c.recipe == []
+
+
+def test_no_recording():
+    from chepy.core import recording
+
+    c = Chepy(["a", "b"], record=False)
+    assert c.loop_list("to_hex").o == [b"61", b"62"]
+    assert c.recipe == []
+    with recording(False):
+        c = Chepy("a").loop(2, "to_hex")
+    assert c.recipe == []
+    assert Chepy("a").to_hex().recipe != []
+
+
+def test_pattern_cache():
+    cache = PatternCache(maxsize=2)
+    a = cache.compile("a")
+    assert cache.compile("a") is a
+    assert cache.compile("a", re.I) is not a
+    assert cache.compile(b"a") is not a
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 3
+    assert len(cache) == 2
+    fixed = cache.compile("f+", pin=True)
+    for p in ("b", "c", "d"):
+        cache.compile(p)
+    assert cache.compile("f+", pin=True) is fixed
+    assert cache.compile(fixed) is fixed
+    assert cache.stats()["pinned"] == 1 and len(cache) == 3
+    cache.clear()
+    assert len(cache) == 0 and cache.hits == cache.misses == 0
+
+    c = Chepy("abcabc")
+    hits = c.patterns.hits
+    for _ in range(3):
+        c.search("ab(c)")
+        c.state = "abcabc"
+    assert c.patterns.hits >= hits + 2
+    assert compile_pattern(b"ab(c)") is compile_pattern(b"ab(c)")
+
+
+def test_get_by_key_compiled():
+    data = {"a": {"b": [{"c": 1}, {"c": 2}], "d": "e"}, "f": 3}
+    keys = ("a.b[1].c", "a.d", "f", "a.b[*].c", "a.x", "a.b[z].c")
+    c = Chepy(data).get_by_key(*keys, py_style=True)
+    assert c.o == [2, "e", 3, [1, 2], data["a"], data["a"]]
+    assert c.o == [Chepy(data).get_by_key(k, py_style=True).state for k in keys]
+    assert compile_path("a.b[1].c") is compile_path("a.b[1].c")
+    assert compile_paths(keys).get(data, lambda e: None) == c.o
+    with pytest.raises(ValueError):
+        compile_paths(keys).get(data)
+    # like a single key, several jmespath keys get the value of the first one
+    # and fail when it does not match
+    assert Chepy(data).get_by_key("a.d", "f").state == "e"
+    with pytest.raises(ValueError, match="did not match"):
+        Chepy(data).get_by_key("a.x", "f")
+    assert Chepy(data).jmespath_search("a.b[].c").o == [1, 2]
+    assert Chepy(data).jmespath_search("nothing").o is None
+    assert compile_query("a.d") is compile_query("a.d")